@@ -0,0 +1,196 @@
+"""
+Generates synthetic repositories to be analyzed by the benchmarks
+
+Usage: python -m benchmarks.generator <output dir> [--files 200] [--functions 20] [--classes 4] [--fan-out 4]
+"""
+
+import argparse
+import random
+import shutil
+from pathlib import Path
+
+# Calls to names that are never defined in the generated repository
+UNKNOWN_CALLS = ["print", "len", "os.path.join", "json.dumps", "logger.info"]
+
+
+class RepoSpec:
+    """
+    Shape of a synthetic repository
+    Args:
+    - files(int): number of python files
+    - functions(int): functions defined in each file
+    - classes(int): classes defined in each file, each one with an __init__ and a run method
+    - methods(int): extra methods of each class
+    - fan_out(int): calls made inside each function and method
+    - inheritance_depth(int): length of the chains of classes inheriting from each other inside a file, 0 for none
+    - collisions(float): fraction of the functions named after a pool of names shared by every file
+    - layers(int): files are split in layers and only call what the next layer defines, bounding the depth of the maps
+    - files_per_package(int): number of files inside each package directory
+    - seed(int): seed of the random choices, the same spec always generates the same repository
+    """
+
+    def __init__(
+        self,
+        files: int = 200,
+        functions: int = 20,
+        classes: int = 4,
+        methods: int = 3,
+        fan_out: int = 4,
+        inheritance_depth: int = 2,
+        collisions: float = 0.05,
+        layers: int = 12,
+        files_per_package: int = 25,
+        seed: int = 0,
+    ) -> None:
+        self.files = files
+        self.functions = functions
+        self.classes = classes
+        self.methods = methods
+        self.fan_out = fan_out
+        self.inheritance_depth = inheritance_depth
+        self.collisions = collisions
+        self.layers = layers
+        self.files_per_package = files_per_package
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def function_names(spec: RepoSpec, rng: random.Random) -> list[list[str]]:
+    """
+    Returns the names of the functions of each file, some of them taken from the shared pool
+    """
+    shared_pool = max(1, spec.functions)
+    names = []
+    for file_number in range(spec.files):
+        file_names = []
+        for number in range(spec.functions):
+            if rng.random() < spec.collisions:
+                file_names.append(f"shared_{rng.randrange(shared_pool)}")
+            else:
+                file_names.append(f"func_{file_number}_{number}")
+        names.append(file_names)
+    return names
+
+
+def call_lines(targets: list[str], rng: random.Random, indent: str) -> list[str]:
+    """
+    Lines making a call to each target, alternating between statements, assignments and blocks of code
+    """
+    lines = []
+    for position, target in enumerate(targets):
+        kind = position % 4
+        if kind == 0:
+            lines.append(f"{indent}{target}(value)")
+        elif kind == 1:
+            lines.append(f"{indent}value = {target}(value)")
+        elif kind == 2:
+            lines += [f"{indent}if value:", f"{indent}    {target}(value)"]
+        else:
+            lines += [f"{indent}for item in range(value):", f"{indent}    {target}(item)"]
+    if rng.random() < 0.5:
+        lines.append(f"{indent}{rng.choice(UNKNOWN_CALLS)}(value)")
+    return lines
+
+
+def module_source(
+    spec: RepoSpec, file_number: int, names: list[list[str]], callable_names: list[str], rng: random.Random
+) -> str:
+    """
+    Source of one generated file, calling the names in callable_names
+    """
+    pick = lambda: rng.sample(callable_names, min(spec.fan_out, len(callable_names)))
+    lines = ["import json", "import os", ""]
+    for name in names[file_number]:
+        lines += [f"def {name}(value, option=None):", f'    """Docstring of {name}"""', "    result = value"]
+        lines += call_lines(pick(), rng, "    ")
+        lines += ["    return result", "", ""]
+    chain = spec.inheritance_depth + 1
+    for number in range(spec.classes):
+        class_name = f"Cls_{file_number}_{number}"
+        parent = f"Cls_{file_number}_{number - 1}" if spec.inheritance_depth and number % chain else "object"
+        lines += [f"class {class_name}({parent}):", f'    """Docstring of {class_name}"""', "    limit = 10", ""]
+        lines += ["    def __init__(self, value):"]
+        if parent != "object":
+            lines.append("        super().__init__(value)")
+        lines += ["        self.value = value"]
+        if callable_names:
+            lines.append(f"        self.name = {rng.choice(callable_names)}(value)")
+        lines.append("")
+        lines += ["    def run(self, value):"]
+        lines += call_lines(pick(), rng, "        ")
+        lines += [f"        self.step_{rng.randrange(max(1, spec.methods))}(value)", "        return value", ""]
+        for method in range(spec.methods):
+            lines += [f"    def step_{method}(self, value):"]
+            lines += call_lines(pick(), rng, "        ")
+            lines += ["        return value", ""]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_repo(path: str | Path, spec: RepoSpec | None = None) -> list[Path]:
+    """
+    Writes a synthetic repository following spec to path, replacing whatever was there
+    Returns the paths of the generated files
+    """
+    spec = spec if spec is not None else RepoSpec()
+    path = Path(path)
+    if path.exists():
+        shutil.rmtree(path)
+    rng = random.Random(spec.seed)
+    names = function_names(spec, rng)
+    layers = max(1, spec.layers)
+    layer_names = [[] for _ in range(layers + 1)]
+    for file_number, file_names in enumerate(names):
+        layer = layer_names[file_number % layers]
+        layer += file_names
+        layer += [f"Cls_{file_number}_{number}" for number in range(spec.classes)]
+    paths = []
+    for file_number in range(spec.files):
+        package = path / f"pkg_{file_number // spec.files_per_package}"
+        package.mkdir(parents=True, exist_ok=True)
+        file_path = package / f"mod_{file_number}.py"
+        callable_names = layer_names[file_number % layers + 1]
+        file_path.write_text(module_source(spec, file_number, names, callable_names, rng))
+        paths.append(file_path)
+    return paths
+
+
+def spec_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the fields of RepoSpec as options of a command line parser
+    """
+    defaults = RepoSpec()
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--functions", type=int, default=defaults.functions, help="functions per file")
+    parser.add_argument("--classes", type=int, default=defaults.classes, help="classes per file")
+    parser.add_argument("--methods", type=int, default=defaults.methods, help="extra methods per class")
+    parser.add_argument("--fan-out", type=int, default=defaults.fan_out, help="calls per function")
+    parser.add_argument("--inheritance-depth", type=int, default=defaults.inheritance_depth)
+    parser.add_argument("--collisions", type=float, default=defaults.collisions, help="fraction of shared names")
+    parser.add_argument("--layers", type=int, default=defaults.layers, help="layers of files calling each other")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_arguments(args: argparse.Namespace) -> RepoSpec:
+    return RepoSpec(
+        files=args.files,
+        functions=args.functions,
+        classes=args.classes,
+        methods=args.methods,
+        fan_out=args.fan_out,
+        inheritance_depth=args.inheritance_depth,
+        collisions=args.collisions,
+        layers=args.layers,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output")
+    spec_arguments(parser)
+    args = parser.parse_args()
+    paths = generate_repo(args.output, spec_from_arguments(args))
+    print(f"{len(paths)} files written to {args.output}")
@@ -0,0 +1,49 @@
+"""
+Measures the peak resident memory of analyzing a synthetic repository, with and without lean models
+
+Usage: python -m benchmarks.memory [--files 500 ...]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.generator import generate_repo, spec_arguments, spec_from_arguments
+
+# Runs in a process of its own, since the peak resident memory can only grow
+ANALYSIS = """
+import json, resource, sys, time
+from libraries.mapper import Analyzer
+start = time.perf_counter()
+# With "none" only the interpreter and the imports are measured
+models = len(Analyzer(sys.argv[1], jobs=1, lean=sys.argv[2] == "lean").models_list) if sys.argv[2] != "none" else 0
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"models": models, "seconds": seconds, "peak_rss_kb": peak}))
+"""
+
+
+def measure(path: str, mode: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", ANALYSIS, path, mode], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    spec_arguments(parser)
+    parser.set_defaults(files=500)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        generate_repo(directory, spec_from_arguments(args))
+        interpreter = measure(directory, "none")["peak_rss_kb"]
+        results = {mode: measure(directory, mode) for mode in ("full", "lean")}
+    for mode, result in results.items():
+        result["analysis_rss_kb"] = result["peak_rss_kb"] - interpreter
+        print(
+            f"{mode:<6}{result['models']:>8} models {result['seconds']:>8.2f}s "
+            f"peak {result['peak_rss_kb'] / 1024:>8.1f}MB, {result['analysis_rss_kb'] / 1024:>8.1f}MB over the interpreter"
+        )
+    ratio = results["full"]["analysis_rss_kb"] / max(1, results["lean"]["analysis_rss_kb"])
+    print(f"lean models use {ratio:.1f}x less memory")
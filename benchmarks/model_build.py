@@ -0,0 +1,99 @@
+"""
+Measures the time spent building FunctionMd/ClassMd models out of already parsed files
+
+Usage: python -m benchmarks.model_build [--functions 10000] [--per-file 100] [--repeat 3]
+"""
+
+import argparse
+import ast
+import time
+from pathlib import Path
+
+from libraries.models.class_def import ClassMd
+from libraries.models.function_def import FunctionMd
+
+
+def synthetic_module(first: int, count: int) -> str:
+    """
+    Source of a module with count definitions, one class for every ten functions
+    """
+    lines = ["import os", ""]
+    for number in range(first, first + count):
+        if number % 10 == 9:
+            parent = f"Cls{number - 10}" if number >= 10 else "object"
+            lines += [
+                f"class Cls{number}({parent}):",
+                f'    """Docstring of Cls{number}"""',
+                "    limit = 10",
+                "    def __init__(self, a, b=1):",
+                "        super().__init__()",
+                f"        self.a = func{number - 1}(a)",
+                "        self.b = b",
+                "    def run(self):",
+                "        for item in range(self.limit):",
+                "            if item:",
+                "                self.helper(item)",
+                "        return os.path.join('a', 'b')",
+                "",
+            ]
+        else:
+            lines += [
+                f"def func{number}(a, b, c=None):",
+                f'    """Docstring of func{number}"""',
+                "    x = a + b",
+                f"    y = func{max(number - 1, 0)}(x)",
+                "    with open(c) as file:",
+                "        file.read()",
+                "    try:",
+                "        print(y)",
+                "    except ValueError:",
+                "        pass",
+                "    while x:",
+                "        x = compute(x)",
+                "    return y",
+                "",
+            ]
+    return "\n".join(lines)
+
+
+def build_models(tree: ast.Module, location: Path) -> int:
+    models = 0
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            FunctionMd(node, location)
+            models += 1
+        elif isinstance(node, ast.ClassDef):
+            models += 1 + len(ClassMd(node, location).methods)
+    return models
+
+
+def run(functions: int, per_file: int, repeat: int) -> dict:
+    trees = [
+        ast.parse(synthetic_module(first, min(per_file, functions - first))) for first in range(0, functions, per_file)
+    ]
+    location = Path("synthetic.py")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        models = sum(build_models(tree, location) for tree in trees)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "files": len(trees),
+        "models": models,
+        "total_seconds": best,
+        "per_file_ms": best / len(trees) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--functions", type=int, default=10000)
+    parser.add_argument("--per-file", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    result = run(args.functions, args.per_file, args.repeat)
+    print(
+        f"{result['models']} models in {result['files']} files: "
+        f"{result['total_seconds']:.3f}s total, {result['per_file_ms']:.2f}ms per file"
+    )
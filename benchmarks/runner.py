@@ -0,0 +1,234 @@
+"""
+Times each phase of an analysis over a synthetic repository, along with its peak memory
+
+Usage:
+python -m benchmarks.runner [--files 200 ...] [--repeat 3] [--output results.json]
+python -m benchmarks.runner --compare baseline.json [--threshold 0.1]
+"""
+
+import argparse
+import ast
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.generator import RepoSpec, generate_repo, spec_arguments, spec_from_arguments
+from libraries import __version__
+from libraries.call_graph import CallGraph
+from libraries.diagram_maker import Diagram
+from libraries.explorer import walk
+from libraries.mapper import Analyzer, add_model_to_raw_map
+from libraries.models.class_def import ClassMd
+from libraries.models.function_def import FunctionMd
+
+PHASES = ["discovery", "parsing", "model_building", "raw_map_merge", "call_graph", "traversal", "rendering"]
+# Differences smaller than these are noise, no matter the ratio
+MIN_SECONDS = 0.005
+MIN_PEAK_KB = 256
+
+
+def discovery(path: Path) -> list[Path]:
+    return list(walk(path))
+
+
+def parsing(paths: list[Path]) -> list[ast.Module]:
+    trees = []
+    for path in paths:
+        with open(path) as file:
+            trees.append(ast.parse(file.read()))
+    return trees
+
+
+def model_building(paths: list[Path], trees: list[ast.Module]) -> list[tuple[list, list]]:
+    models = []
+    for path, tree in zip(paths, trees):
+        functions = []
+        classes = []
+        for node in ast.iter_child_nodes(tree):
+            if isinstance(node, ast.FunctionDef):
+                functions.append(FunctionMd(node, path))
+            elif isinstance(node, ast.ClassDef):
+                classes.append(ClassMd(node, path))
+        models.append((functions, classes))
+    return models
+
+
+def raw_map_merge(models: list[tuple[list, list]]) -> tuple[dict, list]:
+    """
+    Same registration made by Analyzer, in the same order
+    """
+    raw_map = {}
+    models_list = []
+    for functions, classes in models:
+        for funcmd in functions:
+            models_list.append(funcmd)
+            raw_map = add_model_to_raw_map(funcmd, raw_map)
+        for classmd in classes:
+            models_list.append(classmd)
+            raw_map = add_model_to_raw_map(classmd, raw_map)
+            for methodmd in classmd.methods:
+                models_list.append(methodmd)
+                raw_map = add_model_to_raw_map(methodmd, raw_map)
+    return raw_map, models_list
+
+
+def query_names(raw_map: dict, models_list: list, queries: int) -> list[str]:
+    """
+    Names of functions spread evenly along the repository, used as the roots of the traversals
+    """
+    names = [model.name for model in models_list if isinstance(model, FunctionMd) and model.name in raw_map]
+    step = max(1, len(names) // max(1, queries))
+    return names[::step][:queries]
+
+
+def traversal(graph: CallGraph, names: list[str]) -> list[dict]:
+    return [graph.calls_map(graph.root(name), show_unknowns=True) for name in names]
+
+
+def rendering(names: list[str], maps: list[dict]) -> int:
+    return sum(len(Diagram(calls_map, f"{name} workflow").diagram_code) for name, calls_map in zip(names, maps))
+
+
+def run_phases(path: Path, queries: int, measure) -> dict:
+    """
+    Runs every phase once, in order, passing each one's output to the next
+    measure(name, function, *args, **kwargs) runs a phase and returns its output
+    """
+    paths = measure("discovery", discovery, path)
+    trees = measure("parsing", parsing, paths)
+    models = measure("model_building", model_building, paths, trees)
+    raw_map, models_list = measure("raw_map_merge", raw_map_merge, models)
+    graph = measure("call_graph", CallGraph, raw_map, models_list)
+    names = query_names(raw_map, models_list, queries)
+    maps = measure("traversal", traversal, graph, names)
+    characters = measure("rendering", rendering, names, maps)
+    counts = {
+        "files": len(paths),
+        "bytes": sum(path.stat().st_size for path in paths),
+        "models": len(models_list),
+        "names": len(raw_map),
+        "collisions": sum(1 for value in raw_map.values() if isinstance(value, list)),
+        "edges": len(graph.targets),
+        "queries": len(names),
+        "diagram_characters": characters,
+    }
+    return counts
+
+
+def run(path: str | Path, queries: int = 50, repeat: int = 3) -> dict:
+    """
+    Benchmarks the analysis of the repository in path
+    Timings are the best of repeat runs made without tracing, peak memory comes from one more run under tracemalloc
+    The complete Analyzer is timed as well, as the "analyzer" phase
+    """
+    path = Path(path)
+    timings = {phase: [] for phase in PHASES + ["analyzer"]}
+
+    def timed(name, function, *args, **kwargs):
+        # Garbage of the earlier phases shouldn't be collected on the time of this one
+        gc.collect()
+        start = time.perf_counter()
+        output = function(*args, **kwargs)
+        timings[name].append(time.perf_counter() - start)
+        return output
+
+    for _ in range(repeat):
+        counts = run_phases(path, queries, timed)
+        timed("analyzer", Analyzer, str(path), jobs=1)
+
+    peaks = {}
+
+    def traced(name, function, *args, **kwargs):
+        gc.collect()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        output = function(*args, **kwargs)
+        peaks[name] = (tracemalloc.get_traced_memory()[1] - start) / 1024
+        return output
+
+    tracemalloc.start()
+    try:
+        run_phases(path, queries, traced)
+        traced("analyzer", Analyzer, str(path), jobs=1)
+    finally:
+        tracemalloc.stop()
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "counts": counts,
+        "phases": {name: {"seconds": min(timings[name]), "peak_kb": peaks[name]} for name in timings},
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list[dict]:
+    """
+    Returns the phases where the time or the peak memory of results grew more than threshold over the baseline
+    """
+    regressions = []
+    for name, phase in results["phases"].items():
+        if name not in baseline["phases"]:
+            continue
+        base = baseline["phases"][name]
+        for metric, noise in (("seconds", MIN_SECONDS), ("peak_kb", MIN_PEAK_KB)):
+            old, new = base[metric], phase[metric]
+            if new - old > noise and new > old * (1 + threshold):
+                regressions.append({"phase": name, "metric": metric, "baseline": old, "current": new})
+    return regressions
+
+
+def report(results: dict, baseline: dict | None = None) -> str:
+    lines = [f"{'phase':<16}{'seconds':>12}{'peak kb':>12}" + ("   vs baseline" if baseline else "")]
+    for name, phase in results["phases"].items():
+        line = f"{name:<16}{phase['seconds']:>12.4f}{phase['peak_kb']:>12.0f}"
+        if baseline and name in baseline["phases"]:
+            base = baseline["phases"][name]
+            ratio = phase["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+            line += f"   {ratio:>6.2f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    spec_arguments(parser)
+    parser.add_argument("--path", help="benchmark an existing directory instead of a synthetic one")
+    parser.add_argument("--queries", type=int, default=50, help="number of calls maps traversed and rendered")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="file where the results are written as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to be compared against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="growth over the baseline considered a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    if args.path:
+        results = run(args.path, args.queries, args.repeat)
+    else:
+        spec = spec_from_arguments(args)
+        if baseline is not None and "spec" in baseline:
+            # The comparison is only meaningful over the same repository
+            spec = RepoSpec(**baseline["spec"])
+        with tempfile.TemporaryDirectory() as directory:
+            generate_repo(directory, spec)
+            results = run(directory, args.queries, args.repeat)
+        results["spec"] = spec.to_dict()
+    print(report(results, baseline))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['phase']} {regression['metric']}: "
+                f"{regression['baseline']:.4f} -> {regression['current']:.4f}"
+            )
+        sys.exit(1 if regressions else 0)
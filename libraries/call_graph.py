@@ -0,0 +1,377 @@
+import time
+from array import array
+from collections import deque
+from functools import cached_property
+from typing import Iterable, Iterator
+
+from libraries.models.class_def import ClassMd, MethodMd
+from libraries.models.function_def import FunctionMd
+from libraries.models.unknown_func import UnknownFuncMd
+from libraries.symbol_table import External, SymbolTable
+
+# Kinds of the events yielded by CallGraph.iter_events
+ENTER = "enter"
+EXIT = "exit"
+
+
+def handle_list_of_models(model_list: list[FunctionMd]):
+    """
+    Centralization of the way to handle list of models inside the raw_map
+    Picks the model defined in a task.py file if there's one, otherwise the first one in the order the files were found,
+    so the same call always leads to the same model
+    """
+    for model in model_list:
+        if model.location.name == "task.py":
+            return model
+    return model_list[0]
+
+
+def adjust_call(call: FunctionMd | ClassMd | MethodMd | UnknownFuncMd | list):
+    """
+    Adjusts the call gathered from the raw_map, doing all necessary checks
+    If no adjustments are necessary, returns the same call
+    """
+    if isinstance(call, ClassMd):
+        for method in call.methods:
+            if method.name == "__init__":
+                return method
+        # If it's a class, but doesn't have a init method, simply skip
+        return None
+    if isinstance(call, list):
+        return handle_list_of_models(call)
+    else:
+        return call
+
+
+class CallGraph:
+    """
+    Compact index of the calls between the models of an Analyzer, built once and queried many times
+    Every model is interned as an integer id, and the resolved calls of each one are stored CSR-style:
+    the targets of id are targets[offsets[id]:offsets[id + 1]]
+    Classes have no targets of their own, their canonical id is the one of their __init__
+    Calls that aren't in the raw_map get ids starting at len(models), one per distinct name
+    With a SymbolTable, calls are resolved through the imports of the caller's module first, and only the ones
+    it can't tell are resolved by name alone
+    """
+
+    def __init__(self, raw_map: dict, models_list: list, symbols: SymbolTable | None = None) -> None:
+        self.raw_map = raw_map
+        self.symbols = symbols
+        self.models = list(models_list)
+        self.ids = {model: index for index, model in enumerate(self.models)}
+        self.unknown_names: list[str] = []
+        self.unknown_ids: dict[str, int] = {}
+        # Id of the model that is actually mapped when id is visited, -1 for classes without __init__
+        self.canonical = array("i")
+        self.offsets = array("i", [0])
+        self.targets = array("i")
+        self.__resolved: dict[str, int | None] = {}
+        self.__canonicalize()
+        self.__build()
+
+    @classmethod
+    def from_targets(
+        cls,
+        raw_map: dict,
+        models_list: list,
+        symbols: SymbolTable | None,
+        offsets: Iterable[int],
+        targets: Iterable[int],
+        unknown_names: list[str],
+    ) -> "CallGraph":
+        """
+        Rebuilds a graph from calls that were already resolved, Ex: the ones stored in a snapshot
+        The ids of targets must follow models_list and unknown_names, as in a graph built from them
+        """
+        graph = cls.__new__(cls)
+        graph.raw_map = raw_map
+        graph.symbols = symbols
+        graph.models = list(models_list)
+        graph.ids = {model: index for index, model in enumerate(graph.models)}
+        graph.unknown_names = list(unknown_names)
+        graph.unknown_ids = {name: len(graph.models) + index for index, name in enumerate(graph.unknown_names)}
+        graph.canonical = array("i")
+        graph.offsets = array("i", offsets)
+        graph.targets = array("i", targets)
+        graph.__resolved = {}
+        graph.__canonicalize()
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def __canonicalize(self):
+        for model in self.models:
+            canonical = adjust_call(model)
+            self.canonical.append(self.ids[canonical] if canonical is not None else -1)
+
+    def __build(self):
+        for index, model in enumerate(self.models):
+            # Visiting a class maps its __init__ instead, so only the calls of the other models are kept
+            if self.canonical[index] == index:
+                for position, call_name in enumerate(model.calls):
+                    if self.symbols is None:
+                        target = self.__resolve(call_name)
+                    else:
+                        target = self.__resolve_call(model, position)
+                    if target is not None:
+                        self.targets.append(target)
+            self.offsets.append(len(self.targets))
+
+    def __resolve(self, call_name: str) -> int | None:
+        """
+        Returns the id that a call name leads to, or None if the call should be skipped
+        """
+        if call_name in self.__resolved:
+            return self.__resolved[call_name]
+        if call_name not in self.raw_map:
+            target = self.__unknown(call_name)
+        else:
+            subcall = adjust_call(self.raw_map[call_name])
+            target = self.ids[subcall] if subcall is not None else None
+        self.__resolved[call_name] = target
+        return target
+
+    def __resolve_call(self, model, position: int) -> int | None:
+        """
+        Returns the id that a call of model leads to according to the symbol table, falling back to its name
+        """
+        found = self.symbols.resolve(model, position)
+        if isinstance(found, External):
+            return self.__unknown(model.calls[position])
+        if found is None and self.symbols.is_external(model):
+            # Names of installed modules aren't guessed among the definitions of the directory
+            return self.__unknown(model.calls[position])
+        if found is None or found not in self.ids:
+            return self.__resolve(model.calls[position])
+        subcall = adjust_call(found)
+        return self.ids[subcall] if subcall is not None else None
+
+    def __unknown(self, call_name: str) -> int:
+        target = self.unknown_ids.get(call_name)
+        if target is None:
+            target = len(self.models) + len(self.unknown_names)
+            self.unknown_ids[call_name] = target
+            self.unknown_names.append(call_name)
+        return target
+
+    def is_unknown(self, symbol: int) -> bool:
+        return symbol >= len(self.models)
+
+    def root(self, call_name: str) -> int:
+        """
+        Returns the id from which the map of a call name starts
+        Qualified names, Ex: "pkg.mod.Class.method", are looked up in the symbol table
+        """
+        if self.symbols is not None and call_name in self.symbols.definitions:
+            return self.ids[self.symbols.definitions[call_name]]
+        if call_name not in self.raw_map:
+            raise IndexError("call name not present in raw map")
+        call = self.raw_map[call_name]
+        if isinstance(call, list):
+            call = handle_list_of_models(call)
+        return self.ids[call]
+
+    @cached_property
+    def fan_in(self) -> array:
+        """
+        Number of calls that lead to each model id
+        """
+        fan_in = array("i", bytes(array("i").itemsize * len(self.models)))
+        models_count = len(self.models)
+        for target in self.targets:
+            if target < models_count:
+                fan_in[target] += 1
+        return fan_in
+
+    def callees(self, symbol: int) -> array:
+        return self.targets[self.offsets[symbol] : self.offsets[symbol + 1]]
+
+    @cached_property
+    def reverse(self) -> tuple[array, array]:
+        """
+        Reverse CSR index of the calls between models: the ids calling id are sources[offsets[id]:offsets[id + 1]]
+        Built by counting sort on first use, so each caller appears once per call, in the order of the models
+        """
+        models_count = len(self.models)
+        offsets = array("i", bytes(array("i").itemsize * (models_count + 1)))
+        for target in self.targets:
+            if target < models_count:
+                offsets[target + 1] += 1
+        for index in range(models_count):
+            offsets[index + 1] += offsets[index]
+        sources = array("i", bytes(array("i").itemsize * offsets[models_count]))
+        filled = array("i", offsets)
+        for symbol in range(models_count):
+            for target in self.targets[self.offsets[symbol] : self.offsets[symbol + 1]]:
+                if target < models_count:
+                    sources[filled[target]] = symbol
+                    filled[target] += 1
+        return offsets, sources
+
+    def callers(self, symbols: Iterable[int], max_depth: int | None = None) -> dict[int, int]:
+        """
+        Returns every id that calls one of symbols, directly or through other calls, with the distance to the closest one
+        The symbols themselves are included with distance 0. Classes are taken as their __init__
+        Args:
+        - symbols(Iterable[int]): ids whose callers are looked for
+        - max_depth(int | None): callers farther than this are left out
+        """
+        offsets, sources = self.reverse
+        depths = {}
+        queue = deque()
+        for symbol in symbols:
+            symbol = self.canonical[symbol]
+            if symbol != -1 and symbol not in depths:
+                depths[symbol] = 0
+                queue.append(symbol)
+        while queue:
+            symbol = queue.popleft()
+            depth = depths[symbol] + 1
+            if max_depth is not None and depth > max_depth:
+                continue
+            for caller in sources[offsets[symbol] : offsets[symbol + 1]]:
+                if caller not in depths:
+                    depths[caller] = depth
+                    queue.append(caller)
+        return depths
+
+    def iter_events(
+        self,
+        root: int,
+        show_unknowns: bool = False,
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        exits: bool = True,
+        counters: dict | None = None,
+    ) -> Iterator[tuple]:
+        """
+        Walks the models reachable from root, yielding (kind, caller, callee, depth) events as they are visited
+        kind is ENTER when a call is visited and EXIT once everything below it was, depth being the one of the callee
+        The root is entered with None as caller and depth 0, classes without __init__ are entered as None
+        A call that was already visited is not expanded again, unless it was one of the last three visits,
+        which is also what ends cycles. Besides the visits, only the path being walked is kept and the consumer can stop
+        at any time. A call made twice by the same caller is entered twice, where calls_map merges them
+        The walk stops early once a budget runs out, without exiting the open calls, and sets counters["truncated"]:
+        - max_depth(int | None): calls deeper than this are left out, the root has depth 0
+        - max_nodes(int | None): maximum number of nodes visited
+        - timeout(float | None): seconds the walk may take
+        - exits(bool): sets if EXIT events are yielded
+        If counters is given, the number of nodes visited and of edges looked at are stored in it as the walk goes
+        """
+        models = self.models
+        canonical = self.canonical
+        offsets = self.offsets
+        targets = self.targets
+        models_count = len(models)
+        unknown_names = self.unknown_names
+        deadline = time.perf_counter() + timeout if timeout is not None else None
+        counters = counters if counters is not None else {}
+        counters.update(nodes=0, edges=0, truncated=False)
+        # Position of the first visit of each id, so a call is skipped if it comes before the last three visits
+        first_visit: dict[int, int] = {}
+        visits = 0
+        edges = 0
+        # Every call popped from the stack, skipped or not, so the deadline is checked however the walk goes
+        steps = 0
+        # Each frame is the model whose calls are being visited, the calls left to visit and the depth of the model
+        stack = [(None, iter((root,)), -1)]
+        while stack:
+            if deadline is not None and not steps % 64 and time.perf_counter() > deadline:
+                counters["truncated"] = True
+                break
+            steps += 1
+            caller, subcalls, depth = stack[-1]
+            symbol = next(subcalls, None)
+            if symbol is None:
+                stack.pop()
+                if exits and stack:
+                    yield EXIT, stack[-1][0], caller, depth
+                continue
+            if symbol >= models_count:
+                if not show_unknowns:
+                    continue
+            elif depth >= 0 and first_visit.get(symbol, visits) < visits - 3:
+                continue
+            if max_nodes is not None and visits >= max_nodes:
+                counters["truncated"] = True
+                break
+            visits += 1
+            counters["nodes"] = visits
+            if symbol >= models_count:
+                unknown = UnknownFuncMd(unknown_names[symbol - models_count])
+                yield ENTER, caller, unknown, depth + 1
+                if exits:
+                    yield EXIT, caller, unknown, depth + 1
+                continue
+            first_visit.setdefault(symbol, visits - 1)
+            call = canonical[symbol]
+            key = models[call] if call != -1 else None
+            yield ENTER, caller, key, depth + 1
+            calls = targets[offsets[call] : offsets[call + 1]] if call != -1 else ()
+            if max_depth is not None and depth + 1 >= max_depth:
+                # Calls that would be followed are left out
+                if any(subcall < models_count or show_unknowns for subcall in calls):
+                    counters["truncated"] = True
+                calls = ()
+            edges += len(calls)
+            counters["edges"] = edges
+            stack.append((key, iter(calls), depth + 1))
+
+    def iter_edges(
+        self,
+        root: int,
+        show_unknowns: bool = False,
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        counters: dict | None = None,
+    ) -> Iterator[tuple]:
+        """
+        Yields the (caller, callee, depth) calls reachable from root as they are visited, see iter_events
+        They come in the order iter_map_edges yields them from calls_map, except that repeated calls aren't merged
+        """
+        for kind, caller, callee, depth in self.iter_events(
+            root, show_unknowns, max_depth, max_nodes, timeout, False, counters
+        ):
+            yield caller, callee, depth
+
+    def calls_map(
+        self,
+        root: int,
+        show_unknowns: bool = False,
+        counters: dict | None = None,
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+    ) -> "CallsMap":
+        """
+        Creates the nested dictionary of models reachable from root, as described in Analyzer.create_calls_map
+        It's built from the events of iter_events, with the budgets and counters working the same way
+        What was mapped until a budget ran out is returned flagged as truncated
+        """
+        counters = counters if counters is not None else {}
+        app_map = CallsMap()
+        # Maps that the calls of each model on the walked path go into
+        path = [app_map]
+        for kind, caller, callee, depth in self.iter_events(
+            root, show_unknowns, max_depth, max_nodes, timeout, True, counters
+        ):
+            if kind == EXIT:
+                path.pop()
+                continue
+            submap = path[-1]
+            if callee not in submap:
+                submap[callee] = {}
+            path.append(submap[callee])
+        app_map.truncated = counters["truncated"]
+        return app_map
+
+
+class CallsMap(dict):
+    """
+    Nested dictionary created by CallGraph.calls_map, truncated is set when a budget ran out before it was complete
+    """
+
+    truncated = False
@@ -0,0 +1,122 @@
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from libraries.call_graph import CallGraph
+from libraries.diagram_maker import Diagram, node_label
+
+
+def diagram_file_name(model, taken: set[str]) -> str:
+    """
+    Returns a file name for the diagram of a model that isn't in taken, and adds it there
+    Models with the same name in different files are told apart by the name of the file
+    """
+    stem = re.sub(r"[^\w.-]", "_", node_label(model))
+    if stem in taken and model.location is not None:
+        stem = f"{model.location.stem}.{stem}"
+    file_name = stem
+    count = 1
+    while file_name in taken:
+        count += 1
+        file_name = f"{stem}_{count}"
+    taken.add(file_name)
+    return file_name
+
+
+def write_file(path: Path, content: str) -> float:
+    start = time.perf_counter()
+    with open(path, "w") as file:
+        file.write(content)
+    return time.perf_counter() - start
+
+
+def timed_edges(edges: Iterator[tuple], seconds: list[float]) -> Iterator[tuple]:
+    """
+    Yields the edges of a traversal, adding the time spent producing them to seconds[0]
+    """
+    while True:
+        start = time.perf_counter()
+        edge = next(edges, None)
+        seconds[0] += time.perf_counter() - start
+        if edge is None:
+            return
+        yield edge
+
+
+def create_diagrams(
+    graph: CallGraph,
+    roots: list[tuple[str, int]],
+    output_dir: str | Path,
+    show_unknowns: bool = False,
+    workers: int = 8,
+    max_depth: int | None = None,
+    max_nodes: int | None = None,
+) -> dict:
+    """
+    Creates the diagram of every root and writes them to output_dir, along with an index.json summary
+    Roots leading to the same model are traversed and rendered only once, each in a single streaming pass.
+    Rendering happens in this thread while the files already rendered are written by a pool of threads
+    Args:
+    - graph(CallGraph): graph of the Analyzer
+    - roots(list[tuple[str, int]]): title of each diagram and the graph id where it starts
+    - output_dir(str | Path): directory where the diagrams are written
+    - show_unknowns(bool): sets if calls of unknown source should be tracked
+    - workers(int): number of threads writing the files
+    - max_depth(int | None): calls deeper than this are collapsed
+    - max_nodes(int | None): maximum number of nodes in each diagram
+
+    Returns the summary, with the file and timings (in milliseconds) of each diagram
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    taken = set()
+    rendered: dict[int, dict] = {}
+    entries = []
+    writes = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for title, symbol in roots:
+            entry = {
+                "name": title,
+                "file": None,
+                "source": None,
+                "traversal_ms": 0.0,
+                "render_ms": 0.0,
+                "write_ms": 0.0,
+            }
+            model = graph.models[symbol]
+            if model.location is not None:
+                entry["source"] = f"{model.location}:{model.lineno}"
+            if symbol in rendered:
+                # Same diagram as an earlier root, only the file is shared
+                entry["file"] = rendered[symbol]["file"]
+                entry["truncated"] = rendered[symbol]["truncated"]
+                entries.append(entry)
+                continue
+            # Rendered while traversed, the same way as Analyzer.create_diagram, and timed apart
+            render_start = time.perf_counter()
+            traversal_seconds = [0.0]
+            edges = graph.iter_edges(symbol, show_unknowns, max_depth + 1 if max_depth is not None else None)
+            diagram = Diagram(timed_edges(edges, traversal_seconds), f"{title} workflow", max_depth, max_nodes)
+            diagram_code = diagram.diagram_code
+            render_end = time.perf_counter()
+            entry["file"] = f"{diagram_file_name(model, taken)}.mmd"
+            entry["traversal_ms"] = traversal_seconds[0] * 1000
+            entry["render_ms"] = (render_end - render_start - traversal_seconds[0]) * 1000
+            entry["truncated"] = diagram.truncated
+            rendered[symbol] = entry
+            entries.append(entry)
+            writes.append((entry, executor.submit(write_file, output_dir / entry["file"], diagram_code)))
+        for entry, future in writes:
+            entry["write_ms"] = future.result() * 1000
+    summary = {
+        "diagrams": entries,
+        "count": len(rendered),
+        "total_ms": (time.perf_counter() - start) * 1000,
+    }
+    with open(output_dir / "index.json", "w") as file:
+        json.dump(summary, file, indent=2)
+    return summary
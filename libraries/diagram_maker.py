@@ -1,48 +1,147 @@
+import io
 from pathlib import Path
+from typing import Iterable, TextIO
 
 from libraries.models.class_def import MethodMd
 from python_mermaid.diagram import Link, MermaidDiagram, Node
 
 
+def node_label(model) -> str:
+    if isinstance(model, MethodMd):
+        return f"{model.class_object.name}.{model.name}"
+    return model.name
+
+
+def iter_map_edges(map: dict) -> Iterable[tuple]:
+    """
+    Yields the (caller, callee, depth) edges of a map from Analyzer, depth being the one of the callee
+    The roots of the map are yielded with None as caller and depth 0
+    """
+    stack = [(None, key, values, 0) for key, values in reversed(map.items())]
+    while stack:
+        caller, callee, values, depth = stack.pop()
+        yield caller, callee, depth
+        stack.extend((callee, key, subvalues, depth + 1) for key, subvalues in reversed(values.items()))
+
+
+class MermaidWriter:
+    """
+    Writes Mermaid code straight to a file handle as edges arrive, without holding the diagram in memory
+    Nodes and edges are written only once. Calls deeper than max_depth are counted instead of written,
+    and each node that had direct calls left out gets a collapsed "… N more" node
+    Once max_nodes nodes were written, the first call to a new node is counted the same way and the writing stops,
+    so a traversal feeding the writer stops there as well
+    """
+
+    def __init__(self, file: TextIO, title: str, max_depth: int | None = None, max_nodes: int | None = None) -> None:
+        self.file = file
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        # Mermaid node id -> index, edges are kept as pairs of indexes
+        self.nodes: dict[str, int] = {}
+        self.edges: set[tuple[int, int]] = set()
+        self.collapsed: dict[str, tuple[Node, int]] = {}
+        # For each depth of the current path, the closest written node and if it's the node of that depth itself
+        self.path: list[tuple[Node | None, bool]] = []
+        self.truncated = False
+        # Set once a node was left out because of max_nodes
+        self.full = False
+        self.file.write(f"---\ntitle: {title}\n---\n{MermaidDiagram().type} ")
+
+    def __write_node(self, node: Node) -> bool:
+        if node.id in self.nodes:
+            return True
+        if self.max_nodes is not None and len(self.nodes) >= self.max_nodes:
+            self.full = True
+            return False
+        self.nodes[node.id] = len(self.nodes)
+        self.file.write(f"\n{node}")
+        return True
+
+    def __collapse(self, owner: Node | None):
+        self.truncated = True
+        if owner is not None:
+            _, count = self.collapsed.get(owner.id, (owner, 0))
+            self.collapsed[owner.id] = (owner, count + 1)
+
+    def add(self, caller, callee, depth: int):
+        """
+        Adds the call from caller to callee, depth being the one of the callee (0 for a root, with None as caller)
+        """
+        del self.path[depth:]
+        owner, caller_written = self.path[-1] if self.path else (None, True)
+        if callee is None or not caller_written:
+            # Everything below a call that was left out is left out as well, without being counted
+            self.path.append((owner, False))
+            return
+        callee_node = Node(node_label(callee))
+        within_depth = self.max_depth is None or depth <= self.max_depth
+        if not within_depth or not self.__write_node(callee_node):
+            self.__collapse(owner)
+            self.path.append((owner, False))
+            return
+        self.path.append((callee_node, True))
+        if owner is not None:
+            edge = (self.nodes[owner.id], self.nodes[callee_node.id])
+            if edge not in self.edges:
+                self.edges.add(edge)
+                self.file.write(f"\n{Link(owner, callee_node)}")
+
+    def write(self, edges: Iterable[tuple]):
+        for caller, callee, depth in edges:
+            self.add(caller, callee, depth)
+            if self.full:
+                break
+
+    def close(self):
+        """
+        Writes the collapsed nodes of whatever was left out by the budgets
+        """
+        for owner, count in self.collapsed.values():
+            more_node = Node(f"{owner.id}_more", content=f"… {count} more")
+            self.file.write(f"\n{more_node}\n{Link(owner, more_node)}")
+        self.collapsed = {}
+
+
 class Diagram:
     """
     Diagram class that generates Mermaid code for the creation of diagrams
-    Receives a map generate by the Analyzer class
+    Receives a map generate by the Analyzer class, or the edges of Analyzer.iter_calls, which are rendered as they come
+    Args:
+    - max_depth(int | None): calls deeper than this are collapsed
+    - max_nodes(int | None): calls to new nodes after this many were written are collapsed
     """
 
-    def __init__(self, map: dict, diagram_title: str = "Workflow Diagram") -> None:
+    def __init__(
+        self,
+        map: dict | Iterable[tuple],
+        diagram_title: str = "Workflow Diagram",
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+    ) -> None:
         self.map = map
         self.diagram_title = diagram_title
-        self.diagram_code = self.__diagram_maker(self.diagram_title)
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.truncated = False
+        self.__diagram_code = None
+
+    @property
+    def diagram_code(self) -> str:
+        if self.__diagram_code is None:
+            buffer = io.StringIO()
+            self.write(buffer)
+            self.__diagram_code = buffer.getvalue()
+        return self.__diagram_code
 
-    def __diagram_maker(self, diagram_title: str) -> str:
+    def write(self, file: TextIO):
         """
-        Creates the Mermaid code based on the dictionary map of calls from Analyzer
+        Writes the Mermaid code of the map to a file handle while traversing it
         """
-        nodes_set = set()
-        links = []
-
-        def internal_func(map):
-            nonlocal nodes_set
-            nonlocal links
-            for key, values in map.items():
-                if isinstance(key, MethodMd):
-                    key_node = Node(f"{key.class_object.name}.{key.name}")
-                else:
-                    key_node = Node(key.name)
-                nodes_set.add(key_node)
-                for value in values:
-                    if isinstance(value, MethodMd):
-                        value_node = Node(f"{value.class_object.name}.{value.name}")
-                    else:
-                        value_node = Node(value.name)
-                    nodes_set.add(value_node)
-                    links.append(Link(key_node, value_node))
-                internal_func(values)
-
-        internal_func(self.map)
-        diagram = MermaidDiagram(diagram_title, list(nodes_set), links).__str__()
-        return diagram
+        writer = MermaidWriter(file, self.diagram_title, self.max_depth, self.max_nodes)
+        writer.write(iter_map_edges(self.map) if isinstance(self.map, dict) else self.map)
+        writer.close()
+        self.truncated = writer.truncated
 
     def create_diagram_file(self, path: str | Path):
         """
@@ -50,7 +149,10 @@ class Diagram:
         Facilitating the process of copying the code to mermaid
         """
         with open(path, "w") as file:
-            file.write(self.diagram_code)
+            if self.__diagram_code is not None:
+                file.write(self.__diagram_code)
+            else:
+                self.write(file)
 
 
 if __name__ == "__main__":
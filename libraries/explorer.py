@@ -1,38 +1,202 @@
 import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator
+
+DEFAULT_EXCLUDED = [".git", "venv", "__pycache__"]
+
+
+class IgnoreRules:
+    """
+    Set of .gitignore-style patterns, relative to the directory they were declared in
+    Supports comments, "!" negation, trailing "/" for directories only, anchored patterns and "**"
+    """
+
+    def __init__(self, patterns: Iterable[str], base: str | Path = "") -> None:
+        self.base = str(base)
+        self.rules = []
+        for pattern in patterns:
+            rule = self.__compile(pattern)
+            if rule is not None:
+                self.rules.append(rule)
+
+    @classmethod
+    def from_file(cls, path: str | Path, base: str | Path) -> "IgnoreRules":
+        with open(path, errors="replace") as file:
+            return cls(file.read().splitlines(), base)
+
+    @staticmethod
+    def __compile(pattern: str):
+        pattern = pattern.rstrip()
+        if not pattern or pattern.startswith("#"):
+            return None
+        negated = pattern.startswith("!")
+        if negated:
+            pattern = pattern[1:]
+        directory_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Patterns with a slash, leading or in the middle, are matched against the relative path,
+        # the others against any name
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        regex = ""
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith("**/", i):
+                regex += "(?:.*/)?"
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                regex += ".*"
+                i += 2
+                continue
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif char == "[":
+                end = pattern.find("]", i + 1)
+                if end == -1:
+                    regex += re.escape(char)
+                else:
+                    characters = pattern[i + 1 : end]
+                    if characters.startswith("!"):
+                        characters = "^" + characters[1:]
+                    regex += "[" + characters.replace("\\", "\\\\") + "]"
+                    i = end
+            else:
+                regex += re.escape(char)
+            i += 1
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        return re.compile(regex + r"\Z"), negated, directory_only
+
+    def match(self, relative_path: str, is_dir: bool) -> bool | None:
+        """
+        Returns True if the path is ignored, False if it's explicitly re-included and None if no rule matches
+        The relative path is relative to the root of the walk, and uses "/" as separator
+        """
+        if self.base:
+            if not relative_path.startswith(self.base + "/"):
+                return None
+            relative_path = relative_path[len(self.base) + 1 :]
+        result = None
+        for regex, negated, directory_only in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                result = not negated
+        return result
+
+
+def is_ignored(rules: list[IgnoreRules], relative_path: str, is_dir: bool) -> bool:
+    ignored = False
+    for rule_set in rules:
+        result = rule_set.match(relative_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def walk(
+    path: str | Path,
+    exclude: Iterable[str] = DEFAULT_EXCLUDED,
+    use_gitignore: bool = True,
+    suffix: str = ".py",
+    follow_symlinks: bool = False,
+) -> Iterator[Path]:
+    """
+    Yields the files of a directory tree that end with suffix, as soon as they are found
+    Each directory yields its own files before the ones of its subdirectories.
+    Args:
+    - path(str | Path): root of the walk
+    - exclude(Iterable[str]): .gitignore-style patterns of files and directories to skip
+    - use_gitignore(bool): sets if the .gitignore files found along the walk should also be applied
+    - suffix(str): suffix of the files to be yielded
+    - follow_symlinks(bool): sets if symbolic links to directories should be walked into
+    """
+    root = os.path.abspath(path)
+    base_rules = [IgnoreRules(exclude)]
+    stack = [(root, "", base_rules)]
+    while stack:
+        directory, relative_directory, rules = stack.pop()
+        gitignore = os.path.join(directory, ".gitignore")
+        if use_gitignore and os.path.isfile(gitignore):
+            rules = rules + [IgnoreRules.from_file(gitignore, relative_directory)]
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative_path = f"{relative_directory}/{entry.name}" if relative_directory else entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                    except OSError:
+                        continue
+                    if is_ignored(rules, relative_path, is_dir):
+                        continue
+                    if is_dir:
+                        subdirectories.append((entry.path, relative_path, rules))
+                    elif entry.name.endswith(suffix) and entry.is_file():
+                        yield Path(entry.path)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            continue
+        stack.extend(reversed(subdirectories))
+
+
+def is_walked(
+    root: str | Path,
+    path: str | Path,
+    exclude: Iterable[str] = DEFAULT_EXCLUDED,
+    use_gitignore: bool = True,
+    suffix: str = ".py",
+) -> bool:
+    """
+    Tells if walk(root) would yield a file, without walking the rest of the tree
+    Only the directories on the way to the file are looked at, along with their .gitignore files
+    """
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    if not path.endswith(suffix) or os.path.commonpath([root, path]) != root or path == root:
+        return False
+    rules = [IgnoreRules(exclude)]
+    directory = root
+    relative_path = ""
+    parts = Path(os.path.relpath(path, root)).parts
+    for index, part in enumerate(parts):
+        gitignore = os.path.join(directory, ".gitignore")
+        if use_gitignore and os.path.isfile(gitignore):
+            rules = rules + [IgnoreRules.from_file(gitignore, relative_path)]
+        relative_path = f"{relative_path}/{part}" if relative_path else part
+        if is_ignored(rules, relative_path, index < len(parts) - 1):
+            return False
+        directory = os.path.join(directory, part)
+    return True
 
 
 def explore(path, ignored: list = []):
     """
-    Recursively explores all directories inside a given path.
+    Explores all directories inside a given path.
     Has list of directories to be ignored, if it should prove necessary.
     Returns a dictionary with these items:
     {"path/to/directory" : [list, of, items]}
     """
     directory_map = {}
-    current_dir = os.getcwd()
-
-    def func(path):
-        nonlocal ignored
-        nonlocal directory_map
-        os.chdir(path)
-        path = os.getcwd()
-        directory_contents = os.listdir()
-        directory_map[path] = directory_contents
-        for content in directory_contents:
-            os.chdir(path)
-            abs_path = os.path.join(os.getcwd(), content)
-            if content in ignored:
-                continue
-            elif os.path.isdir(abs_path):
-                func(abs_path)
-
-    func(path)
-
-    # Resets path
-    os.chdir(current_dir)
+    stack = [os.path.abspath(path)]
+    while stack:
+        directory = stack.pop()
+        subdirectories = []
+        with os.scandir(directory) as entries:
+            directory_contents = []
+            for entry in entries:
+                directory_contents.append(entry.name)
+                if entry.name not in ignored and entry.is_dir():
+                    subdirectories.append(entry.path)
+        directory_map[directory] = directory_contents
+        stack.extend(reversed(subdirectories))
     return directory_map
 
 
 if __name__ == "__main__":
-    directory_map = explore(".", ignored=[".git", "__pycache__"])
-    print(directory_map)
+    for file_path in walk("."):
+        print(file_path)
@@ -0,0 +1,214 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+from python_mermaid.diagram import Link, MermaidDiagram, Node
+
+from libraries.call_graph import CallGraph
+from libraries.metrics import call_arrays
+from libraries.models.class_def import MethodMd
+from libraries.symbol_table import SymbolTable
+
+# Granularities the graph can be collapsed to, from the finest
+LEVELS = ("definition", "class", "module", "package")
+FORMATS = ("mermaid", "dot", "json")
+
+
+def group_names(model, level: str, symbols: SymbolTable) -> tuple[str, str]:
+    """
+    Returns the name of the node that a model is collapsed into at level, and the name of the cluster drawn around it
+    Ex: pkg.mod.Class.method -> ("pkg.mod.Class", "pkg.mod") at class level, ("pkg.mod", "pkg") at module level
+    An empty cluster means that the node is drawn outside of any cluster
+    """
+    module = symbols.module_names.get(model.location, model.location.stem)
+    if level == "definition":
+        return symbols.qualified_name(model) or model.name, module
+    if level == "class":
+        name = model.class_object.name if isinstance(model, MethodMd) else model.name
+        return f"{module}.{name}" if module else name, module
+    package = module if module in symbols.packages else module.rpartition(".")[0]
+    if level == "module":
+        return module or symbols.root.name, package
+    return package or symbols.root.name, package.rpartition(".")[0]
+
+
+def dot_string(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class AggregatedGraph:
+    """
+    Call graph collapsed to classes, modules or packages, so that the overview of a whole repository stays readable
+    Every call between models of two nodes is summed into a single edge, and calls inside a node are only counted
+    Args:
+    - level(str): one of LEVELS
+    - nodes(list[str]): name of each node
+    - clusters(list[str]): name of the cluster around each node, see group_names
+    - definitions(list[int]): number of models collapsed into each node
+    - internal_calls(list[int]): number of calls between the models of each node
+    - edges(list[tuple[int, int, int]]): (caller, callee, calls) between the indexes of nodes
+    """
+
+    def __init__(
+        self,
+        level: str,
+        nodes: list[str],
+        clusters: list[str],
+        definitions: list[int],
+        internal_calls: list[int],
+        edges: list[tuple[int, int, int]],
+    ) -> None:
+        self.level = level
+        self.nodes = nodes
+        self.clusters = clusters
+        self.definitions = definitions
+        self.internal_calls = internal_calls
+        self.edges = edges
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: CallGraph,
+        symbols: SymbolTable,
+        level: str = "module",
+        show_unknowns: bool = False,
+        roots: list[int] | None = None,
+    ) -> "AggregatedGraph":
+        """
+        Collapses the calls of graph to level in a single vectorized pass over them
+        Args:
+        - graph(CallGraph): graph of the analysis
+        - symbols(SymbolTable): used for the modules of the models
+        - level(str): one of LEVELS
+        - show_unknowns(bool): sets if calls of unknown source are kept, as one node per name at definition level
+          and as a single "?" node at the others
+        - roots(list[int] | None): ids whose reachable models are kept, every model is kept if not given
+        """
+        if level not in LEVELS:
+            raise ValueError(f"level should be one of {', '.join(LEVELS)}, not {level}")
+        models_count = len(graph.models)
+        # Classes are left out, calling them leads to their __init__
+        kept = [canonical == symbol for symbol, canonical in enumerate(graph.canonical)]
+        if roots is not None:
+            reached = [False] * models_count
+            stack = [graph.canonical[root] for root in roots if graph.canonical[root] != -1]
+            for symbol in stack:
+                reached[symbol] = True
+            while stack:
+                for target in graph.callees(stack.pop()):
+                    if target < models_count and not reached[target]:
+                        reached[target] = True
+                        stack.append(target)
+            kept = reached
+        names: dict[str, int] = {}
+        clusters = []
+        node_of = np.full(models_count + len(graph.unknown_names), -1, dtype=np.int64)
+        for symbol, model in enumerate(graph.models):
+            if not kept[symbol]:
+                continue
+            name, cluster = group_names(model, level, symbols)
+            if name not in names:
+                names[name] = len(names)
+                clusters.append(cluster)
+            node_of[symbol] = names[name]
+        sources, targets = call_arrays(graph)
+        callers = node_of[sources]
+        if show_unknowns:
+            for target in np.unique(targets[(callers >= 0) & (targets >= models_count)]).tolist():
+                name = f"?{graph.unknown_names[target - models_count]}" if level == "definition" else "?"
+                if name not in names:
+                    names[name] = len(names)
+                    clusters.append("")
+                node_of[target] = names[name]
+        callees = node_of[targets]
+        within = (callers >= 0) & (callees >= 0)
+        callers, callees = callers[within], callees[within]
+        size = len(names)
+        definitions = np.bincount(node_of[:models_count][node_of[:models_count] >= 0], minlength=size)
+        internal_calls = np.bincount(callers[callers == callees], minlength=size)
+        between = callers != callees
+        pairs, calls = np.unique(callers[between] * size + callees[between], return_counts=True)
+        edges = list(zip((pairs // size).tolist(), (pairs % size).tolist(), calls.tolist()))
+        return cls(level, list(names), clusters, definitions.tolist(), internal_calls.tolist(), edges)
+
+    def __label(self, index: int) -> str:
+        count = self.definitions[index]
+        if self.level == "definition" or not count:
+            return self.nodes[index]
+        return f"{self.nodes[index]} ({count})"
+
+    def __cluster_groups(self) -> dict[str, list[int]]:
+        groups = {}
+        for index, cluster in enumerate(self.clusters):
+            groups.setdefault(cluster, []).append(index)
+        return groups
+
+    def to_mermaid(self, title: str) -> str:
+        """
+        Mermaid code of the graph, with a subgraph for each cluster and the number of calls on each edge
+        """
+        nodes = [Node(f"n{index}", self.__label(index)) for index in range(len(self.nodes))]
+        diagram_nodes = []
+        for cluster_index, (cluster, indexes) in enumerate(self.__cluster_groups().items()):
+            if cluster:
+                cluster_node = Node(f"cluster_{cluster_index}", cluster, sub_nodes=[nodes[index] for index in indexes])
+                diagram_nodes.append(cluster_node)
+            else:
+                diagram_nodes.extend(nodes[index] for index in indexes)
+        links = [Link(nodes[caller], nodes[callee], message=str(calls)) for caller, callee, calls in self.edges]
+        return str(MermaidDiagram(title=title, nodes=diagram_nodes, links=links, orientation="left to right"))
+
+    def to_dot(self, title: str) -> str:
+        """
+        Graphviz code of the graph, with a cluster subgraph for each cluster and heavier edges drawn thicker
+        """
+        lines = [f"digraph {dot_string(title)} {{", "    rankdir=LR;", "    node [shape=box];"]
+        for cluster_index, (cluster, indexes) in enumerate(self.__cluster_groups().items()):
+            node_lines = [f"n{index} [label={dot_string(self.__label(index))}];" for index in indexes]
+            if cluster:
+                lines.append(f'    subgraph "cluster_{cluster_index}" {{')
+                lines.append(f"        label={dot_string(cluster)};")
+                lines.extend(f"        {line}" for line in node_lines)
+                lines.append("    }")
+            else:
+                lines.extend(f"    {line}" for line in node_lines)
+        for caller, callee, calls in self.edges:
+            width = 1 + math.log2(calls)
+            lines.append(f'    n{caller} -> n{callee} [label="{calls}", penwidth={width:.2f}];')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict:
+        """
+        Nodes of the graph and, by the name of each caller, the list of nodes it calls with the number of calls
+        """
+        adjacency = {name: [] for name in self.nodes}
+        for caller, callee, calls in self.edges:
+            adjacency[self.nodes[caller]].append({"callee": self.nodes[callee], "calls": calls})
+        return {
+            "level": self.level,
+            "nodes": [
+                {"name": name, "cluster": cluster, "definitions": definitions, "internal_calls": internal_calls}
+                for name, cluster, definitions, internal_calls in zip(
+                    self.nodes, self.clusters, self.definitions, self.internal_calls
+                )
+            ],
+            "adjacency": adjacency,
+        }
+
+    def export(self, format: str, title: str) -> str:
+        """
+        Returns the code of the graph in one of FORMATS
+        """
+        if format == "mermaid":
+            return self.to_mermaid(title)
+        if format == "dot":
+            return self.to_dot(title)
+        if format == "json":
+            return json.dumps(dict(self.to_dict(), title=title), indent=2)
+        raise ValueError(f"format should be one of {', '.join(FORMATS)}, not {format}")
+
+    def write(self, path: str | Path, format: str, title: str):
+        with open(path, "w") as file:
+            file.write(self.export(format, title))
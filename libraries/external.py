@@ -0,0 +1,90 @@
+import os
+import sys
+from importlib.machinery import PathFinder
+from pathlib import Path
+
+from libraries.models.class_def import ClassMd
+from libraries.models.function_def import FunctionMd
+from libraries.parse_cache import ParseCache
+from libraries.source_parser import ImportMap, Parser
+
+
+def default_cache_dir() -> Path:
+    """
+    Directory shared by every run in the environment, Ex: ~/.cache/analyzer/external
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "analyzer" / "external"
+
+
+class ExternalIndex:
+    """
+    Finds and parses the modules of installed packages, Ex: the standard library and site-packages
+    Modules are only looked for once a call reaches them, and their models are kept in a ParseCache
+    shared by every analysis, so each installed file is parsed once per environment instead of once per run
+    Only modules written in python can be followed, compiled and builtin ones stay unknown
+    Args:
+    - search_path(list[str] | None): directories where top level modules are looked for, sys.path if not given
+    - cache_dir(str | Path | None): directory of the shared cache, see default_cache_dir
+    """
+
+    def __init__(self, search_path: list[str] | None = None, cache_dir: str | Path | None = None) -> None:
+        self.search_path = list(search_path) if search_path is not None else list(sys.path)
+        self.cache = ParseCache(cache_dir if cache_dir is not None else default_cache_dir())
+        # Module name -> its file, or None if it can't be followed
+        self.__modules: dict[str, Path | None] = {}
+        self.__locations: dict[str, list[str] | None] = {}
+
+    def find_module(self, qualified: str) -> tuple[str, Path] | None:
+        """
+        Returns the longest module that a qualified name starts with and its file, Ex: "json.decoder.scanstring"
+        -> ("json.decoder", ".../json/decoder.py"), or None if no part of it is an importable python file
+        """
+        parts = qualified.split(".")
+        found = None
+        for cut in range(1, len(parts)):
+            module = ".".join(parts[:cut])
+            path = self.__find(module)
+            if path is None and module not in self.__locations:
+                break
+            if path is not None:
+                found = (module, path)
+            if self.__locations.get(module) is None:
+                # Not a package, there are no submodules to look for
+                break
+        return found
+
+    def __find(self, module: str) -> Path | None:
+        if module in self.__modules:
+            return self.__modules[module]
+        parent, _, _ = module.rpartition(".")
+        if parent:
+            search_path = self.__locations.get(parent)
+            spec = PathFinder.find_spec(module, search_path) if search_path else None
+        else:
+            spec = PathFinder.find_spec(module, self.search_path)
+        path = None
+        if spec is not None:
+            self.__locations[module] = list(spec.submodule_search_locations or []) or None
+            if spec.origin is not None and spec.origin.endswith(".py"):
+                path = Path(spec.origin)
+        self.__modules[module] = path
+        return path
+
+    def load(self, path: Path) -> tuple[list[FunctionMd], list[ClassMd], ImportMap] | None:
+        """
+        Returns the models and imports of an installed module, from the shared cache when possible
+        Returns None if it can't be parsed, Ex: a file written for another version of python
+        """
+        record = self.cache.load(path)
+        if record is None:
+            try:
+                parser = Parser(path)
+                record = parser.to_record()
+            except (SyntaxError, UnicodeDecodeError, ValueError, RecursionError):
+                return None
+            try:
+                self.cache.store(path, record, parser.fingerprint)
+            except OSError:
+                pass
+        functions, classes = Parser.models_from_record(record, path)
+        return functions, classes, Parser.import_map_from_record(record)
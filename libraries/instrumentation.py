@@ -0,0 +1,105 @@
+import cProfile
+import heapq
+import pstats
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, ContextManager, Iterable
+
+PhaseHook = Callable[[str], ContextManager]
+
+
+class ProfilerHook:
+    """
+    Phase hook that runs phases under cProfile, keeping one profiler for each phase
+    Args:
+    - phases(Iterable[str] | None): names of the phases to be profiled, every phase if not given
+    """
+
+    def __init__(self, phases: Iterable[str] | None = None) -> None:
+        self.phases = set(phases) if phases is not None else None
+        self.profilers: dict[str, cProfile.Profile] = {}
+
+    def __call__(self, phase: str) -> ContextManager:
+        if self.phases is not None and phase not in self.phases:
+            return nullcontext()
+        if phase not in self.profilers:
+            self.profilers[phase] = cProfile.Profile()
+        return self.profilers[phase]
+
+    def stats(self, phase: str) -> pstats.Stats:
+        return pstats.Stats(self.profilers[phase])
+
+    def dump(self, directory: str | Path):
+        """
+        Writes the profile of each phase to <directory>/<phase>.prof, readable by pstats or snakeviz
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for phase, profiler in self.profilers.items():
+            profiler.dump_stats(directory / f"{phase}.prof")
+
+
+class Instrumentation:
+    """
+    Timings and counters of the phases of an Analyzer
+    Phases never run inside each other, so each one can be wrapped by a hook of its own.
+    Phases that happen once per file, like parsing, are entered once per file
+    Args:
+    - hook(PhaseHook | None): called with the name of a phase, returns a context manager that wraps it
+    """
+
+    # Number of slowest files and of latest queries kept
+    slowest_files = 10
+    queries_kept = 100
+
+    def __init__(self, hook: PhaseHook | None = None) -> None:
+        self.hook = hook
+        self.phases: dict[str, dict] = {}
+        self.counters: dict[str, int] = {}
+        # Min-heap of (seconds, path) with the slowest files parsed
+        self.parse_times: list[tuple[float, str]] = []
+        self.queries: deque[dict] = deque(maxlen=self.queries_kept)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            if self.hook is None:
+                yield
+            else:
+                with self.hook(name):
+                    yield
+        finally:
+            phase = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            phase["seconds"] += time.perf_counter() - start
+            phase["calls"] += 1
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def file_parsed(self, path: str | Path, seconds: float, size: int):
+        self.count("files_parsed")
+        self.count("bytes_read", size)
+        entry = (seconds, str(path))
+        if len(self.parse_times) < self.slowest_files:
+            heapq.heappush(self.parse_times, entry)
+        elif entry > self.parse_times[0]:
+            heapq.heapreplace(self.parse_times, entry)
+
+    def query(self, call_name: str, nodes: int, edges: int, seconds: float):
+        self.count("queries")
+        self.count("nodes_visited", nodes)
+        self.count("edges_visited", edges)
+        self.queries.append({"call_name": call_name, "nodes": nodes, "edges": edges, "seconds": seconds})
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {name: dict(phase) for name, phase in self.phases.items()},
+            "counters": dict(self.counters),
+            "slowest_files": [
+                {"path": path, "seconds": seconds} for seconds, path in sorted(self.parse_times, reverse=True)
+            ],
+            "queries": list(self.queries),
+        }
@@ -1,21 +1,215 @@
-import ast
+import json
 import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from libraries.diagram_maker import Diagram
-from libraries.explorer import explore
+from libraries.call_graph import CallGraph, CallsMap
+from libraries.diagram_batch import create_diagrams
+from libraries.diagram_maker import Diagram, node_label
+from libraries.explorer import DEFAULT_EXCLUDED, is_walked, walk
+from libraries.exporters import AggregatedGraph
+from libraries.external import ExternalIndex
+from libraries.instrumentation import Instrumentation, PhaseHook
+from libraries.metrics import GraphMetrics
 from libraries.models.class_def import ClassMd, MethodMd
 from libraries.models.function_def import FunctionMd
 from libraries.models.unknown_func import UnknownFuncMd
-from libraries.source_parser import Parser
+from libraries.parse_cache import ParseCache
+from libraries.revisions import caller_edges, changed_files, check_head, entry_points, graph_diff
+from libraries.rules import MAX_BROWSER_BUG, Finding, Rule, RuleEngine
+from libraries.snapshot import read_snapshot, write_snapshot
+from libraries.source_parser import ImportMap, Parser, parse_to_timed_records
+from libraries.subgraph_cache import CallSubgraph, SubgraphCache
+from libraries.symbol_table import External, SymbolTable
+
+
+def add_model_to_raw_map(model: FunctionMd | ClassMd | MethodMd | UnknownFuncMd, raw_map: dict) -> dict:
+    """
+    Add models to a raw_map, with all the necessary checks that it implies
+    """
+    if model.name[-2:] == "__" and model.name[:2] == "__":
+        return raw_map
+    # This handles calls with same name that aren't the same object, creating a list with objects or adding to it
+    # Models of the same name are kept in the order they were added, which is the order of the files
+    current = raw_map.get(model.name)
+    if current is None:
+        raw_map[model.name] = model
+    elif isinstance(current, list):
+        current.append(model)
+    elif current is not model:
+        raw_map[model.name] = [current, model]
+    return raw_map
+
+
+def remove_model_from_raw_map(model: FunctionMd | ClassMd | MethodMd, raw_map: dict) -> dict:
+    """
+    Removes a model added with add_model_to_raw_map, leaving the raw_map as if it was never added
+    """
+    models = raw_map.get(model.name)
+    if models is model:
+        del raw_map[model.name]
+    elif isinstance(models, list) and model in models:
+        models.remove(model)
+        if len(models) == 1:
+            raw_map[model.name] = models[0]
+    return raw_map
 
 
 class Analyzer:
-    def __init__(self, path: str) -> None:
+    # Number of files sent at once to a worker process
+    parse_batch_size = 16
+    # Cheap way of finding the names defined in a file without parsing it, used by the lazy mode
+    definition_pattern = re.compile(r"^[ \t]*(?:async[ \t]+)?(?:def|class)[ \t]+([^\W\d]\w*)", re.MULTILINE)
+
+    def __init__(
+        self,
+        path: str,
+        cache_dir: str | Path | None = None,
+        jobs: int | None = None,
+        exclude: list[str] = DEFAULT_EXCLUDED,
+        use_gitignore: bool = True,
+        lazy: bool = False,
+        subgraph_cache_size: int = 256,
+        phase_hook: PhaseHook | None = None,
+        lean: bool = False,
+        external_depth: int = 0,
+        external_cache_dir: str | Path | None = None,
+    ) -> None:
+        """
+        Args:
+        - path(str): directory to be analyzed
+        - cache_dir(str | Path | None): directory where the models extracted from each file are cached between runs
+        - jobs(int | None): number of processes used to parse the files, defaults to the number of CPUs
+        - exclude(list[str]): .gitignore-style patterns of files and directories that shouldn't be analyzed
+        - use_gitignore(bool): sets if the .gitignore files of the directory should also be respected
+        - lazy(bool): sets if files should only be parsed once a query reaches a name defined in them
+        - subgraph_cache_size(int): number of call subgraphs kept in memory between queries
+        - phase_hook(PhaseHook | None): called with the name of each phase, returns a context manager that wraps it
+          Ex: ProfilerHook() to run the phases under cProfile
+        - lean(bool): sets if models should drop their AST once their data is extracted, it's parsed again when needed
+          Models loaded from the cache or parsed by other processes never hold it
+        - external_depth(int): number of calls followed into installed packages, Ex: 1 maps the functions of a package
+          called by the directory, but not what they call. With 0, calls into packages are unknown
+        - external_cache_dir(str | Path | None): cache of the installed modules, shared by every run, see ExternalIndex
+        """
+        self.__setup(path, cache_dir, jobs, exclude, use_gitignore, lazy, subgraph_cache_size, phase_hook, lean)
+        self.__setup_externals(external_depth, external_cache_dir)
+        if lazy:
+            self.__indexed_names: dict[Path, set[str]] = {}
+            self.definitions_index = self.__index_definitions()
+            self.__loaded_files: set[Path] = set()
+            self.__expanded_names: set[str] = set()
+        else:
+            self.__gather_call_models()
+
+    def __setup(self, path, cache_dir, jobs, exclude, use_gitignore, lazy, subgraph_cache_size, phase_hook, lean):
         self.path = path
-        self.directories = explore(path, ignored=[".git", "venv", "__pycache__"])
-        self.files_paths: list[Path] = self.__generate_files_path()
-        self.raw_map, self.models_list = self.__gather_call_models()
+        self.cache = ParseCache(cache_dir) if cache_dir is not None else None
+        self.jobs = jobs if jobs is not None else (os.cpu_count() or 1)
+        self.exclude = exclude
+        self.use_gitignore = use_gitignore
+        # Filled while the directory is walked, files are parsed as soon as they are discovered
+        self.files_paths: list[Path] = []
+        # (mtime, size) of each file when it was discovered, compared by refresh to find what changed
+        self.__fingerprints: dict[Path, tuple[int, int]] = {}
+        # Models of each file, so they can be replaced when the file changes
+        self.__file_models: dict[Path, tuple[list[FunctionMd], list[ClassMd]]] = {}
+        self.lazy = lazy
+        self.lean = lean
+        self.raw_map = {}
+        self.models_list = []
+        # Definitions by qualified name and imports of each module, used to resolve calls precisely
+        self.symbols = SymbolTable(path)
+        self.__call_graph: CallGraph | None = None
+        self.subgraph_cache = SubgraphCache(subgraph_cache_size)
+        self.instrumentation = Instrumentation(phase_hook)
+
+    def __setup_externals(self, external_depth: int, external_cache_dir: str | Path | None):
+        self.external_depth = external_depth
+        self.__external_cache_dir = external_cache_dir
+        self.__externals: ExternalIndex | None = None
+        # Module, models and imports of each installed file that was parsed, in the order they were
+        self.__external_files: dict[Path, tuple[str, list[FunctionMd], list[ClassMd], ImportMap]] = {}
+        self.__external_failed: set[Path] = set()
+        self.external_models: list[FunctionMd | ClassMd | MethodMd] = []
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot_path: str | Path,
+        cache_dir: str | Path | None = None,
+        jobs: int | None = None,
+        exclude: list[str] = DEFAULT_EXCLUDED,
+        use_gitignore: bool = True,
+        subgraph_cache_size: int = 256,
+        phase_hook: PhaseHook | None = None,
+        lean: bool = False,
+        external_depth: int = 0,
+        external_cache_dir: str | Path | None = None,
+    ) -> "Analyzer":
+        """
+        Creates an Analyzer from a file written by to_snapshot, without walking or parsing the directory
+        Its models don't hold their AST, which is parsed again when needed.
+        Files changed since the snapshot was written are only picked up by refresh
+        The other arguments are the same as the ones of Analyzer, used by the refreshes
+        """
+        analyzer = cls.__new__(cls)
+        instrumentation = Instrumentation(phase_hook)
+        with instrumentation.phase("snapshot"):
+            snapshot = read_snapshot(snapshot_path)
+        analyzer.__setup(
+            snapshot.root, cache_dir, jobs, exclude, use_gitignore, False, subgraph_cache_size, phase_hook, lean
+        )
+        analyzer.__setup_externals(external_depth, external_cache_dir)
+        analyzer.instrumentation = instrumentation
+        for path, fingerprint, functions, classes, import_map, external_module in snapshot.files:
+            if external_module is not None:
+                analyzer.__add_external(path, external_module, functions, classes, import_map)
+                continue
+            analyzer.files_paths.append(path)
+            analyzer.__fingerprints[path] = fingerprint
+            analyzer.symbols.add_path(path)
+            analyzer.__register_models(path, functions, classes, import_map)
+        with analyzer.instrumentation.phase("call_graph"):
+            analyzer.__call_graph = CallGraph.from_targets(
+                analyzer.raw_map,
+                analyzer.models_list + analyzer.external_models,
+                analyzer.symbols,
+                snapshot.offsets,
+                snapshot.targets,
+                snapshot.unknown_names,
+            )
+        return analyzer
+
+    def to_snapshot(self, path: str | Path):
+        """
+        Writes the models and the resolved calls to a SQLite file, which from_snapshot loads without parsing anything
+        The tables can also be queried directly, Ex:
+        SELECT caller.qualified_name FROM edges JOIN definitions AS caller ON caller.id = edges.caller_id
+        WHERE edges.callee_id IN (SELECT id FROM definitions WHERE name = 'run')
+        """
+        self.load_all()
+        graph = self.call_graph
+        files = [
+            (
+                path,
+                self.__fingerprints[path],
+                self.symbols.imports.get(self.symbols.module_names[path], ImportMap()),
+                None,
+            )
+            for path in self.files_paths
+            if path in self.__file_models
+        ]
+        for external_path, (module, _, _, import_map) in self.__external_files.items():
+            stat = os.stat(external_path)
+            files.append((external_path, (stat.st_mtime_ns, stat.st_size), import_map, module))
+        with self.instrumentation.phase("snapshot"):
+            write_snapshot(path, self.path, files, graph, self.symbols)
 
     def identify_max_browser_bug(self):
         """
@@ -24,145 +218,757 @@ class Analyzer:
         b.set_window_size(1920, 1600)
         b.maximize_browser_window()
         """
-        culprit_list = []
-        for model_object in self.models_list:
-            tree_iterator = ast.iter_child_nodes(model_object.source)
-            for node in tree_iterator:
-                is_cold_method_call = (
-                    isinstance(node, ast.Expr)
-                    and isinstance(node.value, ast.Call)
-                    and isinstance(node.value.func, ast.Attribute)
-                )
-                attr_is = lambda attr: node.value.func.attr == attr
-
-                if is_cold_method_call and attr_is("set_window_size"):
-                    node = tree_iterator.__next__()
-                    if is_cold_method_call and attr_is("maximize_browser_window"):
-                        culprit_list.append((model_object.location, node.lineno))
-        return culprit_list
-
-    def __gather_call_models(self) -> tuple[dict, list]:
-        """
-        Generate a tuple containing raw map of models and list of all models.
+        return [(finding.location, finding.lineno) for finding in self.check_rules([MAX_BROWSER_BUG])]
+
+    def check_rules(self, rules: RuleEngine | Iterable[Rule]) -> list[Finding]:
+        """
+        Looks for the patterns of calls described by the rules in every model, in a single pass
+        Args:
+        - rules(RuleEngine | Iterable[Rule]): rules to be checked, a RuleEngine can be reused to avoid compiling them again
+
+        Returns the findings in the order of models_list, with the file and line of each one
+        """
+        self.load_all()
+        engine = rules if isinstance(rules, RuleEngine) else RuleEngine(rules)
+        with self.instrumentation.phase("rules"):
+            findings = engine.check(self.models_list)
+        if self.lean:
+            for model in self.models_list:
+                model.release_source()
+        return findings
+
+    def __gather_call_models(self):
+        """
+        Fills the raw map of models and list of all models with every file of the directory.
         raw_map: A dictionary where key is the calls name, a model or list of models with that name
         models_list: Linear list of all gathered models
         """
-        raw_map = {}
-        models_list = []
-        for path in self.files_paths:
+        for path, (functions, classes, import_map) in self.__parse_files():
+            self.__register_models(path, functions, classes, import_map)
+
+    def __register_models(
+        self,
+        path: Path,
+        functions: list[FunctionMd],
+        classes: list[ClassMd],
+        import_map: ImportMap,
+        position: int | None = None,
+    ):
+        """
+        Adds the models of a file to the raw_map, to models_list, at position or at the end of it, and to the symbols
+        """
+        self.__file_models[path] = (functions, classes)
+        self.symbols.add_file(path, functions, classes, import_map)
+        with self.instrumentation.phase("raw_map_merge"):
+            models = self.__add_to_raw_map(functions, classes)
+            if position is None:
+                self.models_list.extend(models)
+            else:
+                self.models_list[position:position] = models
+        self.instrumentation.count("functions", len(functions))
+        self.instrumentation.count("classes", len(classes))
+        self.instrumentation.count("methods", sum(len(classmd.methods) for classmd in classes))
+
+    def __add_to_raw_map(self, functions: list[FunctionMd], classes: list[ClassMd]) -> list:
+        models = []
+        for funcmd in functions:
+            models.append(funcmd)
+            self.raw_map = add_model_to_raw_map(funcmd, self.raw_map)
+        for classmd in classes:
+            models.append(classmd)
+            self.raw_map = add_model_to_raw_map(classmd, self.raw_map)
+            for methodmd in classmd.methods:
+                models.append(methodmd)
+                self.raw_map = add_model_to_raw_map(methodmd, self.raw_map)
+        return models
+
+    def __unregister_models(self, path: Path) -> tuple[int | None, set[str]]:
+        """
+        Removes the models of a file from the raw_map and models_list
+        Returns the position they had in models_list and their names
+        """
+        functions, classes = self.__file_models.pop(path, ([], []))
+        self.symbols.remove_file(path)
+        models = functions + classes + [methodmd for classmd in classes for methodmd in classmd.methods]
+        if not models:
+            return None, set()
+        # The models of a file are registered together, so they are next to each other in models_list
+        position = self.models_list.index((functions + classes)[0])
+        del self.models_list[position : position + len(models)]
+        for model in models:
+            self.raw_map = remove_model_from_raw_map(model, self.raw_map)
+        return position, {model.name for model in models}
+
+    def __index_definitions(self) -> dict[str, list[Path]]:
+        """
+        Creates an index of the files where each name is defined, by scanning them for def and class statements
+        May list a file that doesn't really define the name (Ex: the def is inside a string), which only costs a parse
+        """
+        definitions_index = {}
+        for path in self.__discover_files():
+            for name in self.__index_file(path):
+                definitions_index.setdefault(name, []).append(path)
+        return definitions_index
+
+    def __index_file(self, path: Path) -> set[str]:
+        """
+        Returns the names that a file defines, according to definition_pattern
+        """
+        with self.instrumentation.phase("indexing"):
+            with open(path) as file:
+                source = file.read()
+            names = set(self.definition_pattern.findall(source))
+        self.__indexed_names[path] = names
+        self.instrumentation.count("bytes_indexed", len(source.encode()))
+        return names
+
+    def __load_files(self, paths: list[Path]):
+        """
+        Parses the given files and adds their models to the raw map, keeping the collisions of each name
+        in the order of discovery, like a full analysis would
+        """
+        paths = [path for path in paths if path not in self.__loaded_files]
+        if not paths:
+            return
+        names = set()
+        for path in paths:
+            self.__loaded_files.add(path)
+            functions, classes, import_map = self.__parse_file(path)
+            self.__register_models(path, functions, classes, import_map)
+            names.update(model.name for model in functions + classes)
+            names.update(method.name for classmd in classes for method in classmd.methods)
+        self.__names_changed(names)
+
+    def __names_changed(self, names: set[str], imports_changed: bool = False):
+        """
+        Puts the models of each name back in the order of discovery and drops whatever depended on those names
+        If the imports of a file or the modules of the directory changed, every cached subgraph is dropped instead,
+        since calls can reach a module through a chain of imports and aliases that the names of a subgraph don't show
+        """
+        files_order = {path: index for index, path in enumerate(self.files_paths)}
+        for name in names:
+            if isinstance(self.raw_map.get(name), list):
+                self.raw_map[name].sort(key=lambda model: files_order[model.location])
+        self.__call_graph = None
+        if imports_changed:
+            self.subgraph_cache.clear()
+            if self.lazy:
+                # Queries expand their names again, loading the modules that the new imports lead to
+                self.__expanded_names.clear()
+        else:
+            # New definitions can change what those names resolve to
+            self.subgraph_cache.invalidate(names)
+
+    def __imports_of(self, paths: list[Path]) -> dict[Path, ImportMap]:
+        """
+        Returns the imports of each file as the symbols have them, empty for files that weren't loaded
+        """
+        return {path: self.symbols.imports.get(self.symbols.module_names.get(path), ImportMap()) for path in paths}
+
+    def __changed_imports(self, old_imports: dict[Path, ImportMap]) -> set[str] | None:
+        """
+        Compares the imports of files with the ones they had before an update
+        Returns the names bound to something else, or None if no import changed
+        """
+        names = set()
+        changed = False
+        for path, new_imports in self.__imports_of(list(old_imports)).items():
+            old = old_imports[path]
+            if old.names != new_imports.names or old.star != new_imports.star:
+                names.update(old.changed_names(new_imports))
+                changed = True
+        return names if changed else None
+
+    def __load_reachable(self, call_name: str):
+        """
+        Parses every file that a map starting at call_name can reach, following call names through the definitions index
+        """
+        # Qualified names, Ex: "pkg.mod.func", are indexed by their last part
+        queue = deque([call_name.rsplit(".", 1)[-1]])
+        while queue:
+            name = queue.popleft()
+            if name in self.__expanded_names:
+                continue
+            self.__expanded_names.add(name)
+            self.__load_files(self.definitions_index.get(name, []))
+            models = self.raw_map.get(name, [])
+            # The calls of a class include the ones of its methods, so its __init__ is covered as well
+            for model in models if isinstance(models, list) else [models]:
+                queue.extend(model.calls)
+                queue.extend(self.__load_imported(model))
+
+    def __load_imported(self, model: FunctionMd | ClassMd | MethodMd) -> list[str]:
+        """
+        Parses the modules that the imported calls of a model go through, so they resolve like in a full analysis
+        Loading a module may show that its own imports lead to yet another one, Ex: a package re-exporting a function
+        Returns the names of the definitions the calls resolved to, which differ from the call for aliased imports
+        """
+        while True:
+            paths = [path for path in self.symbols.missing_modules(model) if path not in self.__loaded_files]
+            if not paths:
+                break
+            self.__load_files(sorted(paths))
+        names = []
+        for position in range(len(model.calls)):
+            found = self.symbols.resolve(model, position)
+            if isinstance(found, (FunctionMd, ClassMd)):
+                names.append(found.name)
+        return names
+
+    def load_all(self):
+        """
+        Parses every file that wasn't parsed yet, leaving a lazy Analyzer as complete as an eager one
+        """
+        if self.lazy:
+            self.__load_files(self.files_paths)
+
+    def __discover_files(self):
+        """
+        Walks the analyzed directory, registering every python file in files_paths as it's found
+        """
+        paths = walk(self.path, exclude=self.exclude, use_gitignore=self.use_gitignore)
+        while True:
+            with self.instrumentation.phase("discovery"):
+                path = next(paths, None)
+            if path is None:
+                return
+            stat = os.stat(path)
+            self.__fingerprints[path] = (stat.st_mtime_ns, stat.st_size)
+            self.files_paths.append(path)
+            self.symbols.add_path(path)
+            yield path
+
+    def __parse_files(self):
+        """
+        Yields the path, the function and class models and the imports of every discovered file, in the order they were
+        discovered
+        With more than one job, files missing from the cache are sent in batches to a pool of processes
+        while the directory is still being walked
+        """
+        if self.jobs <= 1:
+            for path in self.__discover_files():
+                yield path, self.__parse_file(path)
+            return
+        # Each slot is either a record or the index of a batch sent to the pool and the position inside it
+        slots = []
+        batch = []
+        futures = []
+        executor = None
+        try:
+            for path in self.__discover_files():
+                record = self.cache.load(path) if self.cache is not None else None
+                if record is not None:
+                    self.instrumentation.count("files_from_cache")
+                    slots.append(record)
+                    continue
+                slots.append((len(futures), len(batch)))
+                batch.append(path)
+                if len(batch) == self.parse_batch_size:
+                    if executor is None:
+                        executor = ProcessPoolExecutor(max_workers=self.jobs)
+                    futures.append((batch, executor.submit(parse_to_timed_records, batch)))
+                    batch = []
+            if batch:
+                # Whatever is left is parsed here, so small directories never start a pool at all
+                futures.append((batch, None))
+            batches = []
+            for batch, future in futures:
+                with self.instrumentation.phase("parsing"):
+                    timed_records = future.result() if future is not None else parse_to_timed_records(batch)
+                records = []
+                for path, (record, seconds, size, fingerprint) in zip(batch, timed_records):
+                    self.instrumentation.file_parsed(path, seconds, size)
+                    if self.cache is not None:
+                        self.cache.store(path, record, fingerprint)
+                    records.append(record)
+                batches.append(records)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        for path, slot in zip(self.files_paths, slots):
+            if isinstance(slot, tuple):
+                batch_index, position = slot
+                slot = batches[batch_index][position]
+            with self.instrumentation.phase("model_building"):
+                functions, classes = Parser.models_from_record(slot, path)
+            yield path, (functions, classes, Parser.import_map_from_record(slot))
+
+    def __parse_file(self, path: Path) -> tuple[list[FunctionMd], list[ClassMd], ImportMap]:
+        """
+        Returns the function and class models and the imports of a file, from the cache when it has a valid entry for it
+        """
+        record = self.cache.load(path) if self.cache is not None else None
+        if record is not None:
+            self.instrumentation.count("files_from_cache")
+            with self.instrumentation.phase("model_building"):
+                functions, classes = Parser.models_from_record(record, path)
+            return functions, classes, Parser.import_map_from_record(record)
+        start = time.perf_counter()
+        with self.instrumentation.phase("parsing"):
             p = Parser(path)
-            for funcmd in p.functions:
-                models_list.append(funcmd)
-                raw_map = self.__add_models_to_raw_map(funcmd, raw_map)
-            for classmd in p.classes:
-                models_list.append(classmd)
-                raw_map = self.__add_models_to_raw_map(classmd, raw_map)
-                for methodmd in classmd.methods:
-                    models_list.append(methodmd)
-                    raw_map = self.__add_models_to_raw_map(methodmd, raw_map)
-        return raw_map, models_list
-
-    def __add_models_to_raw_map(self, model: FunctionMd | ClassMd | MethodMd | UnknownFuncMd, raw_map: dict) -> dict:
-        """
-        Add models to a raw_map, with all the necessary checks that it implies
-        """
-        if model.name[-2:] == "__" and model.name[:2] == "__":
-            return raw_map
-        # This handles calls with same name that aren't the same object, creating a list with objects or adding to it
-        if model.name in raw_map.keys():
-            if model is not raw_map[model.name]:
-                if isinstance(raw_map[model.name], list):
-                    raw_map[model.name].append(model)
-                    raw_map[model.name] = list(set(raw_map[model.name]))
-                    return raw_map
-                else:
-                    raw_map[model.name] = [raw_map[model.name], model]
-                    return raw_map
-        raw_map[model.name] = model
-        return raw_map
+        self.instrumentation.file_parsed(path, time.perf_counter() - start, len(p.source.encode()))
+        if self.cache is not None:
+            self.cache.store(path, p.to_record(), p.fingerprint)
+        if self.lean:
+            for model in p.functions + p.classes:
+                model.release_source()
+        return p.functions, p.classes, p.import_map
+
+    def refresh(self) -> dict:
+        """
+        Brings the Analyzer up to date with the files added, modified or deleted since they were last seen
+        Files are compared by mtime and size, and only the ones that changed are parsed again.
+        Their old models are swapped for the new ones in place, and only the cached subgraphs that resolved
+        one of their names are dropped, or all of them if the imports or the modules of the directory changed.
+        In lazy mode, files that weren't loaded yet are only indexed again
+
+        Returns the paths of what changed and the names that were affected, the ones bound by changed imports included
+        """
+        start = time.perf_counter()
+        fingerprints = {}
+        for path in walk(self.path, exclude=self.exclude, use_gitignore=self.use_gitignore):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            fingerprints[path] = (stat.st_mtime_ns, stat.st_size)
+        added = [path for path in fingerprints if path not in self.__fingerprints]
+        deleted = [path for path in self.__fingerprints if path not in fingerprints]
+        modified = [
+            path
+            for path, fingerprint in fingerprints.items()
+            if self.__fingerprints.get(path, fingerprint) != fingerprint
+        ]
+        names = set()
+        if added or deleted or modified:
+            old_imports = self.__imports_of(deleted + modified)
+            self.files_paths = list(fingerprints)
+            self.__fingerprints = fingerprints
+            for path in added:
+                self.symbols.add_path(path)
+                old_imports[path] = ImportMap()
+            for path in deleted:
+                names.update(self.__forget_file(path))
+            for path in modified + added:
+                names.update(self.__update_file(path))
+            imported_names = self.__changed_imports(old_imports)
+            names.update(imported_names or ())
+            # New and deleted modules change what imports of them resolve to, even when they import nothing
+            self.__names_changed(names, imported_names is not None or bool(added or deleted))
+        self.instrumentation.count("refreshes")
+        return {
+            "added": [str(path) for path in added],
+            "modified": [str(path) for path in modified],
+            "deleted": [str(path) for path in deleted],
+            "names": sorted(names),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def update_from_git(self, base: str, head: str | None = None) -> dict:
+        """
+        Brings an analysis of the revision base up to head, parsing only the python files that git reports as changed,
+        and returns how the call graph changed between both revisions
+        The working tree should be checked out at head, since the files are read from it. If head isn't given,
+        the working tree itself is compared, untracked files left out
+        Args:
+        - base(str): revision the Analyzer holds the analysis of, Ex: one loaded with from_snapshot
+        - head(str | None): revision the working tree is at
+
+        Returns a dictionary with:
+        - files: paths added, modified and deleted
+        - definitions: qualified names added and removed
+        - edges: [caller, callee] calls added and removed, calls of unknown source are written as "?name"
+        - entry_points: the calls added and removed under each model that reaches them without being called itself
+        """
+        start = time.perf_counter()
+        with self.instrumentation.phase("git"):
+            if head is not None:
+                check_head(self.path, head)
+            changes = {
+                kind: [path for path in paths if is_walked(self.path, path, self.exclude, self.use_gitignore)]
+                for kind, paths in changed_files(self.path, base, head).items()
+            }
+        self.load_all()
+        old_graph = self.call_graph
+        changed = changes["added"] + changes["modified"] + changes["deleted"]
+        old_models = self.__models_of(changed)
+        # Models of the changed files may not be in the symbols anymore once they are removed
+        labels = {model: self.symbols.qualified_name(model) or model.name for model in old_models}
+
+        def label(model) -> str:
+            return labels.get(model) or self.symbols.qualified_name(model) or model.name
+
+        names = {model.name for model in old_models}
+        old_imports = self.__imports_of(changed)
+        for path in changes["deleted"]:
+            names.update(self.__forget_file(path))
+            if path in self.__fingerprints:
+                del self.__fingerprints[path]
+                self.files_paths.remove(path)
+        for path in changes["modified"] + changes["added"]:
+            self.__track_file(path)
+            names.update(self.__update_file(path))
+        imported_names = self.__changed_imports(old_imports)
+        names.update(imported_names or ())
+        self.__names_changed(names, imported_names is not None or bool(changes["added"] or changes["deleted"]))
+        new_graph = self.call_graph
+        new_models = self.__models_of(changed)
+        names.update(model.name for model in new_models)
+        # The calls that may resolve differently are the ones of the changed files, the ones made to their models
+        # before and after the change and the ones made by the names they define
+        touched = set(old_models) | set(new_models)
+        for graph, models in ((old_graph, old_models), (new_graph, new_models)):
+            for symbol in graph.callers([graph.ids[model] for model in models], 1):
+                touched.add(graph.models[symbol])
+        touched.update(model for model in self.models_list if not names.isdisjoint(model.calls))
+        added, removed = graph_diff(caller_edges(old_graph, touched, label), caller_edges(new_graph, touched, label))
+        old_labels = {label(model) for model in old_models}
+        new_labels = {label(model) for model in new_models}
+        by_entry_point = {}
+        cache = {}
+        for kind, graph, edges in (("added", new_graph, added), ("removed", old_graph, removed)):
+            callers = {label(model): model for model in touched if model in graph.ids}
+            for caller, callee in edges:
+                for entry_point in entry_points(graph, callers[caller], label, cache) or [caller]:
+                    entry = by_entry_point.setdefault(entry_point, {"added": [], "removed": []})
+                    entry[kind].append([caller, callee])
+        self.instrumentation.count("git_updates")
+        return {
+            "base": base,
+            "head": head,
+            "files": {kind: [str(path) for path in paths] for kind, paths in changes.items()},
+            "definitions": {"added": sorted(new_labels - old_labels), "removed": sorted(old_labels - new_labels)},
+            "edges": {"added": added, "removed": removed},
+            "entry_points": dict(sorted(by_entry_point.items())),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def __models_of(self, paths: list[Path]) -> list[FunctionMd | ClassMd | MethodMd]:
+        models = []
+        for path in paths:
+            functions, classes = self.__file_models.get(path, ([], []))
+            models.extend(functions + classes + [methodmd for classmd in classes for methodmd in classmd.methods])
+        return models
+
+    def __track_file(self, path: Path):
+        """
+        Registers a file found without walking the directory, next to the other files of its directory
+        """
+        stat = os.stat(path)
+        if path not in self.__fingerprints:
+            position = len(self.files_paths)
+            for index, other in enumerate(self.files_paths):
+                if other.parent == path.parent:
+                    position = index + 1
+            self.files_paths.insert(position, path)
+            self.symbols.add_path(path)
+            if self.lazy:
+                self.__loaded_files.add(path)
+        self.__fingerprints[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def __forget_file(self, path: Path) -> set[str]:
+        """
+        Removes the models and index entries of a file, returning the names it defined
+        """
+        _, names = self.__unregister_models(path)
+        self.symbols.remove_file(path, forget_path=True)
+        if self.lazy:
+            self.__loaded_files.discard(path)
+            names.update(self.__unindex_file(path))
+        return names
 
-    def __generate_files_path(self):
-        files = []
-        for path, items in self.directories.items():
-            for item in items:
-                abs_path = Path(os.path.join(path, item))
-                if abs_path.is_file() and abs_path.suffix == ".py":
-                    files.append(abs_path)
-        return files
+    def __unindex_file(self, path: Path) -> set[str]:
+        names = self.__indexed_names.pop(path, set())
+        for name in names:
+            self.definitions_index[name].remove(path)
+            if not self.definitions_index[name]:
+                del self.definitions_index[name]
+        return names
 
-    def __handle_list_of_models(self, model_list: list[FunctionMd]):
+    def __update_file(self, path: Path) -> set[str]:
         """
-        Centralization of the way to handle list of models inside the raw_map
+        Parses a new or modified file again and puts its models where a complete analysis would have them
+        Returns the names it defined before and after the change
         """
-        for model in model_list:
-            if model.location.name == "task.py":
-                return model
-        return model_list[0]
+        position, names = self.__unregister_models(path)
+        if self.lazy:
+            names.update(self.__unindex_file(path))
+            new_names = self.__index_file(path)
+            for name in new_names:
+                self.definitions_index.setdefault(name, []).append(path)
+            names.update(new_names)
+            # Only files that a query already reached have to be loaded again
+            if path not in self.__loaded_files and self.__expanded_names.isdisjoint(new_names):
+                return names
+            self.__loaded_files.add(path)
+        elif position is None:
+            position = self.__models_position(path)
+        functions, classes, import_map = self.__parse_file(path)
+        self.__register_models(path, functions, classes, import_map, position)
+        names.update(model.name for model in self.__models_of([path]))
+        if self.lazy:
+            # Calls the new models make may lead to files that weren't needed before
+            for model in functions + classes:
+                for call_name in model.calls:
+                    self.__load_reachable(call_name)
+        return names
 
-    def __adjust_call(self, call: FunctionMd | ClassMd | MethodMd | UnknownFuncMd | list):
+    def __models_position(self, path: Path) -> int:
         """
-        Adjusts the call gathered from the raw_map, doing all necessary checks
-        If no adjustments are necessary, returns the same call
+        Returns the position in models_list where the models of a new file go, following the order of files_paths
         """
-        if isinstance(call, ClassMd):
-            for method in call.methods:
-                if method.name == "__init__":
-                    return method
-            # If it's a class, but doesn't have a init method, simply skip
+        for next_path in self.files_paths[self.files_paths.index(path) + 1 :]:
+            functions, classes = self.__file_models.get(next_path, ([], []))
+            if functions or classes:
+                return self.models_list.index((functions + classes)[0])
+        return len(self.models_list)
+
+    def watch(self, interval: float = 1.0, on_change: Callable[[dict], None] | None = None, stop=None):
+        """
+        Keeps the Analyzer up to date with its directory, calling refresh every interval seconds until stop is set
+        Can be run in a thread of its own, as long as queries aren't made while a refresh is happening
+        Args:
+        - interval(float): seconds between each check of the directory
+        - on_change(Callable | None): called with the output of refresh whenever something changed
+        - stop(threading.Event | None): event that ends the watch, runs forever if not given
+        """
+        stop = stop if stop is not None else threading.Event()
+        while not stop.wait(interval):
+            changes = self.refresh()
+            if on_change is not None and (changes["added"] or changes["modified"] or changes["deleted"]):
+                on_change(changes)
+
+    def cache_stats(self) -> dict | None:
+        """
+        Returns the hits and misses of the parse cache, or None if the Analyzer has no cache
+        """
+        if self.cache is None:
             return None
-        if isinstance(call, list):
-            # TODO: do some handling to get the ideal call. As a placeholder we're returning the first one
-            return self.__handle_list_of_models(call)
-        else:
-            return call
+        return self.cache.stats()
+
+    @property
+    def call_graph(self) -> CallGraph:
+        """
+        Integer-indexed graph of the resolved calls between models, built on first use
+        """
+        if self.__call_graph is None:
+            if self.external_depth:
+                with self.instrumentation.phase("externals"):
+                    self.__load_externals()
+            with self.instrumentation.phase("call_graph"):
+                self.__call_graph = CallGraph(self.raw_map, self.models_list + self.external_models, self.symbols)
+        return self.__call_graph
+
+    def __load_externals(self):
+        """
+        Parses the installed modules that calls reach, up to external_depth calls away from the directory
+        Their models are kept apart from the ones of the directory, so they are never taken for them by name
+        """
+        if self.__externals is None:
+            self.__externals = ExternalIndex(cache_dir=self.__external_cache_dir)
+        callers = self.models_list
+        for _ in range(self.external_depth):
+            # Loading a module may show that the name is defined in yet another one, Ex: a package re-exporting it
+            for _ in range(self.symbols.max_chain):
+                outside = {found.name for found in self.__resolve_calls(callers) if isinstance(found, External)}
+                if not any([self.__load_external(name) for name in sorted(outside)]):
+                    break
+            callers = [
+                found
+                for found in dict.fromkeys(self.__resolve_calls(callers))
+                if isinstance(found, FunctionMd) and self.symbols.is_external(found)
+            ]
+
+    def __resolve_calls(self, models: list):
+        for model in models:
+            for position in range(len(model.calls)):
+                yield self.symbols.resolve(model, position)
 
-    def create_calls_map(self, call_name: str, show_unknowns: bool = False) -> dict:
+    def __load_external(self, name: str) -> bool:
+        """
+        Parses the installed module that a qualified name leads to, returns if a new one was loaded
+        """
+        found = self.__externals.find_module(name)
+        if found is None:
+            return False
+        module, path = found
+        if path in self.__external_files or path in self.__external_failed:
+            return False
+        models = self.__externals.load(path)
+        if models is None:
+            self.__external_failed.add(path)
+            return False
+        self.__add_external(path, module, *models)
+        self.instrumentation.count("external_files")
+        return True
+
+    def __add_external(
+        self, path: Path, module: str, functions: list[FunctionMd], classes: list[ClassMd], import_map: ImportMap
+    ):
+        self.__external_files[path] = (module, functions, classes, import_map)
+        self.symbols.add_file(path, functions, classes, import_map, external_module=module)
+        for model in functions + classes:
+            self.external_models.append(model)
+            if isinstance(model, ClassMd):
+                self.external_models.extend(model.methods)
+
+    def create_calls_map(
+        self,
+        call_name: str,
+        show_unknowns: bool = False,
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+    ) -> CallsMap:
         """
         Creates map of function objects based on information from Analyzer.
         Receives call from inside the Analyzed directory.
         Args:
         - call_name(str): name of the call that you want to map
         - show_unknowns(bool): sets if calls of unknown source should be tracked
+        - max_depth(int | None): calls deeper than this are left out of the map, the call itself has depth 0
+        - max_nodes(int | None): maximum number of calls visited while mapping
+        - timeout(float | None): seconds the mapping may take
 
         Returns a dictionary with this structure:
         {<FunctionMd function>: {<FunctionMd call1>: {<ClassMd 'Cls'>: {}}, <ClassMd call2>: {}}}
+        If any of the limits was reached, what was mapped until then is returned with its truncated attribute set
         """
-        app_map = {}
-        calls_used = []
-        if call_name not in self.raw_map.keys():
-            raise IndexError("call name not present in raw map")
+        if self.lazy:
+            self.__load_reachable(call_name)
+        graph = self.call_graph
+        root = graph.root(call_name)
+        counters = {}
+        start = time.perf_counter()
+        with self.instrumentation.phase("traversal"):
+            calls_map = graph.calls_map(root, show_unknowns, counters, max_depth, max_nodes, timeout)
+        if calls_map.truncated:
+            self.instrumentation.count("truncated_queries")
+        self.instrumentation.query(call_name, counters["nodes"], counters["edges"], time.perf_counter() - start)
+        return calls_map
+
+    def iter_calls(
+        self,
+        call_name: str,
+        show_unknowns: bool = False,
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        events: bool = False,
+    ) -> Iterator[tuple]:
+        """
+        Yields the calls reachable from a call as they are visited, without creating the map of create_calls_map
+        Only the path being walked is kept in memory, and the walk stops as soon as the consumer does
+        Args:
+        - call_name(str): name of the call that you want to map
+        - show_unknowns(bool): sets if calls of unknown source should be tracked
+        - max_depth(int | None): calls deeper than this are left out, the call itself has depth 0
+        - max_nodes(int | None): maximum number of calls visited
+        - timeout(float | None): seconds the walk may take
+        - events(bool): sets if enter and exit events are yielded instead of edges
+
+        Yields (caller, callee, depth) edges, with None as the caller of the call itself,
+        or (kind, caller, callee, depth) events if events is set, see CallGraph.iter_events
+        """
+        if self.lazy:
+            self.__load_reachable(call_name)
+        graph = self.call_graph
+        root = graph.root(call_name)
+        return self.__walk(graph, call_name, root, show_unknowns, max_depth, max_nodes, timeout, events=events)
+
+    def __walk(self, graph: CallGraph, call_name: str, root: int, show_unknowns: bool, *budgets, events: bool):
+        counters = {}
+        start = time.perf_counter()
+        try:
+            for kind, caller, callee, depth in graph.iter_events(root, show_unknowns, *budgets, events, counters):
+                yield (kind, caller, callee, depth) if events else (caller, callee, depth)
+        finally:
+            if counters.get("truncated"):
+                self.instrumentation.count("truncated_queries")
+            nodes, edges = counters.get("nodes", 0), counters.get("edges", 0)
+            self.instrumentation.query(call_name, nodes, edges, time.perf_counter() - start)
+
+    def call_subgraph(self, call_name: str, show_unknowns: bool = False) -> CallSubgraph:
+        """
+        Returns every model reachable from a call and the calls between them, as flat sets
+        Expanded subgraphs are cached, so queries that reach the same helpers share the work
+        Args:
+        - call_name(str): name of the call that you want to map
+        - show_unknowns(bool): sets if calls of unknown source should be tracked
+        """
+        if self.lazy:
+            self.__load_reachable(call_name)
+        graph = self.call_graph
+        with self.instrumentation.phase("subgraph"):
+            return self.subgraph_cache.subgraph(graph, graph.root(call_name), show_unknowns)
+
+    def callers(self, call_name: str, depth: int | None = None) -> dict:
+        """
+        Returns the models that call a name, directly or through other calls, with the number of calls in between
+        Every model with that name is looked for, unless the name is qualified, Ex: "pkg.mod.func"
+        Args:
+        - call_name(str): name of the call whose callers are wanted
+        - depth(int | None): callers farther than this are left out, 1 keeps only the direct ones
+
+        Returns a dictionary of {model: distance}, closest first, with the models of the name at distance 0
+        """
+        self.load_all()
+        graph = self.call_graph
+        if call_name in self.symbols.definitions:
+            models = [self.symbols.definitions[call_name]]
+        elif call_name in self.raw_map:
+            models = self.raw_map[call_name]
+            models = models if isinstance(models, list) else [models]
         else:
-            call = self.raw_map[call_name]
-            if isinstance(call, list):
-                call = self.__handle_list_of_models(call)
-
-        def internal_func(self: Analyzer, call, app_map: dict):
-            nonlocal calls_used
-            calls_used.append(call)
-            call = self.__adjust_call(call)
-            if call not in app_map.keys():
-                app_map[call] = {}
-            if call is None:
-                return app_map
-            for subcall_name in call.calls:
-                if subcall_name not in self.raw_map.keys():
-                    if show_unknowns:
-                        subcall = UnknownFuncMd(subcall_name)
-                    else:
-                        continue
-                else:
-                    subcall = self.raw_map[subcall_name]
-                    subcall = self.__adjust_call(subcall)
-                    if subcall is None or subcall in calls_used[:-3]:
-                        continue
-                # Removed when realized it's unnecessary logic, will do some auditing before deleting completely
-                # app_map[call].update({subcall: {}})
-                internal_func(self, subcall, app_map[call])
-            return app_map
-
-        return internal_func(self, call, app_map)
-
-    def create_diagram(self, call_name: str, show_unknown: bool = False, path: str | Path | None = None):
+            raise IndexError("call name not present in raw map")
+        with self.instrumentation.phase("callers"):
+            depths = graph.callers([graph.ids[model] for model in models], depth)
+        return {graph.models[symbol]: distance for symbol, distance in depths.items()}
+
+    def impacted_by(self, files: Iterable[str | Path], depth: int | None = None) -> dict:
+        """
+        Returns the models that may behave differently when the given files change:
+        the ones defined in them and every model that calls those, directly or through other calls
+        Args:
+        - files(Iterable[str | Path]): changed files, relative paths are taken from the analyzed directory
+        - depth(int | None): callers farther than this are left out
+
+        Returns a dictionary of {model: distance}, closest first, with the models of the files at distance 0
+        Raises IndexError if any of the files wasn't analyzed, Ex: a path outside of the directory
+        """
+        self.load_all()
+        paths = [Path(os.path.abspath(os.path.join(self.path, path))) for path in files]
+        missing = [str(path) for path in paths if path not in self.__fingerprints]
+        if missing:
+            raise IndexError(f"files not present in the analysis: {', '.join(missing)}")
+        graph = self.call_graph
+        symbols = [graph.ids[model] for model in self.__models_of(paths)]
+        with self.instrumentation.phase("callers"):
+            depths = graph.callers(symbols, depth)
+        return {graph.models[symbol]: distance for symbol, distance in depths.items()}
+
+    def metrics(self) -> GraphMetrics:
+        """
+        Returns the metrics of the whole call graph: fan-in and fan-out of each model, cycles of calls,
+        what each entry point reaches and the most central helpers, see GraphMetrics
+        """
+        self.load_all()
+        return GraphMetrics(self.call_graph, self.symbols)
+
+    def subgraph_cache_stats(self) -> dict:
+        """
+        Returns the hits, misses, evictions and hit rate of the subgraph cache
+        """
+        return self.subgraph_cache.stats()
+
+    def create_diagram(
+        self,
+        call_name: str,
+        show_unknown: bool = False,
+        path: str | Path | None = None,
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+    ):
         """
         Creates the code for a mermaid diagram that maps the calls inside a repository
         Only needs the call name that should be mapped
@@ -170,10 +976,129 @@ class Analyzer:
         - call_name(str): name of the call that you want to map
         - show_unknowns(bool): sets if calls of unknown source should be tracked
         - path(str | Path | None): path for thecreation of the diagram file, if not given, returns the diagram as string
+        - max_depth(int | None): calls deeper than this are collapsed into a "… N more" node
+        - max_nodes(int | None): maximum number of nodes in the diagram, the mapping stops once it's reached
         """
-        cmap = self.create_calls_map(call_name, show_unknown)
-        diagram = Diagram(map=cmap, diagram_title=f"{call_name} workflow")
-        if path is None:
-            return diagram.diagram_code
-        else:
-            return diagram.create_diagram_file(path)
+        # The calls are rendered as they are visited, so the map is never held in memory. The walk goes one call
+        # past max_depth, so the direct calls that are left out can be counted, and stops with the writer at max_nodes
+        edges = self.iter_calls(call_name, show_unknown, max_depth + 1 if max_depth is not None else None)
+        diagram = Diagram(map=edges, diagram_title=f"{call_name} workflow", max_depth=max_depth, max_nodes=max_nodes)
+        with self.instrumentation.phase("rendering"):
+            if path is None:
+                return diagram.diagram_code
+            else:
+                return diagram.create_diagram_file(path)
+
+    def export_graph(
+        self,
+        level: str = "module",
+        format: str = "mermaid",
+        path: str | Path | None = None,
+        call_name: str | None = None,
+        show_unknowns: bool = False,
+    ):
+        """
+        Creates an overview of the calls with the models collapsed into classes, modules or packages
+        Each edge carries the number of calls it stands for
+        Args:
+        - level(str): "definition", "class", "module" or "package"
+        - format(str): "mermaid", "dot" or "json"
+        - path(str | Path | None): path for the creation of the file, if not given, returns the code as string
+        - call_name(str | None): only the models reachable from this call are kept, the whole directory if not given
+        - show_unknowns(bool): sets if calls of unknown source should be tracked
+        """
+        if call_name is None:
+            self.load_all()
+        elif self.lazy:
+            self.__load_reachable(call_name)
+        graph = self.call_graph
+        roots = [graph.root(call_name)] if call_name is not None else None
+        title = f"{call_name or self.symbols.root.name} {level} calls"
+        with self.instrumentation.phase("export"):
+            aggregated = AggregatedGraph.from_graph(graph, self.symbols, level, show_unknowns, roots)
+            if path is None:
+                return aggregated.export(format, title)
+            aggregated.write(path, format, title)
+
+    def create_diagrams(
+        self,
+        output_dir: str | Path,
+        call_names: list[str] | None = None,
+        predicate: Callable[[FunctionMd | ClassMd | MethodMd], bool] | None = None,
+        show_unknowns: bool = False,
+        workers: int = 8,
+        max_depth: int | None = None,
+        max_nodes: int | None = None,
+    ) -> dict:
+        """
+        Creates the mermaid diagrams of many calls at once, writing each to a file inside output_dir
+        An index.json file with the summary of the batch and the timings of each diagram is written along with them
+        Args:
+        - output_dir(str | Path): directory where the diagrams are written
+        - call_names(list[str] | None): names of the calls that should be mapped
+        - predicate(Callable | None): selects models to be mapped, Ex: lambda model: model.location.name == "task.py"
+        - show_unknowns(bool): sets if calls of unknown source should be tracked
+        - workers(int): number of threads writing the files
+        - max_depth(int | None): calls deeper than this are collapsed into a "… N more" node
+        - max_nodes(int | None): maximum number of nodes in each diagram, the calls left out are collapsed as well
+
+        Returns the summary that is written to index.json
+        """
+        if call_names is None and predicate is None:
+            raise ValueError("either call_names or predicate should be given")
+        if self.lazy:
+            if predicate is not None:
+                self.load_all()
+            for call_name in call_names or []:
+                self.__load_reachable(call_name)
+        graph = self.call_graph
+        roots = [(call_name, graph.root(call_name)) for call_name in call_names or []]
+        if predicate is not None:
+            roots.extend((node_label(model), graph.ids[model]) for model in self.models_list if predicate(model))
+        with self.instrumentation.phase("diagram_batch"):
+            return create_diagrams(graph, roots, output_dir, show_unknowns, workers, max_depth, max_nodes)
+
+    def stats(self) -> dict:
+        """
+        Returns the timings and counters of the analysis so far:
+        - phases: seconds spent and times entered in each phase
+        - files: discovered, parsed, loaded from the cache and bytes read
+        - slowest_files: files that took the longest to parse, with jobs > 1 these are measured inside the workers
+        - models: number of models built by type
+        - raw_map: number of names and of names shared by more than one model
+        - queries: nodes and edges visited by the latest create_calls_map calls, along with the totals
+        """
+        report = self.instrumentation.to_dict()
+        counters = report["counters"]
+        collisions = [models for models in self.raw_map.values() if isinstance(models, list)]
+        return {
+            "phases": report["phases"],
+            "files": {
+                "discovered": len(self.files_paths),
+                "parsed": counters.get("files_parsed", 0),
+                "from_cache": counters.get("files_from_cache", 0),
+                "bytes_read": counters.get("bytes_read", 0) + counters.get("bytes_indexed", 0),
+            },
+            "slowest_files": report["slowest_files"],
+            "models": {kind: counters.get(kind, 0) for kind in ("functions", "classes", "methods")},
+            "raw_map": {
+                "names": len(self.raw_map),
+                "collisions": len(collisions),
+                "colliding_models": sum(len(models) for models in collisions),
+            },
+            "queries": {
+                "count": counters.get("queries", 0),
+                "nodes_visited": counters.get("nodes_visited", 0),
+                "edges_visited": counters.get("edges_visited", 0),
+                "latest": report["queries"],
+            },
+            "parse_cache": self.cache_stats(),
+            "subgraph_cache": self.subgraph_cache_stats(),
+        }
+
+    def dump_stats(self, path: str | Path):
+        """
+        Writes the output of stats to a JSON file
+        """
+        with open(path, "w") as file:
+            json.dump(self.stats(), file, indent=2)
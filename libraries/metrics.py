@@ -0,0 +1,323 @@
+import csv
+import json
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from libraries.call_graph import CallGraph
+from libraries.diagram_maker import node_label
+from libraries.symbol_table import SymbolTable
+
+# Columns of the CSV report, one row per definition
+CSV_FIELDS = [
+    "name",
+    "file",
+    "line",
+    "fan_in",
+    "fan_out",
+    "unknown_calls",
+    "component",
+    "recursive",
+    "entry_point",
+    "reachable",
+    "pagerank",
+]
+
+
+def call_arrays(graph: CallGraph) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Every call of graph as two arrays of the same length, the ids of the callers and of the callees
+    Calls of unknown source are included, with their ids starting at len(graph.models)
+    """
+    offsets = np.frombuffer(graph.offsets, dtype=f"i{graph.offsets.itemsize}").astype(np.int64)
+    targets = np.frombuffer(graph.targets, dtype=f"i{graph.targets.itemsize}").astype(np.int64)
+    return np.repeat(np.arange(len(graph.models), dtype=np.int64), np.diff(offsets)), targets
+
+
+class GraphMetrics:
+    """
+    Metrics of the whole call graph of an Analyzer, computed over numpy arrays instead of one map per model
+    The calls between models are kept once per (caller, callee) pair, sorted by caller, CSR-style like in CallGraph
+    Every metric is computed on first use, in time linear to the graph except for reachable,
+    which propagates the entry points in blocks of bits
+    Classes take no part in the calls, as calling them leads to their __init__
+    Args:
+    - graph(CallGraph): graph of the analysis
+    - symbols(SymbolTable | None): used to name definitions by qualified name, Ex: "pkg.mod.Class.method"
+    """
+
+    # Entry points propagated at once while counting what they reach, a multiple of 64
+    block_bits = 512
+    damping = 0.85
+    max_iterations = 100
+    tolerance = 1e-10
+
+    def __init__(self, graph: CallGraph, symbols: SymbolTable | None = None) -> None:
+        self.graph = graph
+        self.symbols = symbols
+        size = len(graph.models)
+        self.size = size
+        sources, targets = call_arrays(graph)
+        known = targets < size
+        self.unknown_calls = np.bincount(sources[~known], minlength=size)
+        pairs = np.unique(sources[known] * size + targets[known])
+        self.sources = pairs // size
+        self.targets = pairs % size
+        self.offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=size), out=self.offsets[1:])
+        canonical = np.frombuffer(graph.canonical, dtype=f"i{graph.canonical.itemsize}")
+        # Models whose own calls are mapped, which leaves classes out
+        self.callable = canonical == np.arange(size)
+
+    @cached_property
+    def fan_in(self) -> np.ndarray:
+        """
+        Number of distinct models calling each model
+        """
+        return np.bincount(self.targets, minlength=self.size)
+
+    @cached_property
+    def fan_out(self) -> np.ndarray:
+        """
+        Number of distinct models called by each model, calls of unknown source are counted in unknown_calls
+        """
+        return np.diff(self.offsets)
+
+    @cached_property
+    def components(self) -> np.ndarray:
+        """
+        Strongly connected component of each model, found with an iterative version of Tarjan's algorithm
+        Components are numbered so that a call between two of them always goes to the lower number
+        """
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        index = [-1] * self.size
+        low = [0] * self.size
+        on_stack = [False] * self.size
+        component = [-1] * self.size
+        stack = []
+        counter = 0
+        count = 0
+        for start in range(self.size):
+            if index[start] != -1:
+                continue
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = True
+            # Each frame is a model and the position of the next call of it to look at
+            frames = [(start, offsets[start])]
+            while frames:
+                symbol, position = frames[-1]
+                end = offsets[symbol + 1]
+                while position < end:
+                    target = targets[position]
+                    position += 1
+                    if index[target] == -1:
+                        break
+                    if on_stack[target] and index[target] < low[symbol]:
+                        low[symbol] = index[target]
+                else:
+                    frames.pop()
+                    if low[symbol] == index[symbol]:
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            component[member] = count
+                            if member == symbol:
+                                break
+                        count += 1
+                    if frames:
+                        caller = frames[-1][0]
+                        low[caller] = min(low[caller], low[symbol])
+                    continue
+                frames[-1] = (symbol, position)
+                index[target] = low[target] = counter
+                counter += 1
+                stack.append(target)
+                on_stack[target] = True
+                frames.append((target, offsets[target]))
+        return np.array(component, dtype=np.int64)
+
+    @cached_property
+    def recursive(self) -> np.ndarray:
+        """
+        Whether each model is part of a cycle of calls, Ex: a function calling itself
+        """
+        sizes = np.bincount(self.components)
+        recursive = sizes[self.components] > 1
+        recursive[self.sources[self.sources == self.targets]] = True
+        return recursive
+
+    def cycles(self) -> list[list[int]]:
+        """
+        Ids of the models of each cycle of calls, largest first
+        """
+        members = np.flatnonzero(self.recursive)
+        order = np.argsort(self.components[members], kind="stable")
+        members = members[order]
+        groups = np.split(members, np.flatnonzero(np.diff(self.components[members])) + 1) if len(members) else []
+        return sorted((group.tolist() for group in groups), key=len, reverse=True)
+
+    @cached_property
+    def entry_points(self) -> np.ndarray:
+        """
+        Ids of the models that aren't called by any other model, Ex: scripts, tasks and tests
+        """
+        return np.flatnonzero(self.callable & (self.fan_in == 0))
+
+    @cached_property
+    def reachable(self) -> np.ndarray:
+        """
+        Number of models reachable from each entry point, itself included, in the order of entry_points
+        Each block of entry points is a row of bits per component, ORed along the calls between components
+        one level of the condensed graph at a time, so each level is a single vectorized operation
+        """
+        entries = self.components[self.entry_points]
+        reachable = np.zeros(len(entries), dtype=np.int64)
+        if not len(entries):
+            return reachable
+        components = self.components
+        count = int(components.max()) + 1
+        sizes = np.bincount(components, minlength=count)
+        pairs = np.unique(components[self.sources] * count + components[self.targets])
+        callers = pairs // count
+        callees = pairs % count
+        between = callers != callees
+        callers, callees = callers[between], callees[between]
+        # Longest path from a component without callers, callers always have higher numbers than their callees
+        levels = [0] * count
+        order = np.argsort(-callers, kind="stable")
+        for caller, callee in zip(callers[order].tolist(), callees[order].tolist()):
+            if levels[caller] + 1 > levels[callee]:
+                levels[callee] = levels[caller] + 1
+        levels = np.array(levels, dtype=np.int64)
+        edge_levels = levels[callers]
+        order = np.argsort(edge_levels, kind="stable")
+        callers, callees, edge_levels = callers[order], callees[order], edge_levels[order]
+        bounds = np.flatnonzero(np.diff(edge_levels)) + 1
+        steps = list(zip(np.split(callers, bounds), np.split(callees, bounds))) if len(callers) else []
+        words = self.block_bits // 64
+        for start in range(0, len(entries), self.block_bits):
+            block = entries[start : start + self.block_bits]
+            bits = np.zeros((count, words), dtype=np.uint64)
+            positions = np.arange(len(block))
+            np.bitwise_or.at(
+                bits, (block, positions // 64), np.left_shift(np.uint64(1), (positions % 64).astype(np.uint64))
+            )
+            for step_callers, step_callees in steps:
+                np.bitwise_or.at(bits, step_callees, bits[step_callers])
+            for row in range(0, count, 8192):
+                unpacked = np.unpackbits(bits[row : row + 8192].view(np.uint8), axis=1, bitorder="little")
+                reachable[start : start + len(block)] += (sizes[row : row + 8192] @ unpacked)[: len(block)]
+        return reachable
+
+    @cached_property
+    def pagerank(self) -> np.ndarray:
+        """
+        PageRank of each model over the calls, by power iteration, so helpers that central code calls rank highest
+        """
+        if not self.size:
+            return np.zeros(0)
+        fan_out = self.fan_out.astype(np.float64)
+        dangling = fan_out == 0
+        weights = np.divide(1.0, fan_out, out=np.zeros(self.size), where=~dangling)
+        rank = np.full(self.size, 1.0 / self.size)
+        for _ in range(self.max_iterations):
+            spread = np.bincount(self.targets, weights=(rank * weights)[self.sources], minlength=self.size)
+            updated = (1 - self.damping) / self.size + self.damping * (spread + rank[dangling].sum() / self.size)
+            converged = np.abs(updated - rank).sum() < self.tolerance
+            rank = updated
+            if converged:
+                break
+        return rank
+
+    def hotspots(self, top: int = 20) -> list[int]:
+        """
+        Ids of the top models by PageRank, leaving out the entry points
+        """
+        rank = np.where(self.callable & (self.fan_in > 0), self.pagerank, -1.0)
+        order = np.argsort(-rank, kind="stable")[:top]
+        return [symbol for symbol in order.tolist() if rank[symbol] >= 0]
+
+    def name(self, symbol: int) -> str:
+        model = self.graph.models[symbol]
+        qualified = self.symbols.qualified_name(model) if self.symbols is not None else None
+        return qualified or node_label(model)
+
+    def rows(self) -> list[dict]:
+        """
+        Metrics of each model that takes part in the calls, in the order of the models
+        """
+        reachable = dict(zip(self.entry_points.tolist(), self.reachable.tolist()))
+        columns = zip(
+            self.fan_in.tolist(),
+            self.fan_out.tolist(),
+            self.unknown_calls.tolist(),
+            self.components.tolist(),
+            self.recursive.tolist(),
+            self.pagerank.tolist(),
+        )
+        rows = []
+        for symbol, (fan_in, fan_out, unknown_calls, component, recursive, pagerank) in enumerate(columns):
+            if not self.callable[symbol]:
+                continue
+            model = self.graph.models[symbol]
+            rows.append(
+                {
+                    "name": self.name(symbol),
+                    "file": str(model.location),
+                    "line": model.lineno,
+                    "fan_in": fan_in,
+                    "fan_out": fan_out,
+                    "unknown_calls": unknown_calls,
+                    "component": component,
+                    "recursive": recursive,
+                    "entry_point": symbol in reachable,
+                    "reachable": reachable.get(symbol),
+                    "pagerank": pagerank,
+                }
+            )
+        return rows
+
+    def to_dict(self, top: int = 20) -> dict:
+        """
+        Summary of the metrics: totals, cycles, entry points by what they reach and the top hotspots
+        """
+        entry_points = sorted(
+            zip(self.entry_points.tolist(), self.reachable.tolist()), key=lambda entry: entry[1], reverse=True
+        )
+        return {
+            "models": int(self.callable.sum()),
+            "calls": len(self.sources),
+            "unknown_calls": int(self.unknown_calls.sum()),
+            "components": len(np.unique(self.components[self.callable])),
+            "cycles": [[self.name(symbol) for symbol in cycle] for cycle in self.cycles()],
+            "entry_points": [{"name": self.name(symbol), "reachable": count} for symbol, count in entry_points[:top]],
+            "hotspots": [
+                {
+                    "name": self.name(symbol),
+                    "pagerank": float(self.pagerank[symbol]),
+                    "fan_in": int(self.fan_in[symbol]),
+                    "fan_out": int(self.fan_out[symbol]),
+                }
+                for symbol in self.hotspots(top)
+            ],
+        }
+
+    def write_json(self, path: str | Path, top: int = 20):
+        """
+        Writes the summary of to_dict to a JSON file, along with the rows of every model
+        """
+        with open(path, "w") as file:
+            json.dump(dict(self.to_dict(top), definitions=self.rows()), file, indent=2)
+
+    def write_csv(self, path: str | Path):
+        """
+        Writes the rows of every model to a CSV file, with the columns of CSV_FIELDS
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows())
@@ -3,20 +3,16 @@ from __future__ import annotations
 import ast
 
 from libraries.models.exceptions import NonMethodError
+from libraries.models.extractor import DefinitionExtractor
 from libraries.models.function_def import FunctionMd
 
 
 class MethodMd(FunctionMd):
-    def __init__(self, source: FunctionMd, class_object: ClassMd, location=None) -> None:
-        super().__init__(source, location)
+    __slots__ = ("class_object", "attributes", "self_name")
+
+    def __init__(self, source: ast.FunctionDef, class_object: ClassMd, location=None) -> None:
         self.class_object = class_object
-        self.attributes = self.__get_attributes()
-        while "__init__" in self.calls:
-            calls_before = self.calls
-            self.__check_for_super_init()
-            calls_after = self.calls
-            if calls_before == calls_after:
-                break
+        super().__init__(source, location)
         if self.__is_static_method():
             self.self_name = None
         else:
@@ -25,55 +21,64 @@ class MethodMd(FunctionMd):
             except IndexError:
                 raise NonMethodError("Passed function doesn't have a first arg, make sure this is a Method definition")
 
+    def _apply_extraction(self, extraction: DefinitionExtractor):
+        super()._apply_extraction(extraction)
+        self.attributes = list(set(extraction.attributes))
+        self.__replace_super_init(extraction.super_init_calls)
+
     def __is_static_method(self):
         for decorator in self.source.decorator_list:
             if isinstance(decorator, ast.Name) and decorator.id == "staticmethod":
                 return True
         return False
 
-    def __check_for_super_init(self):
+    def __replace_super_init(self, super_init_calls: int):
         """
-        Checks for the existance of super().__init__() calls
-        Make sure to only call this function if an "__init__" value is present among captured calls
+        Replaces the "__init__" calls that come from super().__init__() with the parent class
+        The extraction counts them in the top level of the body, so that many captured "__init__" are replaced in order
         """
-        for node in ast.iter_child_nodes(self.source):
-            # calls_init = isinstance(node, ast.Expr) and isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Attribute) and node.value.func.attr == "__init__"
-            # calls_super = isinstance(node.value.func.value, ast.Call) and isinstance(node.value.func.value.func, ast.Name) and node.value.func.value.func.id == "super"
-            if (
-                isinstance(node, ast.Expr)
-                and isinstance(node.value, ast.Call)
-                and isinstance(node.value.func, ast.Attribute)
-                and node.value.func.attr == "__init__"
-                and isinstance(node.value.func.value, ast.Call)
-                and isinstance(node.value.func.value.func, ast.Name)
-                and node.value.func.value.func.id == "super"
-            ):
-                correct_place = self.calls.index("__init__")
-                parent_class = self.class_object.parents[0]
-                self.calls.remove("__init__")
-                self.calls.insert(correct_place, parent_class)
+        if not self.class_object.parents:
+            return
+        parent_class = self.class_object.parents[0]
+        for _ in range(super_init_calls):
+            if "__init__" not in self.calls:
+                break
+            position = self.calls.index("__init__")
+            self.calls[position] = parent_class.rsplit(".", 1)[-1]
+            self.call_paths[position] = parent_class
 
-    def __get_attributes(self):
-        attributes = []
-        for node in ast.iter_child_nodes(self.tree):
-            if isinstance(node, ast.Assign):
-                attributes.extend([target.attr for target in node.targets if isinstance(target, ast.Attribute)])
-        return list(set(attributes))
+    def to_record(self) -> dict:
+        record = super().to_record()
+        record["attributes"] = self.attributes
+        record["self_name"] = self.self_name
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict, class_object: ClassMd, location=None) -> MethodMd:
+        model = super().from_record(record, location)
+        model.class_object = class_object
+        model.attributes = list(record["attributes"])
+        model.self_name = record["self_name"]
+        return model
 
     def __repr__(self):
         return f"<{self.__class__.__name__} - {self.class_object.name}.{self.name}>"
 
 
 class ClassMd(FunctionMd):
+    __slots__ = ("parents", "methods", "attributes")
+
     def __init__(self, source: ast.ClassDef, location=None) -> None:
         super().__init__(source, location)
-        self.parents = [parent.id for parent in self.source.bases]
+        # As written in the source, Ex: "Base", "models.Base"
+        self.parents = [ast.unparse(parent) for parent in self.source.bases]
         self.methods = [MethodMd(item, self, location) for item in self.body if isinstance(item, ast.FunctionDef)]
         self.calls.extend(self.__get_method_calls())
+        self.call_paths.extend(path for method in self.methods for path in method.call_paths)
         self.attributes = self.__get_attributes()
 
     def __get_attributes(self):
-        attributes = self.vars
+        attributes = list(self.vars)
         for method in self.methods:
             attributes.extend([attribute for attribute in method.attributes])
         return list(set(attributes))
@@ -84,6 +89,26 @@ class ClassMd(FunctionMd):
             method_calls.extend([call for call in method.calls])
         return method_calls
 
+    def release_source(self):
+        super().release_source()
+        for method in self.methods:
+            method.release_source()
+
+    def to_record(self) -> dict:
+        record = super().to_record()
+        record["parents"] = self.parents
+        record["attributes"] = self.attributes
+        record["methods"] = [method.to_record() for method in self.methods]
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict, location=None) -> ClassMd:
+        model = super().from_record(record, location)
+        model.parents = list(record["parents"])
+        model.attributes = list(record["attributes"])
+        model.methods = [MethodMd.from_record(method, model, location) for method in record["methods"]]
+        return model
+
 
 if __name__ == "__main__":
     with open("/home/luiz/thoughtful_repos/support/mapper/libraries/module.py") as file:
@@ -1,2 +1,6 @@
 class NonMethodError(Exception):
     """Error to be raised if the value passed is not of a method definition"""
+
+
+class DefinitionNotFoundError(Exception):
+    """Error to be raised if a definition can't be found again in its source file"""
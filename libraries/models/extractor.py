@@ -0,0 +1,102 @@
+import ast
+
+
+def is_super_init_call(node: ast.Call) -> bool:
+    """
+    Checks if the call is a super().__init__() call
+    """
+    return (
+        isinstance(node.func, ast.Attribute)
+        and node.func.attr == "__init__"
+        and isinstance(node.func.value, ast.Call)
+        and isinstance(node.func.value.func, ast.Name)
+        and node.func.value.func.id == "super"
+    )
+
+
+def call_name(node: ast.Call) -> str | None:
+    """
+    Returns the dotted name of a call as written in the source, Ex: "self.b.open_available_browser"
+    Calls made over the result of an expression keep only the attribute part, Ex: super().__init__() -> ".__init__"
+    Returns None if the called object has no name at all, Ex: get_function()()
+    """
+    parts = []
+    func = node.func
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if isinstance(func, ast.Name):
+        parts.append(func.id)
+    elif parts:
+        parts.append("")
+    else:
+        return None
+    return ".".join(reversed(parts))
+
+
+class DefinitionExtractor(ast.NodeVisitor):
+    """
+    Collects everything a model needs from the body of a definition in a single traversal:
+    - calls: names of the calls made in statements or assignments, stepping into blocks of code
+    - call_paths: dotted name of each of those calls as written in the source, Ex: "self.b.open" for "open"
+    - vars: names assigned in the top level of the body
+    - attributes: attributes assigned in the top level of the body
+    - super_init_calls: number of super().__init__() calls in the top level of the body
+    Nested definitions are not stepped into, they have models of their own
+    """
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.call_paths = []
+        self.vars = []
+        self.attributes = []
+        self.super_init_calls = 0
+        self.depth = 0
+
+    @classmethod
+    def extract(cls, node: ast.FunctionDef | ast.ClassDef) -> "DefinitionExtractor":
+        extractor = cls()
+        for statement in node.body:
+            extractor.visit(statement)
+        return extractor
+
+    def __add_call(self, node: ast.Call):
+        # Methods
+        if isinstance(node.func, ast.Attribute):
+            self.calls.append(node.func.attr)
+            self.call_paths.append(call_name(node))
+        # Functions
+        elif isinstance(node.func, ast.Name):
+            self.calls.append(node.func.id)
+            self.call_paths.append(node.func.id)
+
+    # cold calls cases / Ex:call()
+    def visit_Expr(self, node: ast.Expr):
+        if isinstance(node.value, ast.Call):
+            self.__add_call(node.value)
+            if self.depth == 0 and is_super_init_call(node.value):
+                self.super_init_calls += 1
+
+    # assignment call cases / Ex: var = call()
+    def visit_Assign(self, node: ast.Assign):
+        if isinstance(node.value, ast.Call):
+            self.__add_call(node.value)
+        if self.depth == 0:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.vars.append(target.id)
+                elif isinstance(target, ast.Attribute):
+                    self.attributes.append(target.attr)
+
+    # blocks of code that need to be stepped into
+    def visit_block(self, node: ast.stmt):
+        self.depth += 1
+        for child in ast.iter_child_nodes(node):
+            self.visit(child)
+        self.depth -= 1
+
+    visit_For = visit_Try = visit_If = visit_While = visit_With = visit_block
+
+    def generic_visit(self, node: ast.AST):
+        # Any other node is a leaf for the extraction
+        pass
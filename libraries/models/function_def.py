@@ -1,72 +1,135 @@
 import ast
-import re
+import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Union
 
-from astunparse import unparse
+from libraries.models.exceptions import DefinitionNotFoundError
+from libraries.models.extractor import DefinitionExtractor
+
+
+@lru_cache(maxsize=32)
+def _parse_file(path: Path, mtime_ns: int) -> ast.Module:
+    """
+    Parses a file, memoized by path and modification time so that several
+    definitions of the same file can be reloaded with a single parse
+    """
+    with open(path) as file:
+        return ast.parse(file.read())
+
+
+def load_definition(location: Path, lineno: int, name: str) -> ast.FunctionDef | ast.ClassDef:
+    """
+    Re-parses the file in location and returns the definition node named name that starts at lineno
+    """
+    tree = _parse_file(location, os.stat(location).st_mtime_ns)
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.lineno == lineno and node.name == name:
+            return node
+    raise DefinitionNotFoundError(f"{name} not found at {location}:{lineno}")
 
 
 class FunctionMd:
+    __slots__ = (
+        "_source",
+        "name",
+        "lineno",
+        "end_lineno",
+        "location",
+        "arguments",
+        "docstring",
+        "vars",
+        "calls",
+        "call_paths",
+    )
+
     def __init__(self, source: ast.FunctionDef, location: Union[str, Path, None] = None) -> None:
-        self.source = source
+        self._source = source
         self.name = self.source.name
-        self.body = self.source.body
+        self.lineno = self.source.lineno
+        self.end_lineno = self.source.end_lineno
         if isinstance(location, str):
             location = Path(location)
         self.location = location
-        self.tree = ast.parse(source)
         self.arguments = self.__get_arguments()
-        self.docstring = self.__get_docstring()
-        self.vars = self.__get_variables()
-        self.calls = self.__get_calls()
+        self.docstring = ast.get_docstring(self.source)
+        self._apply_extraction(DefinitionExtractor.extract(self.source))
 
-    def __get_calls(self, tree=None):
-        if tree is None:
-            tree = self.tree
-        calls = []
+    def _apply_extraction(self, extraction: DefinitionExtractor):
+        """
+        Fills the model with the data collected from its body
+        Subclasses extend it to take what else they need from the same traversal
+        """
+        self.vars = extraction.vars
+        self.calls = extraction.calls
+        # Dotted name of each call, used to tell apart definitions with the same name
+        self.call_paths = extraction.call_paths
 
-        for node in ast.iter_child_nodes(tree):
-            # cold calls cases / Ex:call()
-            if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
-                # Methods
-                if isinstance(node.value.func, ast.Attribute):
-                    calls.append(node.value.func.attr)
-                # Functions
-                elif isinstance(node.value.func, ast.Name):
-                    calls.append(node.value.func.id)
-            # assignment call cases / Ex: var = call()
-            elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
-                # Methods
-                if isinstance(node.value.func, ast.Attribute):
-                    calls.append(node.value.func.attr)
-                # Functions
-                elif isinstance(node.value.func, ast.Name):
-                    calls.append(node.value.func.id)
-            # blocks of code that need to be stepped into
-            elif isinstance(node, (ast.For, ast.Try, ast.If, ast.While, ast.With)):
-                calls.extend(self.__get_calls(tree=node))
-        return calls
-
-    def __get_docstring(self):
-        first_item = self.source.body[0]
-        if isinstance(first_item, ast.Expr) and isinstance(first_item.value, ast.Str):
-            return re.sub(r"(\n|\\n)", "", unparse(first_item))
+    def __get_arguments(self):
+        if isinstance(self.source, ast.FunctionDef):
+            return [ast_arg.arg for ast_arg in self.source.args.args]
         return None
 
-    def __get_arguments(self):
-        first_iter_item = ast.iter_child_nodes(self.tree).__next__()
-        if isinstance(first_iter_item, ast.arguments):
-            ast_args = first_iter_item.args
-            return [ast_arg.arg for ast_arg in ast_args]
-        else:
-            return None
-
-    def __get_variables(self):
-        variables = []
-        for node in ast.iter_child_nodes(self.tree):
-            if isinstance(node, ast.Assign):
-                variables.extend([target.id for target in node.targets if isinstance(target, ast.Name)])
-        return variables
+    @property
+    def source(self) -> ast.FunctionDef:
+        """
+        AST node of the definition
+        Models rebuilt from a record don't carry it, so it's loaded again from location when needed
+        """
+        if self._source is None:
+            self._source = load_definition(self.location, self.lineno, self.name)
+        return self._source
+
+    def release_source(self):
+        """
+        Drops the AST of the definition, keeping only what was extracted from it
+        It's loaded again from location when needed, so models without a location keep it
+        """
+        if self.location is not None:
+            self._source = None
+
+    @property
+    def body(self) -> list[ast.stmt]:
+        return self.source.body
+
+    @property
+    def tree(self) -> ast.FunctionDef:
+        return self.source
+
+    def to_record(self) -> dict:
+        """
+        Returns the extracted data of the model as a dictionary of plain values
+        """
+        return {
+            "name": self.name,
+            "lineno": self.lineno,
+            "end_lineno": self.end_lineno,
+            "arguments": self.arguments,
+            "docstring": self.docstring,
+            "vars": self.vars,
+            "calls": self.calls,
+            "call_paths": self.call_paths,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict, location: Union[str, Path, None] = None):
+        """
+        Rebuilds a model from the output of to_record, without parsing any source
+        """
+        model = cls.__new__(cls)
+        model._source = None
+        if isinstance(location, str):
+            location = Path(location)
+        model.location = location
+        model.name = record["name"]
+        model.lineno = record["lineno"]
+        model.end_lineno = record["end_lineno"]
+        model.arguments = record["arguments"]
+        model.docstring = record["docstring"]
+        model.vars = list(record["vars"])
+        model.calls = list(record["calls"])
+        model.call_paths = list(record["call_paths"])
+        return model
 
     def __repr__(self):
         return f"<{self.__class__.__name__} - {self.name}>"
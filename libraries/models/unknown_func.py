@@ -2,6 +2,8 @@ class UnknownFuncMd:
     """
     Function model to be used when the functions source is not known
     """
+
+    __slots__ = ("name",)
     calls = []
 
     def __init__(self, name) -> None:
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from libraries import __version__
+
+
+class ParseCache:
+    """
+    On-disk cache of the models extracted from each file of an analyzed directory
+    Entries are keyed by the absolute path of the file and hold its fingerprint (mtime, size and content hash)
+    An entry is only used if the fingerprint still matches and it was written by the same analyzer version
+    """
+
+    def __init__(self, cache_dir: str | Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        return hashlib.sha1(content).hexdigest()
+
+    def __entry_path(self, path: Path) -> Path:
+        key = hashlib.sha1(str(Path(path).resolve()).encode()).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def __read_entry(self, path: Path) -> dict | None:
+        try:
+            with open(self.__entry_path(path)) as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != __version__ or entry.get("path") != str(Path(path).resolve()):
+            return None
+        return entry
+
+    def __write_entry(self, path: Path, entry: dict):
+        entry_path = self.__entry_path(path)
+        # Written to a temporary file first, so a reader never sees half of an entry
+        temporary_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary_path, "w") as file:
+            json.dump(entry, file)
+        os.replace(temporary_path, entry_path)
+
+    def load(self, path: Path) -> dict | None:
+        """
+        Returns the record stored for the file in path, or None if there's no valid entry for it
+        Only reads the file if its mtime or size changed, to compare the content hash
+        """
+        entry = self.__read_entry(path)
+        if entry is None:
+            self.misses += 1
+            return None
+        stat = os.stat(path)
+        if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.hits += 1
+            return entry["record"]
+        with open(path, "rb") as file:
+            content_hash = self.content_hash(file.read())
+        if entry["hash"] != content_hash:
+            self.misses += 1
+            return None
+        # File was touched but not changed, refreshes the entry so the next lookup skips the hashing
+        entry["mtime_ns"] = stat.st_mtime_ns
+        entry["size"] = stat.st_size
+        self.__write_entry(path, entry)
+        self.hits += 1
+        return entry["record"]
+
+    def store(self, path: Path, record: dict, fingerprint: tuple[int, int, str]):
+        """
+        Stores the record extracted from the file in path, along with the (mtime, size, content hash) of the content
+        it was extracted from, Ex: Parser.fingerprint. The file isn't read again, since it may have changed meanwhile
+        """
+        mtime_ns, size, content_hash = fingerprint
+        entry = {
+            "version": __version__,
+            "path": str(Path(path).resolve()),
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "hash": content_hash,
+            "record": record,
+        }
+        self.__write_entry(path, entry)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        for entry_path in self.cache_dir.glob("*.json"):
+            entry_path.unlink()
+        self.hits = 0
+        self.misses = 0
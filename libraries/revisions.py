@@ -0,0 +1,110 @@
+import os
+import subprocess
+from pathlib import Path
+
+from libraries.call_graph import CallGraph
+
+
+class GitError(Exception):
+    pass
+
+
+def git(repository: str | Path, *args: str) -> str:
+    """
+    Runs a git command inside repository and returns its output
+    """
+    try:
+        process = subprocess.run(
+            ["git", "-C", str(repository), *args], capture_output=True, text=True, check=False, encoding="utf-8"
+        )
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    if process.returncode != 0:
+        raise GitError(process.stderr.strip() or f"git {' '.join(args)} failed")
+    return process.stdout
+
+
+def changed_files(repository: str | Path, base: str, head: str | None = None) -> dict[str, list[Path]]:
+    """
+    Asks git for the python files added, modified and deleted between two revisions
+    Renamed files are taken as deleted and added, since their modules change
+    Args:
+    - repository(str | Path): any directory inside the repository
+    - base(str): revision the changes start from, Ex: "main", "HEAD~3"
+    - head(str | None): revision they end at, the working tree if not given
+
+    Returns absolute paths, by "added", "modified" and "deleted"
+    """
+    top_level = Path(git(repository, "rev-parse", "--show-toplevel").strip())
+    revisions = [base] if head is None else [base, head]
+    output = git(repository, "diff", "--name-status", "--no-renames", "-z", *revisions, "--", "*.py")
+    changes = {"added": [], "modified": [], "deleted": []}
+    fields = output.split("\0")
+    for status, path in zip(fields[0::2], fields[1::2]):
+        path = Path(os.path.abspath(top_level / path))
+        if status == "A":
+            changes["added"].append(path)
+        elif status == "D":
+            changes["deleted"].append(path)
+        else:
+            changes["modified"].append(path)
+    return changes
+
+
+def check_head(repository: str | Path, head: str):
+    """
+    Makes sure the working tree is checked out at head, since the files are read from it
+    """
+    expected = git(repository, "rev-parse", "--verify", f"{head}^{{commit}}").strip()
+    current = git(repository, "rev-parse", "--verify", "HEAD^{commit}").strip()
+    if expected != current:
+        raise GitError(f"the working tree is at {current[:12]}, {head} ({expected[:12]}) should be checked out")
+
+
+def caller_edges(graph: CallGraph, models, label) -> dict[str, set[str]]:
+    """
+    Returns the calls that each of models makes in graph, by the label of the caller and of the callee
+    Calls of unknown source are labelled as "?name"
+    """
+    models_count = len(graph.models)
+    edges = {}
+    for model in models:
+        symbol = graph.ids.get(model)
+        if symbol is None:
+            continue
+        callees = edges.setdefault(label(model), set())
+        for target in graph.callees(symbol):
+            if target < models_count:
+                callees.add(label(graph.models[target]))
+            else:
+                callees.add(f"?{graph.unknown_names[target - models_count]}")
+    return edges
+
+
+def entry_points(graph: CallGraph, model, label, cache: dict) -> list[str]:
+    """
+    Returns the labels of the models that reach model in graph without being called by anything themselves
+    """
+    symbol = graph.ids.get(model)
+    if symbol is None:
+        return []
+    if (graph, symbol) not in cache:
+        offsets, _ = graph.reverse
+        cache[(graph, symbol)] = sorted(
+            label(graph.models[caller]) for caller in graph.callers([symbol]) if offsets[caller] == offsets[caller + 1]
+        )
+    return cache[(graph, symbol)]
+
+
+def graph_diff(old_edges: dict[str, set[str]], new_edges: dict[str, set[str]]) -> tuple[list, list]:
+    """
+    Returns the (caller, callee) calls added and removed between two outputs of caller_edges
+    """
+    added = []
+    removed = []
+    for caller in sorted(old_edges.keys() | new_edges.keys()):
+        old = old_edges.get(caller, set())
+        new = new_edges.get(caller, set())
+        added.extend([caller, callee] for callee in sorted(new - old))
+        removed.extend([caller, callee] for callee in sorted(old - new))
+    return added, removed
@@ -0,0 +1,192 @@
+import ast
+import json
+from collections import deque
+from pathlib import Path
+from typing import Iterable
+
+from libraries.models.class_def import ClassMd, MethodMd
+from libraries.models.function_def import FunctionMd
+
+
+class Rule:
+    """
+    Pattern of calls to be looked for in the body of every model
+    A rule with a single call matches wherever that call is made, one with many calls matches when they are made
+    by consecutive statements of the same block, Ex: ["set_window_size", "maximize_browser_window"]
+    Calls are matched by the name of the function or method, so "b.quit()" and "quit()" are both "quit"
+    Args:
+    - name(str): identifier of the rule, used in the findings
+    - calls(list[str]): names of the calls, in the order they should be made
+    - message(str): description of what was found
+    """
+
+    def __init__(self, name: str, calls: list[str], message: str = "") -> None:
+        if not calls:
+            raise ValueError(f"rule {name} has no calls")
+        self.name = name
+        self.calls = list(calls)
+        self.message = message
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} - {self.name}: {' -> '.join(self.calls)}>"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rule":
+        """
+        Creates a rule from a dictionary like {"name": "...", "calls": ["..."], "message": "..."}
+        A single call can also be given as {"call": "..."}
+        """
+        calls = data["calls"] if "calls" in data else [data["call"]]
+        return cls(data["name"], calls, data.get("message", ""))
+
+
+MAX_BROWSER_BUG = Rule(
+    "max-browser-bug",
+    ["set_window_size", "maximize_browser_window"],
+    "the window size is overwritten by maximizing the browser right after setting it",
+)
+
+
+def load_rules(path: str | Path) -> list["Rule"]:
+    """
+    Reads a JSON file with a list of rules in the format of Rule.from_dict
+    """
+    with open(path) as file:
+        return [Rule.from_dict(data) for data in json.load(file)]
+
+
+class Finding:
+    def __init__(self, rule: Rule, model: FunctionMd | ClassMd | MethodMd, lineno: int) -> None:
+        self.rule = rule
+        self.model = model
+        # Line of the last call of the pattern
+        self.lineno = lineno
+
+    @property
+    def location(self) -> Path:
+        return self.model.location
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} - {self.rule.name} at {self.location}:{self.lineno}>"
+
+    def to_dict(self) -> dict:
+        return {
+            "rule": self.rule.name,
+            "message": self.rule.message,
+            "file": str(self.location),
+            "line": self.lineno,
+            "model": self.model.name,
+        }
+
+
+def statement_call(statement: ast.stmt) -> str | None:
+    """
+    Returns the name of the call made by a statement that is only a call, or an assignment or return of one
+    Ex: "b.quit()", "x = get()", "return build()". Returns None for any other statement
+    """
+    if not isinstance(statement, (ast.Expr, ast.Assign, ast.AnnAssign, ast.AugAssign, ast.Return)):
+        return None
+    value = statement.value
+    if isinstance(value, ast.Await):
+        value = value.value
+    if not isinstance(value, ast.Call):
+        return None
+    if isinstance(value.func, ast.Attribute):
+        return value.func.attr
+    if isinstance(value.func, ast.Name):
+        return value.func.id
+    return None
+
+
+def nested_blocks(statement: ast.stmt) -> list[list[ast.stmt]]:
+    """
+    Returns the blocks of statements inside a compound statement, in the order they appear
+    Definitions are left out, they are not part of the body that contains them
+    """
+    if isinstance(statement, (ast.For, ast.AsyncFor, ast.While, ast.If)):
+        return [statement.body, statement.orelse]
+    if isinstance(statement, (ast.With, ast.AsyncWith)):
+        return [statement.body]
+    if isinstance(statement, (ast.Try, ast.TryStar)):
+        return (
+            [statement.body]
+            + [handler.body for handler in statement.handlers]
+            + [statement.orelse, statement.finalbody]
+        )
+    if isinstance(statement, ast.Match):
+        return [case.body for case in statement.cases]
+    return []
+
+
+class RuleEngine:
+    """
+    Checks many rules at once. Every rule is compiled into a single Aho-Corasick automaton over call names,
+    so each statement of a model is looked at once, no matter how many rules there are
+    Args:
+    - rules(Iterable[Rule]): rules to be checked
+    """
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules = list(rules)
+        # State -> {call name: next state}, the state 0 is the one where nothing was matched
+        self.transitions: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        # State -> rules matched when it's reached
+        self.outputs: list[tuple[Rule, ...]] = [()]
+        self.__compile()
+
+    def __compile(self):
+        for rule in self.rules:
+            state = 0
+            for call in rule.calls:
+                if call not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                    self.transitions[state][call] = len(self.transitions) - 1
+                state = self.transitions[state][call]
+            self.outputs[state] += (rule,)
+        # Breadth first, so the fail state of each state is already complete when it's reached
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for call, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and call not in self.transitions[fail]:
+                    fail = self.fail[fail]
+                fail = self.transitions[fail].get(call, 0)
+                self.fail[next_state] = fail
+                self.outputs[next_state] += self.outputs[fail]
+
+    def __step(self, state: int, call: str) -> int:
+        while state and call not in self.transitions[state]:
+            state = self.fail[state]
+        return self.transitions[state].get(call, 0)
+
+    def check_model(self, model: FunctionMd | ClassMd | MethodMd) -> list[Finding]:
+        """
+        Returns the findings inside the body of a model, including nested blocks of code, in the order of the source
+        Statements that aren't calls break sequences, as do the start and end of a block
+        """
+        findings = []
+        blocks = [iter(model.source.body)]
+        state = 0
+        while blocks:
+            statement = next(blocks[-1], None)
+            if statement is None:
+                blocks.pop()
+                state = 0
+                continue
+            call = statement_call(statement)
+            if call is None:
+                state = 0
+                blocks.extend(iter(block) for block in reversed(nested_blocks(statement)))
+                continue
+            state = self.__step(state, call)
+            for rule in self.outputs[state]:
+                findings.append(Finding(rule, model, statement.lineno))
+        return findings
+
+    def check(self, models: Iterable[FunctionMd | ClassMd | MethodMd]) -> list[Finding]:
+        return [finding for model in models for finding in self.check_model(model)]
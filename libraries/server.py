@@ -0,0 +1,292 @@
+import asyncio
+import json
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from libraries.diagram_maker import iter_map_edges, node_label
+from libraries.exporters import FORMATS, LEVELS
+from libraries.mapper import Analyzer
+from libraries.rules import MAX_BROWSER_BUG, Rule
+
+
+class RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def model_to_dict(model) -> dict:
+    location = getattr(model, "location", None)
+    return {
+        "name": node_label(model) if model is not None else None,
+        "file": str(location) if location is not None else None,
+        "line": model.lineno if location is not None else None,
+    }
+
+
+def map_to_dict(calls_map: dict) -> dict:
+    """
+    Flattens a map from Analyzer.create_calls_map into nodes and (caller, callee, depth) edges between their indexes
+    The root has None as caller. Flat, so maps of any depth can be sent as JSON
+    """
+    nodes = []
+    indexes = {}
+    edges = []
+    for caller, callee, depth in iter_map_edges(calls_map):
+        if callee not in indexes:
+            indexes[callee] = len(nodes)
+            nodes.append(model_to_dict(callee))
+        edges.append([indexes[caller] if caller is not None else None, indexes[callee], depth])
+    return {"nodes": nodes, "edges": edges, "truncated": getattr(calls_map, "truncated", False)}
+
+
+class AnalysisServer:
+    """
+    Keeps the Analyzers of one or more repositories in memory and answers queries about them over HTTP
+    Queries run in threads, so the ones made to different repositories run at the same time,
+    while the ones made to the same repository wait for each other, as an Analyzer isn't thread-safe
+
+    Endpoints, every one taking the name of the repository as ?repo=, which can be left out if there's only one:
+    - GET /repositories: names and paths of the repositories
+    - GET /calls_map?call=<name>[&show_unknowns=1&max_depth=&max_nodes=&timeout=]: flat map of the calls, see map_to_dict
+    - GET /diagram?call=<name>[&show_unknowns=1&max_depth=&max_nodes=]: Mermaid code of the calls
+    - GET /export[?level=module&format=mermaid&call=&show_unknowns=1]: calls collapsed into classes, modules
+      or packages, as Mermaid, DOT or JSON, see Analyzer.export_graph
+    - GET /rules: findings of the max browser bug, POST /rules with a JSON list of rules checks those instead
+    - GET /callers?call=<name>[&depth=]: models calling the name, directly or not, with their distance to it
+    - POST /impacted[?depth=] with a JSON list of changed files, relative to the repository: models defined in them
+      and their callers
+    - GET /metrics[?top=]: cycles, entry points and hotspots of the whole call graph, see GraphMetrics.to_dict
+    - GET /stats: timings and counters of the Analyzer
+    - POST /reload: brings the Analyzer up to date with the files changed since it was loaded
+    Args:
+    - analyzers(dict[str, Analyzer]): Analyzer of each repository, by the name used in the queries
+    """
+
+    def __init__(self, analyzers: dict[str, Analyzer]) -> None:
+        self.analyzers = analyzers
+        self.__locks = {name: asyncio.Lock() for name in analyzers}
+        self.__routes = {
+            ("GET", "/repositories"): self.__repositories,
+            ("GET", "/calls_map"): self.__calls_map,
+            ("GET", "/diagram"): self.__diagram,
+            ("GET", "/export"): self.__export,
+            ("GET", "/rules"): self.__rules,
+            ("POST", "/rules"): self.__rules,
+            ("GET", "/callers"): self.__callers,
+            ("POST", "/impacted"): self.__impacted,
+            ("GET", "/metrics"): self.__metrics,
+            ("GET", "/stats"): self.__stats,
+            ("POST", "/reload"): self.__reload,
+        }
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000, unix_socket: str | None = None):
+        """
+        Serves requests on host and port, or on a Unix socket if one is given, until cancelled
+        """
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers the requests of a connection, which is kept open between them unless the client asks otherwise
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, content_type, content = await self.handle(request_line.decode("latin-1"), body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, request_line: str, body: bytes) -> tuple[HTTPStatus, str, bytes]:
+        """
+        Answers a single request, returning its status, content type and content
+        """
+        try:
+            method, target, _ = request_line.split(" ", 2)
+            url = urlsplit(target)
+            route = self.__routes.get((method, url.path))
+            if route is None:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"no endpoint for {method} {url.path}")
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            result = await route(params, body)
+        except RequestError as error:
+            return error.status, "application/json", json.dumps({"error": str(error)}).encode()
+        except Exception as error:
+            message = f"{error.__class__.__name__}: {error}"
+            return HTTPStatus.INTERNAL_SERVER_ERROR, "application/json", json.dumps({"error": message}).encode()
+        if isinstance(result, str):
+            return HTTPStatus.OK, "text/plain; charset=utf-8", result.encode()
+        return HTTPStatus.OK, "application/json", json.dumps(result).encode()
+
+    async def __run(self, params: dict, function, *args):
+        """
+        Runs function(analyzer, *args) in a thread, once the other queries to the same repository are done
+        """
+        name = params.get("repo")
+        if name is None:
+            if len(self.analyzers) != 1:
+                raise RequestError(HTTPStatus.BAD_REQUEST, "repo should be given when serving many repositories")
+            name = next(iter(self.analyzers))
+        if name not in self.analyzers:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"unknown repository {name}")
+        async with self.__locks[name]:
+            return await asyncio.to_thread(function, self.analyzers[name], *args)
+
+    async def __repositories(self, params: dict, body: bytes):
+        return {name: str(analyzer.path) for name, analyzer in self.analyzers.items()}
+
+    async def __calls_map(self, params: dict, body: bytes):
+        call_name = self.__call_name(params)
+        show_unknowns = self.__flag(params, "show_unknowns")
+        budgets = (self.__number(params, "max_depth"), self.__number(params, "max_nodes"))
+        timeout = self.__number(params, "timeout", float)
+
+        def query(analyzer: Analyzer):
+            start = time.perf_counter()
+            calls_map = self.__create_calls_map(analyzer, call_name, show_unknowns, *budgets, timeout)
+            result = map_to_dict(calls_map)
+            result["milliseconds"] = (time.perf_counter() - start) * 1000
+            return result
+
+        return await self.__run(params, query)
+
+    async def __diagram(self, params: dict, body: bytes):
+        call_name = self.__call_name(params)
+        show_unknowns = self.__flag(params, "show_unknowns")
+        budgets = (self.__number(params, "max_depth"), self.__number(params, "max_nodes"))
+
+        def query(analyzer: Analyzer):
+            try:
+                return analyzer.create_diagram(call_name, show_unknowns, None, *budgets)
+            except IndexError:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"call name {call_name} not present in the repository")
+
+        return await self.__run(params, query)
+
+    async def __export(self, params: dict, body: bytes):
+        level = params.get("level", "module")
+        format = params.get("format", "mermaid")
+        if level not in LEVELS or format not in FORMATS:
+            message = f"level should be one of {', '.join(LEVELS)} and format one of {', '.join(FORMATS)}"
+            raise RequestError(HTTPStatus.BAD_REQUEST, message)
+        call_name = params.get("call")
+        show_unknowns = self.__flag(params, "show_unknowns")
+
+        def query(analyzer: Analyzer):
+            try:
+                code = analyzer.export_graph(level, format, None, call_name, show_unknowns)
+            except IndexError:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"call name {call_name} not present in the repository")
+            return json.loads(code) if format == "json" else code
+
+        return await self.__run(params, query)
+
+    async def __rules(self, params: dict, body: bytes):
+        try:
+            rules = [Rule.from_dict(data) for data in json.loads(body)] if body else [MAX_BROWSER_BUG]
+        except (ValueError, KeyError, TypeError) as error:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid rules: {error}")
+
+        def query(analyzer: Analyzer):
+            return [finding.to_dict() for finding in analyzer.check_rules(rules)]
+
+        return await self.__run(params, query)
+
+    async def __callers(self, params: dict, body: bytes):
+        call_name = self.__call_name(params)
+        depth = self.__number(params, "depth")
+
+        def query(analyzer: Analyzer):
+            try:
+                callers = analyzer.callers(call_name, depth)
+            except IndexError:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"call name {call_name} not present in the repository")
+            return [dict(model_to_dict(model), depth=distance) for model, distance in callers.items()]
+
+        return await self.__run(params, query)
+
+    async def __impacted(self, params: dict, body: bytes):
+        depth = self.__number(params, "depth")
+        try:
+            files = json.loads(body)
+        except ValueError as error:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid list of files: {error}")
+        if not isinstance(files, list) or not all(isinstance(file, str) for file in files):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "a JSON list of files should be sent")
+
+        def query(analyzer: Analyzer):
+            try:
+                impacted = analyzer.impacted_by(files, depth)
+            except IndexError as error:
+                raise RequestError(HTTPStatus.NOT_FOUND, str(error))
+            return [dict(model_to_dict(model), depth=distance) for model, distance in impacted.items()]
+
+        return await self.__run(params, query)
+
+    async def __metrics(self, params: dict, body: bytes):
+        top = self.__number(params, "top") or 20
+
+        def query(analyzer: Analyzer):
+            return analyzer.metrics().to_dict(top)
+
+        return await self.__run(params, query)
+
+    async def __stats(self, params: dict, body: bytes):
+        return await self.__run(params, Analyzer.stats)
+
+    async def __reload(self, params: dict, body: bytes):
+        return await self.__run(params, Analyzer.refresh)
+
+    @staticmethod
+    def __create_calls_map(analyzer: Analyzer, call_name: str, *args):
+        try:
+            return analyzer.create_calls_map(call_name, *args)
+        except IndexError:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"call name {call_name} not present in the repository")
+
+    @staticmethod
+    def __call_name(params: dict) -> str:
+        if "call" not in params:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "call should be given")
+        return params["call"]
+
+    @staticmethod
+    def __flag(params: dict, name: str) -> bool:
+        return params.get(name, "").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def __number(params: dict, name: str, kind: type = int):
+        if name not in params:
+            return None
+        try:
+            return kind(params[name])
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"{name} should be a number")
@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+from array import array
+from itertools import groupby
+from pathlib import Path
+
+from libraries import __version__
+from libraries.call_graph import CallGraph
+from libraries.models.class_def import ClassMd, MethodMd
+from libraries.models.function_def import FunctionMd
+from libraries.source_parser import ImportMap, Parser
+from libraries.symbol_table import SymbolTable
+
+# Changes whenever the tables change, snapshots of other formats can't be read
+SNAPSHOT_FORMAT = 2
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    module TEXT,
+    mtime_ns INTEGER,
+    size INTEGER,
+    imports TEXT,
+    external INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE definitions (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    qualified_name TEXT,
+    class_id INTEGER REFERENCES definitions(id),
+    lineno INTEGER,
+    end_lineno INTEGER,
+    arguments TEXT,
+    docstring TEXT,
+    vars TEXT,
+    attributes TEXT,
+    self_name TEXT
+);
+CREATE TABLE parents (
+    class_id INTEGER NOT NULL REFERENCES definitions(id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE calls (
+    definition_id INTEGER NOT NULL REFERENCES definitions(id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT
+);
+CREATE TABLE edges (
+    caller_id INTEGER NOT NULL REFERENCES definitions(id),
+    position INTEGER NOT NULL,
+    callee_id INTEGER REFERENCES definitions(id),
+    unknown TEXT
+);
+"""
+
+# Created once the tables are filled, which is faster than keeping them up to date on every insert
+INDEXES = """
+CREATE INDEX definitions_name ON definitions(name);
+CREATE INDEX definitions_qualified_name ON definitions(qualified_name);
+CREATE INDEX definitions_file ON definitions(file_id, lineno);
+CREATE INDEX parents_class ON parents(class_id);
+CREATE INDEX calls_definition ON calls(definition_id, position);
+CREATE INDEX calls_name ON calls(name);
+CREATE INDEX edges_caller ON edges(caller_id, position);
+CREATE INDEX edges_callee ON edges(callee_id);
+"""
+
+
+def model_kind(model: FunctionMd | ClassMd | MethodMd) -> str:
+    if isinstance(model, MethodMd):
+        return "method"
+    if isinstance(model, ClassMd):
+        return "class"
+    return "function"
+
+
+class Snapshot:
+    """
+    Contents of a snapshot file, as read by read_snapshot
+    Args:
+    - root(str): directory that was analyzed
+    - files(list[tuple]): path, (mtime, size), function models, class models, imports and the module name of installed
+      files (None for the ones of the directory) of each file, in order
+    - offsets, targets, unknown_names: calls between the models, as in CallGraph
+    """
+
+    def __init__(self, root: str, files: list[tuple], offsets: array, targets: array, unknown_names: list[str]) -> None:
+        self.root = root
+        self.files = files
+        self.offsets = offsets
+        self.targets = targets
+        self.unknown_names = unknown_names
+
+
+def write_snapshot(
+    path: str | Path,
+    root: str,
+    files: list[tuple[Path, tuple[int, int], ImportMap, str | None]],
+    graph: CallGraph,
+    symbols: SymbolTable,
+):
+    """
+    Writes the models and the resolved calls of an analysis to a SQLite file at path, replacing it if it exists
+    Every table is filled with bulk inserts inside a single transaction, and indexed once they are filled
+    Args:
+    - path(str | Path): snapshot file
+    - root(str): directory that was analyzed
+    - files(list[tuple]): path, (mtime, size), imports and the module name of installed files (None for the ones of the
+      directory) of each file
+    - graph(CallGraph): graph of the analysis
+    Definitions are numbered following the order of files, which is the order read_snapshot rebuilds them in,
+    and the calls of graph are renumbered to match, since its models may be in another order, Ex: in lazy mode
+    - symbols(SymbolTable): used for the modules and qualified names
+    """
+    path = Path(path)
+    temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+    if temporary_path.exists():
+        temporary_path.unlink()
+    connection = sqlite3.connect(temporary_path)
+    try:
+        # The file is only moved into place once complete, so there's nothing to be recovered from a crash
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(SCHEMA)
+        file_ids = {file_path: index for index, (file_path, *_) in enumerate(files)}
+        connection.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("format", str(SNAPSHOT_FORMAT)), ("version", __version__), ("root", str(root))],
+        )
+        connection.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    file_ids[file_path],
+                    str(file_path),
+                    symbols.module_names.get(file_path),
+                    mtime_ns,
+                    size,
+                    json.dumps(import_map.to_record()),
+                    external_module is not None,
+                )
+                for file_path, (mtime_ns, size), import_map, external_module in files
+            ),
+        )
+        # The models of each file keep their order in graph, which is the order they were registered in
+        file_models = {}
+        for model in graph.models:
+            file_models.setdefault(model.location, []).append(model)
+        models = [model for file_path, *_ in files for model in file_models.get(file_path, [])]
+        definition_ids = {graph.ids[model]: index for index, model in enumerate(models)}
+        connection.executemany(
+            "INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    index,
+                    file_ids[model.location],
+                    model_kind(model),
+                    model.name,
+                    symbols.qualified_name(model),
+                    definition_ids[graph.ids[model.class_object]] if isinstance(model, MethodMd) else None,
+                    model.lineno,
+                    model.end_lineno,
+                    json.dumps(model.arguments),
+                    model.docstring,
+                    json.dumps(model.vars),
+                    json.dumps(model.attributes) if isinstance(model, (ClassMd, MethodMd)) else None,
+                    model.self_name if isinstance(model, MethodMd) else None,
+                )
+                for index, model in enumerate(models)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO parents VALUES (?, ?, ?)",
+            (
+                (index, position, parent)
+                for index, model in enumerate(models)
+                if isinstance(model, ClassMd)
+                for position, parent in enumerate(model.parents)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO calls VALUES (?, ?, ?, ?)",
+            (
+                (index, position, name, call_path)
+                for index, model in enumerate(models)
+                for position, (name, call_path) in enumerate(zip(model.calls, model.call_paths))
+            ),
+        )
+        models_count = len(graph.models)
+        connection.executemany(
+            "INSERT INTO edges VALUES (?, ?, ?, ?)",
+            (
+                (
+                    index,
+                    position,
+                    definition_ids[target] if target < models_count else None,
+                    graph.unknown_names[target - models_count] if target >= models_count else None,
+                )
+                for index, model in enumerate(models)
+                for position, target in enumerate(graph.callees(graph.ids[model]))
+            ),
+        )
+        connection.executescript(INDEXES)
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temporary_path, path)
+
+
+def read_snapshot(path: str | Path) -> Snapshot:
+    """
+    Reads a file written by write_snapshot, rebuilding its models without parsing any source
+    """
+    connection = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True)
+    try:
+        meta = dict(connection.execute("SELECT key, value FROM meta"))
+        if meta.get("format") != str(SNAPSHOT_FORMAT):
+            raise ValueError(f"snapshot {path} has format {meta.get('format')}, expected {SNAPSHOT_FORMAT}")
+        calls = {
+            definition_id: list(rows)
+            for definition_id, rows in groupby(
+                connection.execute("SELECT definition_id, name, path FROM calls ORDER BY definition_id, position"),
+                key=lambda row: row[0],
+            )
+        }
+        parents = {
+            class_id: [row[1] for row in rows]
+            for class_id, rows in groupby(
+                connection.execute("SELECT class_id, name FROM parents ORDER BY class_id, position"),
+                key=lambda row: row[0],
+            )
+        }
+        # Records of each file in the format of Parser.to_record, with the methods following their class
+        records = {}
+        classes = {}
+        definitions = connection.execute(
+            "SELECT id, file_id, kind, name, class_id, lineno, end_lineno, arguments, docstring, vars, attributes, "
+            "self_name FROM definitions ORDER BY id"
+        )
+        for (
+            index,
+            file_id,
+            kind,
+            name,
+            class_id,
+            lineno,
+            end_lineno,
+            arguments,
+            docstring,
+            vars,
+            attributes,
+            self_name,
+        ) in definitions:
+            model_calls = calls.get(index, [])
+            record = {
+                "name": name,
+                "lineno": lineno,
+                "end_lineno": end_lineno,
+                "arguments": json.loads(arguments),
+                "docstring": docstring,
+                "vars": json.loads(vars),
+                "calls": [call[1] for call in model_calls],
+                "call_paths": [call[2] for call in model_calls],
+            }
+            file_record = records.setdefault(file_id, {"functions": [], "classes": []})
+            if kind == "function":
+                file_record["functions"].append(record)
+            elif kind == "class":
+                record["parents"] = parents.get(index, [])
+                record["attributes"] = json.loads(attributes)
+                record["methods"] = []
+                file_record["classes"].append(record)
+                classes[index] = record
+            else:
+                record["attributes"] = json.loads(attributes)
+                record["self_name"] = self_name
+                classes[class_id]["methods"].append(record)
+        files = []
+        for file_id, file_path, module, mtime_ns, size, imports, external in connection.execute(
+            "SELECT id, path, module, mtime_ns, size, imports, external FROM files ORDER BY id"
+        ):
+            file_path = Path(file_path)
+            record = records.get(file_id, {"functions": [], "classes": []})
+            functions, file_classes = Parser.models_from_record(record, file_path)
+            import_map = ImportMap.from_record(json.loads(imports))
+            files.append(
+                (file_path, (mtime_ns, size), functions, file_classes, import_map, module if external else None)
+            )
+        models_count = len(classes) + sum(len(record["functions"]) for record in records.values())
+        models_count += sum(len(classmd["methods"]) for classmd in classes.values())
+        offsets = array("i", bytes(array("i").itemsize * (models_count + 1)))
+        targets = array("i")
+        unknown_ids = {}
+        for caller_id, callee_id, unknown in connection.execute(
+            "SELECT caller_id, callee_id, unknown FROM edges ORDER BY caller_id, position"
+        ):
+            if callee_id is None:
+                callee_id = unknown_ids.setdefault(unknown, models_count + len(unknown_ids))
+            targets.append(callee_id)
+            offsets[caller_id + 1] += 1
+        for index in range(models_count):
+            offsets[index + 1] += offsets[index]
+    finally:
+        connection.close()
+    return Snapshot(meta["root"], files, offsets, targets, list(unknown_ids))
@@ -1,52 +1,123 @@
 import ast
-import re
-import astunparse
+import io
+import os
+import time
+from functools import cached_property
 from pathlib import Path
 
 from libraries.models.class_def import ClassMd
+from libraries.models.extractor import call_name
 from libraries.models.function_def import FunctionMd
+from libraries.parse_cache import ParseCache
 
 
-class Parser:
-    callable_pattern = r"[a-zA-Z0-9_.]+\("
+def call_names(nodes: list[ast.AST]) -> list[str]:
+    """
+    Returns the dotted names of all calls made inside the nodes, in the order they appear in the source
+    """
+    calls = [node for root in nodes for node in ast.walk(root) if isinstance(node, ast.Call)]
+    # Ordered by the position of the opening parenthesis, since chained calls start at the same column
+    calls.sort(key=lambda node: (node.func.end_lineno, node.func.end_col_offset))
+    return [name for name in map(call_name, calls) if name is not None]
+
+
+class ImportMap:
+    """
+    Names bound by the imports in the top level of a file, and what each one refers to
+    Ex: "import numpy as np" -> {"np": "numpy"}, "from .models import Md" -> {"Md": ".models.Md"}
+    Relative imports keep their leading dots, since resolving them depends on where the file is
+    """
+
+    __slots__ = ("names", "star")
 
+    def __init__(self, names: dict[str, str] | None = None, star: list[str] | None = None) -> None:
+        self.names = names if names is not None else {}
+        # Modules imported with "from module import *"
+        self.star = star if star is not None else []
+
+    @classmethod
+    def from_nodes(cls, nodes: list[ast.Import | ast.ImportFrom]) -> "ImportMap":
+        import_map = cls()
+        for node in nodes:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname is not None:
+                        import_map.names[alias.asname] = alias.name
+                    else:
+                        # "import a.b" binds "a", through which "a.b" is reached
+                        head = alias.name.split(".", 1)[0]
+                        import_map.names[head] = head
+                continue
+            module = "." * node.level + (node.module or "")
+            for alias in node.names:
+                if alias.name == "*":
+                    import_map.star.append(module)
+                    continue
+                separator = "." if node.module else ""
+                import_map.names[alias.asname or alias.name] = f"{module}{separator}{alias.name}"
+        return import_map
+
+    def changed_names(self, other: "ImportMap") -> set[str]:
+        """
+        Names that other binds to something else, or that only one of them binds
+        """
+        names = self.names.keys() | other.names.keys()
+        return {name for name in names if self.names.get(name) != other.names.get(name)}
+
+    def to_record(self) -> dict:
+        return {"names": self.names, "star": self.star}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "ImportMap":
+        return cls(dict(record["names"]), list(record["star"]))
+
+
+class Parser:
     def __init__(self, path) -> None:
         # Should receive path, remove source internally
         if isinstance(path, str):
             path = Path(path)
         self.path = path
-        with open(path) as file:
-            self.source = file.read()
+        # Taken before reading, so a file saved meanwhile never gets an older record under its newer fingerprint
+        stat = os.stat(path)
+        with open(path, "rb") as file:
+            content = file.read()
+        # Same decoding and newlines as opening the file in text mode
+        self.source = io.TextIOWrapper(io.BytesIO(content)).read()
+        # (mtime, size, content hash) of the bytes that were parsed, as stored along with the record in a ParseCache
+        self.fingerprint = (stat.st_mtime_ns, stat.st_size, ParseCache.content_hash(content))
+        self.tree = ast.parse(self.source)
         self.ast_nodes, self.imports, self.functions, self.classes = self.__get_logic_nodes()
 
-    @property
-    def all_callables(self):
-        pattern = re.compile(self.callable_pattern)
-        callables = re.findall(pattern, self.source)
-        return [callable[:-1] for callable in callables]
+    @cached_property
+    def import_map(self) -> ImportMap:
+        return ImportMap.from_nodes(self.imports)
 
-    def __get_call_names_from_node(self, node):
-        internal_source = "".join([astunparse.unparse(node) for node in node.body])
-        unparsed_calls = re.findall(self.callable_pattern, internal_source)
-        parsed_calls = [calls[:-1] for calls in unparsed_calls]
-        return parsed_calls
+    @cached_property
+    def all_callables(self) -> list[str]:
+        """
+        Dotted names of every call made in the file
+        """
+        return call_names([self.tree])
 
+    @cached_property
     def encapsulated_callables(self) -> dict:
-        tree = ast.parse(self.source)
+        """
+        Dotted names of the calls made inside each function and method of the file
+        Methods are keyed as "Class.method"
+        """
         internal_calls = {}
-        for node in ast.iter_child_nodes(tree):
+        for node in ast.iter_child_nodes(self.tree):
             # Right now only identifies functions
             if isinstance(node, ast.FunctionDef):
-                parsed_calls = self.__get_call_names_from_node(node)
-                internal_calls[node.name] = parsed_calls
+                internal_calls[node.name] = call_names(node.body)
             elif isinstance(node, ast.ClassDef):
                 # Add ClassMD, then remove methods from it and add them
                 class_name = node.name
                 for int_node in node.body:
                     if isinstance(int_node, ast.FunctionDef):
-                        parsed_calls = self.__get_call_names_from_node(int_node)
                         method_name = int_node.name
-                        internal_calls[f"{class_name}.{method_name}"] = parsed_calls
+                        internal_calls[f"{class_name}.{method_name}"] = call_names(int_node.body)
         return internal_calls
 
     def __get_logic_nodes(self):
@@ -54,12 +125,11 @@ class Parser:
         Returns a tuple of a source, each items is a list containing:
         (All_nodes, importations, function_definitons, class_definitions)
         """
-        tree = ast.parse(self.source)
         ast_nodes = []
         func_nodes = []
         class_nodes = []
         import_nodes = []
-        for node in ast.iter_child_nodes(tree):
+        for node in ast.iter_child_nodes(self.tree):
             ast_nodes.append(node)
             if isinstance(node, (ast.Import, ast.ImportFrom)):
                 import_nodes.append(node)
@@ -69,9 +139,56 @@ class Parser:
                 class_nodes.append(ClassMd(node, self.path))
         return (ast_nodes, import_nodes, func_nodes, class_nodes)
 
+    def to_record(self) -> dict:
+        """
+        Returns the models extracted from the file as a dictionary of plain values
+        Can be stored or sent between processes, and turned back into models with models_from_record
+        """
+        return {
+            "functions": [funcmd.to_record() for funcmd in self.functions],
+            "classes": [classmd.to_record() for classmd in self.classes],
+            "imports": self.import_map.to_record(),
+        }
+
+    @staticmethod
+    def models_from_record(record: dict, path: str | Path) -> tuple[list[FunctionMd], list[ClassMd]]:
+        """
+        Rebuilds the function and class models of a file from the output of to_record
+        """
+        if isinstance(path, str):
+            path = Path(path)
+        functions = [FunctionMd.from_record(funcmd, path) for funcmd in record["functions"]]
+        classes = [ClassMd.from_record(classmd, path) for classmd in record["classes"]]
+        return functions, classes
+
+    @staticmethod
+    def import_map_from_record(record: dict) -> ImportMap:
+        return ImportMap.from_record(record["imports"])
+
+
+def parse_to_records(paths: list[str | Path]) -> list[dict]:
+    """
+    Parses a batch of files and returns the records of their models, in the same order
+    Used as the unit of work of worker processes, since records are cheap to pickle unlike the models and their ASTs
+    """
+    return [Parser(path).to_record() for path in paths]
+
+
+def parse_to_timed_records(paths: list[str | Path]) -> list[tuple[dict, float, int, tuple]]:
+    """
+    Same as parse_to_records, along with the seconds spent on each file, its size in bytes and its fingerprint
+    """
+    records = []
+    for path in paths:
+        start = time.perf_counter()
+        parser = Parser(path)
+        record = parser.to_record()
+        records.append((record, time.perf_counter() - start, len(parser.source.encode()), parser.fingerprint))
+    return records
+
 
 if __name__ == "__main__":
     p = Parser("libraries/module.py")
     print(p.functions)
     print(p.classes)
-    # print(p.encapsulated_callables())
+    # print(p.encapsulated_callables)
@@ -0,0 +1,163 @@
+from collections import OrderedDict, deque
+
+from libraries.call_graph import CallGraph
+from libraries.models.unknown_func import UnknownFuncMd
+
+
+class CallSubgraph:
+    """
+    Everything reachable from a model, as a flat set of models and of (caller, callee) edges
+    Unlike the maps from create_calls_map, it doesn't depend on the order of the traversal,
+    which is what allows it to be reused inside of other subgraphs
+    """
+
+    def __init__(self, root, nodes: frozenset, edges: frozenset, names: frozenset) -> None:
+        self.root = root
+        self.nodes = nodes
+        self.edges = edges
+        # Every call name that was resolved to build the subgraph, used to know when it's outdated
+        self.names = names
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} - {self.root.name}: {len(self.nodes)} nodes, {len(self.edges)} edges>"
+
+
+class SubgraphCache:
+    """
+    LRU cache of the subgraphs reachable from each model, shared by every query of an Analyzer
+    Besides the roots of queries, the subgraphs of shared helpers (called from at least shared_fan_in places)
+    are cached as they are reached, so that other queries reaching them reuse the expansion
+    """
+
+    # Limit of nested helper expansions, deeper helpers are expanded inline without being cached
+    max_nesting = 4
+
+    def __init__(self, maxsize: int = 256, shared_fan_in: int = 2) -> None:
+        self.maxsize = maxsize
+        self.shared_fan_in = shared_fan_in
+        self.entries: OrderedDict[tuple, CallSubgraph] = OrderedDict()
+        self.unknown_models: dict[str, UnknownFuncMd] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, model, show_unknowns: bool) -> CallSubgraph | None:
+        key = (model, show_unknowns)
+        subgraph = self.entries.get(key)
+        if subgraph is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return subgraph
+
+    def __peek(self, model, show_unknowns: bool) -> CallSubgraph | None:
+        """
+        Lookup made while expanding, only counted when it hits since most reached models are never cached
+        """
+        key = (model, show_unknowns)
+        subgraph = self.entries.get(key)
+        if subgraph is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return subgraph
+
+    def put(self, model, show_unknowns: bool, subgraph: CallSubgraph):
+        if self.maxsize <= 0:
+            return
+        self.entries[(model, show_unknowns)] = subgraph
+        self.entries.move_to_end((model, show_unknowns))
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, names) -> int:
+        """
+        Drops every subgraph that resolved one of the given call names, returns how many were dropped
+        """
+        names = set(names)
+        outdated = [key for key, subgraph in self.entries.items() if not names.isdisjoint(subgraph.names)]
+        for key in outdated:
+            del self.entries[key]
+        return len(outdated)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def unknown_model(self, name: str) -> UnknownFuncMd:
+        """
+        Returns the same UnknownFuncMd for every call to a name, so edges to it can be compared across subgraphs
+        """
+        model = self.unknown_models.get(name)
+        if model is None:
+            model = self.unknown_models[name] = UnknownFuncMd(name)
+        return model
+
+    def subgraph(self, graph: CallGraph, symbol: int, show_unknowns: bool = False) -> CallSubgraph:
+        """
+        Returns the subgraph reachable from a symbol of the graph, expanding and caching it if needed
+        """
+        return self.__subgraph(graph, symbol, show_unknowns, set(), 0)
+
+    def __subgraph(self, graph: CallGraph, symbol: int, show_unknowns: bool, in_progress: set, nesting: int):
+        root = graph.models[symbol]
+        cached = self.get(root, show_unknowns)
+        if cached is not None:
+            return cached
+        in_progress.add(symbol)
+        fan_in = graph.fan_in
+        nodes = set()
+        edges = set()
+        names = {root.name}
+        # Canonical ids already expanded, queued or inside a merged subgraph, whose calls are already covered
+        covered = {graph.canonical[symbol]}
+        queue = deque([graph.canonical[symbol]])
+        while queue:
+            call = queue.popleft()
+            if call == -1:
+                continue
+            caller = graph.models[call]
+            nodes.add(caller)
+            names.update(caller.calls)
+            for subcall in graph.callees(call):
+                if graph.is_unknown(subcall):
+                    if show_unknowns:
+                        edges.add((caller, self.unknown_model(graph.unknown_names[subcall - len(graph)])))
+                    continue
+                callee = graph.canonical[subcall]
+                if callee == -1:
+                    continue
+                edges.add((caller, graph.models[callee]))
+                if callee in covered:
+                    continue
+                subgraph = self.__peek(graph.models[subcall], show_unknowns)
+                is_shared = fan_in[subcall] >= self.shared_fan_in or fan_in[callee] >= self.shared_fan_in
+                can_nest = self.maxsize > 0 and nesting < self.max_nesting and subcall not in in_progress
+                if subgraph is None and is_shared and can_nest:
+                    subgraph = self.__subgraph(graph, subcall, show_unknowns, in_progress, nesting + 1)
+                covered.add(callee)
+                if subgraph is None:
+                    queue.append(callee)
+                    continue
+                nodes.update(subgraph.nodes)
+                edges.update(subgraph.edges)
+                names.update(subgraph.names)
+                covered.update(graph.ids[node] for node in subgraph.nodes)
+        in_progress.discard(symbol)
+        subgraph = CallSubgraph(root, frozenset(nodes), frozenset(edges), frozenset(names))
+        self.put(root, show_unknowns, subgraph)
+        return subgraph
@@ -0,0 +1,271 @@
+import os
+from pathlib import Path
+
+from libraries.models.class_def import ClassMd, MethodMd
+from libraries.models.function_def import FunctionMd
+from libraries.source_parser import ImportMap
+
+
+class External:
+    """
+    Result of resolving a call that leads outside of the analyzed directory, Ex: os.path.join()
+    Args:
+    - name(str): qualified name that was called, Ex: "os.path.join"
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} - {self.name}>"
+
+
+def module_name(path: Path, root: Path) -> str:
+    """
+    Dotted name of the module in path, relative to root, Ex: root/pkg/mod.py -> "pkg.mod", root/pkg/__init__.py -> "pkg"
+    """
+    try:
+        parts = list(path.relative_to(root).with_suffix("").parts)
+    except ValueError:
+        parts = [path.stem]
+    if parts and parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+class SymbolTable:
+    """
+    Definitions of an analyzed directory keyed by qualified name, Ex: "pkg.mod.Class.method"
+    along with the imports of each module, so calls can be resolved to the definition they really lead to
+    Args:
+    - root(str | Path): analyzed directory, module names are relative to it, or to the directory holding
+      its outermost package if it's a package itself, Ex: "libraries.mapper" for root libraries/
+    """
+
+    # Number of imports and parent classes followed while resolving a single call
+    max_chain = 8
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(os.path.abspath(root))
+        # Directory that module names are relative to, so a package can still import itself by its absolute name
+        self.import_root = self.root
+        while (self.import_root / "__init__.py").is_file() and self.import_root.parent != self.import_root:
+            self.import_root = self.import_root.parent
+        self.definitions: dict[str, FunctionMd | ClassMd | MethodMd] = {}
+        # Import maps of the modules whose models were added
+        self.imports: dict[str, ImportMap] = {}
+        # Every module of the directory, even the ones that weren't added yet
+        self.module_paths: dict[str, Path] = {}
+        self.module_names: dict[Path, str] = {}
+        self.packages: set[str] = set()
+        # Number of modules under each top level name, so names of the directory are never taken as external
+        self.top_levels: dict[str, int] = {}
+        # Modules added from outside of the directory, Ex: installed packages
+        self.external_modules: set[str] = set()
+        self.__file_keys: dict[Path, list[str]] = {}
+        self.__resolved: dict[tuple, FunctionMd | ClassMd | MethodMd | External | None] = {}
+        # Modules of the directory that a resolution went through without their imports being known
+        self.__missing: set[Path] = set()
+
+    def add_path(self, path: Path) -> str:
+        """
+        Registers a file of the directory as a module, returning its name
+        """
+        module = self.module_names.get(path)
+        if module is None:
+            module = module_name(path, self.import_root)
+            self.module_names[path] = module
+            self.module_paths[module] = path
+            top_level = module.split(".", 1)[0]
+            self.top_levels[top_level] = self.top_levels.get(top_level, 0) + 1
+            if path.name == "__init__.py":
+                self.packages.add(module)
+        return module
+
+    def add_file(
+        self,
+        path: Path,
+        functions: list[FunctionMd],
+        classes: list[ClassMd],
+        import_map: ImportMap,
+        external_module: str | None = None,
+    ):
+        """
+        Adds the definitions and imports of a file of the directory, or of a module outside of it if its name is given
+        """
+        if external_module is None:
+            module = self.add_path(path)
+        else:
+            module = external_module
+            self.module_names[path] = module
+            self.module_paths[module] = path
+            self.external_modules.add(module)
+            if path.name == "__init__.py":
+                self.packages.add(module)
+        self.imports[module] = import_map
+        prefix = f"{module}." if module else ""
+        keys = []
+        for model in functions + classes:
+            keys.append(prefix + model.name)
+            self.definitions[keys[-1]] = model
+        for classmd in classes:
+            for methodmd in classmd.methods:
+                keys.append(f"{prefix}{classmd.name}.{methodmd.name}")
+                self.definitions[keys[-1]] = methodmd
+        self.__file_keys[path] = keys
+        self.__resolved.clear()
+
+    def remove_file(self, path: Path, forget_path: bool = False):
+        """
+        Removes the definitions of a file, and the file itself if forget_path is set
+        """
+        module = self.module_names.get(path)
+        for key in self.__file_keys.pop(path, []):
+            self.definitions.pop(key, None)
+        self.imports.pop(module, None)
+        if forget_path and module is not None:
+            del self.module_names[path]
+            if self.module_paths.get(module) == path:
+                del self.module_paths[module]
+            top_level = module.split(".", 1)[0]
+            self.top_levels[top_level] -= 1
+            if not self.top_levels[top_level]:
+                del self.top_levels[top_level]
+            self.packages.discard(module)
+        self.__resolved.clear()
+
+    def qualified_name(self, model: FunctionMd | ClassMd | MethodMd) -> str | None:
+        module = self.module_names.get(model.location)
+        if module is None:
+            return None
+        name = f"{model.class_object.name}.{model.name}" if isinstance(model, MethodMd) else model.name
+        return f"{module}.{name}" if module else name
+
+    def is_external(self, model: FunctionMd | ClassMd | MethodMd) -> bool:
+        return self.module_names.get(model.location) in self.external_modules
+
+    def resolve(self, model: FunctionMd | ClassMd | MethodMd, position: int):
+        """
+        Returns the definition that the call in position of model.calls leads to, External if it's known to lead outside
+        of the directory, or None if it can't be told from the imports (Ex: a method called over a variable)
+        """
+        key = self.__call_key(model, position)
+        if key is None:
+            return None
+        if key not in self.__resolved:
+            self.__resolved[key] = self.__resolve_key(key)
+        return self.__resolved[key]
+
+    def missing_modules(self, model: FunctionMd | ClassMd | MethodMd) -> set[Path]:
+        """
+        Files of the modules whose imports are needed to resolve the calls of model, but weren't added yet
+        Used by the lazy mode to load the modules that imports go through, Ex: a package re-exporting a function
+        """
+        self.__missing = set()
+        for position in range(len(model.calls)):
+            key = self.__call_key(model, position)
+            if key is not None:
+                self.__resolve_key(key)
+        return self.__missing
+
+    def __call_key(self, model: FunctionMd | ClassMd | MethodMd, position: int) -> tuple | None:
+        """
+        Returns what the resolution of a call depends on: the module it's made from, the class for calls over self
+        or cls and the dotted name called. None if the call can't be followed
+        """
+        name = model.calls[position]
+        path = model.call_paths[position]
+        # Calls over expressions, Ex: get().run(), can't be followed
+        if path is None or path.startswith(".") or path.rsplit(".", 1)[-1] != name:
+            return None
+        module = self.module_names.get(model.location)
+        if module is None:
+            return None
+        head, _, rest = path.partition(".")
+        is_self_call = head in ("self", "cls") and isinstance(model, MethodMd) and rest == name
+        return module, model.class_object.name if is_self_call else None, path
+
+    def __resolve_key(self, key: tuple):
+        module, class_name, path = key
+        if class_name is not None:
+            return self.__method(f"{module}.{class_name}".lstrip("."), path.partition(".")[2], 0)
+        return self.__resolve_path(module, path, 0)
+
+    def __absolute(self, module: str, target: str) -> str:
+        """
+        Turns a relative import target of module into an absolute one, Ex: ".models.Md" in "pkg.mod" -> "pkg.models.Md"
+        """
+        level = len(target) - len(target.lstrip("."))
+        if not level:
+            return target
+        package = module.split(".") if module in self.packages else module.split(".")[:-1]
+        if level > 1:
+            package = package[: -(level - 1)]
+        return ".".join([part for part in package if part] + [target[level:]]).strip(".")
+
+    def __resolve_path(self, module: str, path: str, depth: int):
+        """
+        Resolves a dotted name as seen from inside module
+        """
+        head, _, rest = path.partition(".")
+        local = f"{module}.{head}" if module else head
+        outside = External(f"{module}.{path}") if module in self.external_modules else None
+        if local in self.definitions:
+            return self.definitions.get(f"{local}.{rest}", outside) if rest else self.definitions[local]
+        import_map = self.imports.get(module)
+        if import_map is None:
+            return outside
+        if head in import_map.names:
+            target = self.__absolute(module, import_map.names[head])
+            return self.__lookup(f"{target}.{rest}" if rest else target, depth)
+        if not rest:
+            for star in import_map.star:
+                found = self.__lookup(f"{self.__absolute(module, star)}.{head}", depth)
+                if found is not None and not isinstance(found, External):
+                    return found
+        return outside
+
+    def __lookup(self, qualified: str, depth: int):
+        """
+        Finds a definition by its qualified name, following the imports of the modules it goes through
+        """
+        if qualified in self.definitions:
+            return self.definitions[qualified]
+        parts = qualified.split(".")
+        for cut in range(len(parts) - 1, 0, -1):
+            module = ".".join(parts[:cut])
+            if module in self.module_paths:
+                if module not in self.imports:
+                    self.__missing.add(self.module_paths[module])
+                    return None
+                if depth >= self.max_chain:
+                    return None
+                return self.__resolve_path(module, ".".join(parts[cut:]), depth + 1)
+        # Names of the directory itself, Ex: a namespace package importing itself, are left to the bare-name fallback
+        if parts[0] in self.top_levels or parts[0] == self.root.name:
+            return None
+        return External(qualified)
+
+    def __method(self, class_name: str, method: str, depth: int):
+        """
+        Finds a method in a class or in its parents, in the order Python would for single inheritance chains
+        """
+        found = self.definitions.get(f"{class_name}.{method}")
+        if found is not None:
+            return found
+        classmd = self.definitions.get(class_name)
+        if not isinstance(classmd, ClassMd) or depth >= self.max_chain:
+            return None
+        module = self.module_names[classmd.location]
+        outside = None
+        for parent in classmd.parents:
+            parent_class = self.__resolve_path(module, parent, depth + 1)
+            if isinstance(parent_class, External):
+                outside = outside or External(f"{parent_class.name}.{method}")
+            elif isinstance(parent_class, ClassMd):
+                found = self.__method(self.qualified_name(parent_class), method, depth + 1)
+                if found is not None:
+                    return found
+        return outside
@@ -0,0 +1,68 @@
+"""
+Serves the analysis of one or more repositories, keeping them loaded between queries
+
+Usage:
+python main.py path/to/repo [name=path/to/other ...] [--port 8000 | --unix /tmp/analyzer.sock]
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from libraries.mapper import Analyzer
+from libraries.server import AnalysisServer
+
+
+def parse_repositories(values: list[str]) -> dict[str, str]:
+    """
+    Turns "name=path" or "path" arguments into a dictionary of paths by name, the name defaults to the directory's
+    """
+    repositories = {}
+    for value in values:
+        name, separator, path = value.partition("=")
+        if not separator:
+            name, path = Path(value).resolve().name, value
+        repositories[name] = path
+    return repositories
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "repositories", nargs="+", help="directories to be analyzed or snapshots of them, as path or name=path"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--unix", help="path of a Unix socket to listen on instead of host and port")
+    parser.add_argument("--cache-dir", help="directory where the parsed files are cached between runs")
+    parser.add_argument("--jobs", type=int, help="number of processes used to parse the files")
+    parser.add_argument("--lazy", action="store_true", help="only parse files once a query reaches them")
+    parser.add_argument("--lean", action="store_true", help="drop the ASTs of the models once they are built")
+    parser.add_argument(
+        "--external-depth", type=int, default=0, help="number of calls followed into installed packages"
+    )
+    args = parser.parse_args()
+
+    analyzers = {}
+    for name, path in parse_repositories(args.repositories).items():
+        if Path(path).is_file():
+            # Snapshot written by Analyzer.to_snapshot
+            analyzers[name] = Analyzer.from_snapshot(
+                path, cache_dir=args.cache_dir, jobs=args.jobs, lean=args.lean, external_depth=args.external_depth
+            )
+        else:
+            analyzers[name] = Analyzer(
+                path,
+                cache_dir=args.cache_dir,
+                jobs=args.jobs,
+                lazy=args.lazy,
+                lean=args.lean,
+                external_depth=args.external_depth,
+            )
+        print(f"loaded {name} from {path}")
+    server = AnalysisServer(analyzers)
+    print(f"serving on {args.unix or f'http://{args.host}:{args.port}'}")
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
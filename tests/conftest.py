@@ -0,0 +1,166 @@
+from pathlib import Path
+
+import pytest
+
+from libraries.call_graph import adjust_call, handle_list_of_models
+from libraries.models.unknown_func import UnknownFuncMd
+
+FILES = {
+    "pkg/__init__.py": "",
+    "pkg/core.py": """from pkg.helpers import Loader, normalize
+
+
+def run(items):
+    loader = Loader()
+    for item in items:
+        process(item)
+    report()
+
+
+def process(item):
+    value = normalize(item)
+    validate(value)
+    print(value)
+
+
+def validate(value):
+    if value:
+        process(value)
+    check(value)
+
+
+def check(value):
+    check(value)
+""",
+    "pkg/helpers.py": """import os
+
+
+def normalize(item):
+    name = os.path.basename(item)
+    read()
+
+
+class Loader:
+    def __init__(self):
+        self.load()
+
+    def load(self):
+        data = read()
+        self.parse(data)
+
+    def parse(self, data):
+        json.loads(data)
+
+
+class Plain:
+    def method(self):
+        normalize("x")
+
+
+def read():
+    path = os.path.join("a", "b")
+""",
+    "tasks/task.py": """from pkg.core import run
+from pkg.helpers import Plain
+
+
+def main():
+    run([])
+    Plain()
+    report()
+
+
+def report():
+    summary = Summary()
+    normalize("y")
+
+
+class Summary:
+    def __init__(self):
+        self.total = count()
+
+
+def count():
+    pass
+""",
+}
+
+# Names defined in FILES, every one of them can be mapped
+NAMES = [
+    "run",
+    "process",
+    "validate",
+    "check",
+    "normalize",
+    "Loader",
+    "load",
+    "parse",
+    "Plain",
+    "method",
+    "read",
+    "main",
+    "report",
+    "Summary",
+    "count",
+]
+
+
+def write_files(root: Path, files: dict[str, str]) -> Path:
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
+
+
+@pytest.fixture
+def repository(tmp_path) -> Path:
+    return write_files(tmp_path / "repository", FILES)
+
+
+def label(model) -> str | None:
+    """
+    Name of a model that can be compared across analyses, unlike the models themselves
+    """
+    if model is None:
+        return None
+    if isinstance(model, UnknownFuncMd):
+        return f"?{model.name}"
+    return f"{model.location.name}:{model.lineno}:{model.name}"
+
+
+def map_labels(calls_map: dict) -> list:
+    return [[label(model), map_labels(submap)] for model, submap in calls_map.items()]
+
+
+def baseline_calls_map(raw_map: dict, call_name: str, show_unknowns: bool = False) -> dict:
+    """
+    Map created the way Analyzer.create_calls_map did before the calls were indexed, by recursion over the raw_map
+    """
+    app_map = {}
+    calls_used = []
+    call = raw_map[call_name]
+    if isinstance(call, list):
+        call = handle_list_of_models(call)
+
+    def internal_func(call, app_map: dict):
+        calls_used.append(call)
+        call = adjust_call(call)
+        if call not in app_map:
+            app_map[call] = {}
+        if call is None:
+            return app_map
+        for subcall_name in call.calls:
+            if subcall_name not in raw_map:
+                if show_unknowns:
+                    subcall = UnknownFuncMd(subcall_name)
+                else:
+                    continue
+            else:
+                subcall = adjust_call(raw_map[subcall_name])
+                if subcall is None or subcall in calls_used[:-3]:
+                    continue
+            internal_func(subcall, app_map[call])
+        return app_map
+
+    return internal_func(call, app_map)
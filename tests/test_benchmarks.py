@@ -0,0 +1,68 @@
+from benchmarks import model_build, runner
+from benchmarks.generator import RepoSpec, generate_repo
+from libraries.mapper import Analyzer
+from tests.conftest import baseline_calls_map, map_labels
+
+SPEC = RepoSpec(files=12, functions=4, classes=1, methods=2, fan_out=3, layers=3, files_per_package=5, seed=7)
+
+
+def contents(paths):
+    return [(path.name, path.read_text()) for path in paths]
+
+
+def test_generator_is_deterministic(tmp_path):
+    first = generate_repo(tmp_path / "first", SPEC)
+    second = generate_repo(tmp_path / "second", SPEC)
+    assert len(first) == SPEC.files
+    assert contents(first) == contents(second)
+    other = generate_repo(tmp_path / "other", RepoSpec(**dict(SPEC.to_dict(), seed=8)))
+    assert contents(first) != contents(other)
+
+
+def test_generator_replaces_the_directory(tmp_path):
+    path = tmp_path / "repository"
+    generate_repo(path, SPEC)
+    (path / "stale.py").write_text("def stale():\n    pass\n")
+    generate_repo(path, SPEC)
+    assert not (path / "stale.py").exists()
+
+
+def test_generated_repository_is_analyzed_like_the_baseline(tmp_path):
+    generate_repo(tmp_path / "repository", SPEC)
+    analyzer = Analyzer(str(tmp_path / "repository"), jobs=1)
+    assert analyzer.models_list
+    for name in list(analyzer.raw_map)[:20]:
+        for show_unknowns in (False, True):
+            expected = map_labels(baseline_calls_map(analyzer.raw_map, name, show_unknowns))
+            assert map_labels(analyzer.create_calls_map(name, show_unknowns)) == expected
+
+
+def test_run_reports_every_phase(tmp_path):
+    generate_repo(tmp_path / "repository", SPEC)
+    results = runner.run(tmp_path / "repository", queries=5, repeat=1)
+    assert set(results["phases"]) == set(runner.PHASES + ["analyzer"])
+    assert results["counts"]["files"] == SPEC.files
+    assert results["counts"]["queries"] == 5
+    assert results["counts"]["models"] == len(Analyzer(str(tmp_path / "repository"), jobs=1).models_list)
+    assert not runner.compare(results, results)
+    assert runner.report(results, results).splitlines()[0].startswith("phase")
+
+
+def test_compare_ignores_noise():
+    baseline = {"phases": {"parsing": {"seconds": 0.001, "peak_kb": 100}, "traversal": {"seconds": 1, "peak_kb": 100}}}
+    results = {
+        "phases": {
+            "parsing": {"seconds": 0.002, "peak_kb": 200},
+            "traversal": {"seconds": 1.5, "peak_kb": 100},
+            "rendering": {"seconds": 9, "peak_kb": 9999},
+        }
+    }
+    assert runner.compare(results, baseline) == [
+        {"phase": "traversal", "metric": "seconds", "baseline": 1, "current": 1.5}
+    ]
+
+
+def test_model_build_counts():
+    results = model_build.run(functions=25, per_file=10, repeat=1)
+    assert results["files"] == 3
+    assert results["models"] >= 25
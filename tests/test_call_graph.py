@@ -0,0 +1,79 @@
+import pytest
+
+from libraries.call_graph import CallGraph, handle_list_of_models
+from libraries.mapper import Analyzer
+from tests.conftest import NAMES, baseline_calls_map, label, map_labels, write_files
+
+
+@pytest.mark.parametrize("show_unknowns", [False, True])
+def test_calls_map_matches_baseline(repository, show_unknowns):
+    analyzer = Analyzer(repository)
+    for name in NAMES:
+        expected = map_labels(baseline_calls_map(analyzer.raw_map, name, show_unknowns))
+        assert map_labels(analyzer.create_calls_map(name, show_unknowns)) == expected, name
+
+
+def test_cycles_end(repository):
+    analyzer = Analyzer(repository)
+    # A call is expanded again only while it's one of the last three visits
+    check = []
+    for _ in range(4):
+        check = [["core.py:23:check", check]]
+    assert map_labels(analyzer.create_calls_map("check")) == check
+    # validate -> process -> validate is cut as soon as validate isn't one of them
+    normalize = ["helpers.py:4:normalize", [["helpers.py:26:read", []]]]
+    expected = [["core.py:17:validate", [["core.py:11:process", [normalize]], *check]]]
+    assert map_labels(analyzer.create_calls_map("validate")) == expected
+
+
+def test_canonical_ids(repository):
+    graph = Analyzer(repository).call_graph
+    ids = {label(model): symbol for symbol, model in enumerate(graph.models)}
+    # Classes are visited as their __init__, and classes without one aren't visited at all
+    assert graph.canonical[ids["helpers.py:9:Loader"]] == ids["helpers.py:10:__init__"]
+    assert graph.canonical[ids["helpers.py:21:Plain"]] == -1
+    assert graph.canonical[ids["core.py:4:run"]] == ids["core.py:4:run"]
+    assert graph.callees(ids["helpers.py:9:Loader"]) == graph.callees(ids["helpers.py:21:Plain"])
+
+
+def test_unknown_ids(repository):
+    graph = Analyzer(repository).call_graph
+    assert all(graph.is_unknown(symbol) for symbol in graph.unknown_ids.values())
+    assert sorted(graph.unknown_ids.values()) == list(range(len(graph), len(graph) + len(graph.unknown_names)))
+    assert sorted(graph.unknown_names) == ["basename", "join", "loads", "print"]
+    # Each name gets a single id, however many models call it
+    assert len(set(graph.unknown_names)) == len(graph.unknown_names)
+
+
+def test_fan_in(repository):
+    graph = Analyzer(repository).call_graph
+    ids = {label(model): symbol for symbol, model in enumerate(graph.models)}
+    assert graph.fan_in[ids["helpers.py:26:read"]] == 2
+    assert graph.fan_in[ids["helpers.py:4:normalize"]] == 3
+    assert graph.fan_in[ids["task.py:5:main"]] == 0
+
+
+def test_collisions_prefer_task_then_discovery_order(tmp_path):
+    files = {
+        "a.py": "def helper():\n    first()\n\n\ndef first():\n    pass\n",
+        "b/task.py": "def helper():\n    second()\n\n\ndef second():\n    pass\n",
+        "c.py": "def helper():\n    pass\n\n\ndef shared():\n    pass\n",
+        "d.py": "def shared():\n    helper()\n",
+    }
+    analyzer = Analyzer(write_files(tmp_path, files), jobs=1)
+    assert label(handle_list_of_models(analyzer.raw_map["helper"])) == "task.py:1:helper"
+    # Without a task.py, the model of the file that was found first
+    found_first = min(analyzer.raw_map["shared"], key=lambda model: analyzer.files_paths.index(model.location))
+    assert handle_list_of_models(analyzer.raw_map["shared"]) is found_first
+    assert map_labels(analyzer.create_calls_map("helper")) == [["task.py:1:helper", [["task.py:5:second", []]]]]
+
+
+def test_from_targets(repository):
+    analyzer = Analyzer(repository)
+    graph = analyzer.call_graph
+    rebuilt = CallGraph.from_targets(
+        analyzer.raw_map, analyzer.models_list, analyzer.symbols, graph.offsets, graph.targets, graph.unknown_names
+    )
+    for name in NAMES:
+        root = graph.root(name)
+        assert map_labels(rebuilt.calls_map(root, True)) == map_labels(graph.calls_map(root, True))
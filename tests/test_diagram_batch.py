@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from libraries.diagram_batch import diagram_file_name
+from libraries.mapper import Analyzer
+from tests.conftest import NAMES, write_files
+
+
+@pytest.fixture
+def analyzer(repository):
+    return Analyzer(repository)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_same_as_create_diagram(analyzer, tmp_path, workers):
+    summary = analyzer.create_diagrams(tmp_path, call_names=NAMES, show_unknowns=True, workers=workers)
+    assert summary["count"] == len(NAMES)
+    for name, entry in zip(NAMES, summary["diagrams"]):
+        assert entry["name"] == name
+        assert (tmp_path / entry["file"]).read_text() == analyzer.create_diagram(name, True)
+    assert json.loads((tmp_path / "index.json").read_text()) == json.loads(json.dumps(summary))
+
+
+def test_predicate(analyzer, tmp_path):
+    summary = analyzer.create_diagrams(tmp_path, predicate=lambda model: model.location.name == "task.py")
+    entries = {entry["name"]: entry for entry in summary["diagrams"]}
+    assert set(entries) == {"main", "report", "count", "Summary", "Summary.__init__"}
+    assert entries["main"]["source"].endswith("task.py:5")
+    # Diagrams of a class and of its __init__ only differ by their title
+    assert entries["Summary"]["file"] == "Summary.mmd"
+    code = (tmp_path / "Summary.mmd").read_text()
+    assert (
+        code.replace("Summary workflow", "Summary.__init__ workflow") == (tmp_path / "Summary.__init__.mmd").read_text()
+    )
+    assert summary["count"] == 5
+
+
+def test_names_and_predicate(analyzer, tmp_path):
+    summary = analyzer.create_diagrams(tmp_path, call_names=["run"], predicate=lambda model: model.name == "count")
+    assert [entry["name"] for entry in summary["diagrams"]] == ["run", "count"]
+
+
+def test_file_names(tmp_path):
+    files = {
+        "a.py": "def helper():\n    pass\n",
+        "b.py": "def helper():\n    pass\n",
+        "c.py": "class Weird:\n    def run(self):\n        pass\n",
+    }
+    analyzer = Analyzer(write_files(tmp_path / "repository", files))
+    summary = analyzer.create_diagrams(tmp_path / "out", predicate=lambda model: True)
+    second = analyzer.raw_map["helper"][1]
+    # Models with the same name in different files are told apart by the file
+    assert sorted(entry["file"] for entry in summary["diagrams"]) == sorted(
+        ["helper.mmd", f"{second.location.stem}.helper.mmd", "Weird.mmd", "Weird.run.mmd"]
+    )
+    taken = {"helper"}
+    model = analyzer.raw_map["helper"][0]
+    assert diagram_file_name(model, taken) == f"{model.location.stem}.helper"
+    assert diagram_file_name(model, taken) == f"{model.location.stem}.helper_2"
+
+
+def test_errors(analyzer, tmp_path):
+    with pytest.raises(ValueError):
+        analyzer.create_diagrams(tmp_path)
+    with pytest.raises(IndexError):
+        analyzer.create_diagrams(tmp_path, call_names=["missing"])
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+from python_mermaid.diagram import Link, MermaidDiagram, Node
+
+from libraries.diagram_maker import Diagram, iter_map_edges, node_label
+from libraries.mapper import Analyzer
+from tests.conftest import NAMES
+
+
+def baseline_diagram(calls_map: dict, title: str) -> str:
+    """
+    Diagram created the way Diagram did before it was streamed, from every node and link of the map
+    """
+    nodes = set()
+    links = []
+
+    def internal_func(map):
+        for key, values in map.items():
+            key_node = Node(node_label(key))
+            nodes.add(key_node)
+            for value in values:
+                value_node = Node(node_label(value))
+                nodes.add(value_node)
+                links.append(Link(key_node, value_node))
+            internal_func(values)
+
+    internal_func(calls_map)
+    return str(MermaidDiagram(title, list(nodes), links))
+
+
+def lines(diagram_code: str) -> set[str]:
+    return set(diagram_code.splitlines())
+
+
+def has_none(calls_map: dict) -> bool:
+    return any(key is None or has_none(values) for key, values in calls_map.items())
+
+
+@pytest.fixture
+def analyzer(repository):
+    return Analyzer(repository)
+
+
+def test_matches_baseline(analyzer):
+    for name in NAMES:
+        calls_map = analyzer.create_calls_map(name)
+        if has_none(calls_map):
+            # Classes without __init__ broke the diagram before
+            continue
+        expected = baseline_diagram(calls_map, f"{name} workflow")
+        assert lines(analyzer.create_diagram(name)) == lines(expected), name
+        assert lines(Diagram(calls_map, f"{name} workflow").diagram_code) == lines(expected), name
+
+
+def test_edges_written_once(analyzer):
+    code = analyzer.create_diagram("validate")
+    assert code.count("validate ---> process") == 1
+    assert code.count("check ---> check") == 1
+    body = code.splitlines()[4:]
+    assert len(body) == len(set(body))
+
+
+def test_map_and_edges_render_the_same(analyzer):
+    for name in NAMES:
+        calls_map = analyzer.create_calls_map(name)
+        from_map = Diagram(calls_map, "title", max_depth=1, max_nodes=4).diagram_code
+        from_edges = Diagram(iter_map_edges(calls_map), "title", max_depth=1, max_nodes=4).diagram_code
+        assert from_map == from_edges
+
+
+def test_max_depth(analyzer):
+    diagram = Diagram(analyzer.iter_calls("run", max_depth=2), "run workflow", max_depth=1)
+    code = diagram.diagram_code
+    assert diagram.truncated
+    assert "loader.load" not in lines(code) and "run ---> process" in lines(code)
+    # Only the direct calls left out are counted
+    assert 'process_more["… 2 more"]' in lines(code)
+    assert 'loader.__init___more["… 1 more"]' in lines(code)
+    assert code == analyzer.create_diagram("run", max_depth=1)
+    assert not Diagram(analyzer.create_calls_map("run"), "run workflow", max_depth=10).truncated
+
+
+def test_max_nodes_stops_the_traversal(analyzer):
+    code = analyzer.create_diagram("run", max_nodes=3)
+    assert sum(1 for line in lines(code) if line.endswith('"]') and "more" not in line) == 3
+    assert 'loader.load_more["… 1 more"]' in lines(code)
+    latest = analyzer.stats()["queries"]["latest"][-1]
+    # The first node past the budget is visited, nothing after it
+    assert latest["nodes"] == 4
+
+
+def test_create_diagram_file(analyzer, tmp_path):
+    path = tmp_path / "run.mmd"
+    analyzer.create_diagram("run", path=path)
+    assert path.read_text() == analyzer.create_diagram("run")
+
+
+def test_create_diagrams(analyzer, tmp_path):
+    summary = analyzer.create_diagrams(tmp_path, call_names=["run", "report", "run"], max_depth=1)
+    entries = summary["diagrams"]
+    assert summary["count"] == 2
+    assert [entry["file"] for entry in entries] == ["run.mmd", "report.mmd", "run.mmd"]
+    # Roots leading to the same model share the entry of the first one
+    assert [set(entry) for entry in entries[1:]] == [set(entries[0])] * 2
+    assert entries[2]["truncated"] is entries[0]["truncated"] is True
+    for name in ("run", "report"):
+        assert (tmp_path / f"{name}.mmd").read_text() == analyzer.create_diagram(name, max_depth=1)
+    assert json.loads((tmp_path / "index.json").read_text())["diagrams"] == entries
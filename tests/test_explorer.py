@@ -0,0 +1,38 @@
+import pytest
+
+from libraries.explorer import IgnoreRules
+
+
+@pytest.mark.parametrize(
+    "patterns, path, is_dir, expected",
+    [
+        # Anchored patterns only match from the directory they were declared in
+        (["/build"], "build", True, True),
+        (["/build"], "sub/build", True, None),
+        (["/build/"], "build", True, True),
+        (["/build/"], "sub/build", True, None),
+        (["docs/build"], "docs/build", True, True),
+        (["docs/build"], "sub/docs/build", True, None),
+        # Unanchored patterns match any name
+        (["build"], "sub/build", True, True),
+        (["*.py"], "sub/module.py", False, True),
+        # A trailing slash only matches directories
+        (["build/"], "sub/build", True, True),
+        (["build/"], "sub/build", False, None),
+        (["/build/"], "build", False, None),
+        # Negated patterns re-include what an earlier one ignored
+        (["*.py", "!keep.py"], "sub/keep.py", False, False),
+        (["*.py", "!keep.py"], "sub/drop.py", False, True),
+        (["/build/", "!/build/"], "build", True, False),
+        (["!/build/"], "sub/build", True, None),
+    ],
+)
+def test_match(patterns, path, is_dir, expected):
+    assert IgnoreRules(patterns).match(path, is_dir) is expected
+
+
+def test_match_relative_to_base():
+    rules = IgnoreRules(["/build/"], base="pkg")
+    assert rules.match("pkg/build", True) is True
+    assert rules.match("pkg/sub/build", True) is None
+    assert rules.match("build", True) is None
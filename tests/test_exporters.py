@@ -0,0 +1,113 @@
+import json
+from collections import Counter
+
+import pytest
+
+from libraries.exporters import FORMATS, LEVELS, AggregatedGraph, group_names
+from libraries.mapper import Analyzer
+
+
+@pytest.fixture
+def analyzer(repository):
+    return Analyzer(str(repository), jobs=1)
+
+
+def brute_force(analyzer: Analyzer, level: str, show_unknowns: bool) -> tuple[Counter, Counter, Counter]:
+    """
+    Models, calls inside each node and calls between nodes, counted one call at a time
+    """
+    graph = analyzer.call_graph
+    models_count = len(graph.models)
+
+    def node(symbol: int) -> str | None:
+        if symbol >= models_count:
+            if not show_unknowns:
+                return None
+            return f"?{graph.unknown_names[symbol - models_count]}" if level == "definition" else "?"
+        if graph.canonical[symbol] != symbol:
+            return None
+        return group_names(graph.models[symbol], level, analyzer.symbols)[0]
+
+    definitions = Counter(node(symbol) for symbol in range(models_count) if node(symbol) is not None)
+    internal = Counter()
+    edges = Counter()
+    for symbol in range(models_count):
+        caller = node(symbol)
+        if caller is None:
+            continue
+        for target in graph.targets[graph.offsets[symbol] : graph.offsets[symbol + 1]]:
+            callee = node(target)
+            if callee == caller:
+                internal[caller] += 1
+            elif callee is not None:
+                edges[(caller, callee)] += 1
+    return definitions, internal, edges
+
+
+@pytest.mark.parametrize("level", LEVELS)
+@pytest.mark.parametrize("show_unknowns", [False, True])
+def test_aggregation_counts(analyzer, level, show_unknowns):
+    aggregated = AggregatedGraph.from_graph(analyzer.call_graph, analyzer.symbols, level, show_unknowns)
+    definitions, internal, edges = brute_force(analyzer, level, show_unknowns)
+    assert {name: count for name, count in zip(aggregated.nodes, aggregated.definitions) if count} == definitions
+    assert {name: count for name, count in zip(aggregated.nodes, aggregated.internal_calls) if count} == internal
+    names = aggregated.nodes
+    assert {(names[caller], names[callee]): calls for caller, callee, calls in aggregated.edges} == edges
+
+
+def test_group_names(analyzer):
+    method = analyzer.symbols.definitions["pkg.helpers.Loader.load"]
+    assert [group_names(method, level, analyzer.symbols) for level in LEVELS] == [
+        ("pkg.helpers.Loader.load", "pkg.helpers"),
+        ("pkg.helpers.Loader", "pkg.helpers"),
+        ("pkg.helpers", "pkg"),
+        ("pkg", ""),
+    ]
+    task = analyzer.symbols.definitions["tasks.task.main"]
+    # tasks isn't a package, but its modules are still grouped under it
+    assert group_names(task, "package", analyzer.symbols) == ("tasks", "")
+
+
+def test_roots(analyzer):
+    aggregated = AggregatedGraph.from_graph(
+        analyzer.call_graph, analyzer.symbols, "definition", roots=[analyzer.call_graph.root("process")]
+    )
+    assert sorted(aggregated.nodes) == sorted(
+        ["pkg.core.process", "pkg.core.validate", "pkg.core.check", "pkg.helpers.normalize", "pkg.helpers.read"]
+    )
+
+
+def test_formats(analyzer, tmp_path):
+    module_graph = json.loads(analyzer.export_graph("module", "json"))
+    assert module_graph["title"] == "repository module calls"
+    assert {node["name"] for node in module_graph["nodes"]} == {"pkg.core", "pkg.helpers", "tasks.task"}
+    assert {"callee": "pkg.core", "calls": 1} in module_graph["adjacency"]["tasks.task"]
+    dot = analyzer.export_graph("module", "dot", call_name="main")
+    assert dot.startswith('digraph "main module calls" {')
+    assert dot.count("subgraph") == 2
+    mermaid = analyzer.export_graph("class", "mermaid", show_unknowns=True)
+    assert "title: repository class calls" in mermaid
+    for format in FORMATS:
+        analyzer.export_graph("package", format, tmp_path / f"graph.{format}")
+        assert (tmp_path / f"graph.{format}").read_text() == analyzer.export_graph("package", format)
+
+
+def test_invalid_level_and_format(analyzer):
+    with pytest.raises(ValueError):
+        analyzer.export_graph("galaxy", "json")
+    with pytest.raises(ValueError):
+        analyzer.export_graph("module", "svg")
+    with pytest.raises(IndexError):
+        analyzer.export_graph("module", "json", call_name="missing")
+
+
+def test_lazy_export(repository):
+    eager = Analyzer(str(repository), jobs=1)
+    for call_name in (None, "run"):
+        lazy = Analyzer(str(repository), jobs=1, lazy=True)
+        expected = json.loads(eager.export_graph("definition", "json", call_name=call_name))
+        exported = json.loads(lazy.export_graph("definition", "json", call_name=call_name))
+        assert sorted(node["name"] for node in exported["nodes"]) == sorted(node["name"] for node in expected["nodes"])
+        assert {name: sorted(calls, key=str) for name, calls in exported["adjacency"].items()} == {
+            name: sorted(calls, key=str) for name, calls in expected["adjacency"].items()
+        }
@@ -0,0 +1,108 @@
+import pytest
+
+from libraries.external import ExternalIndex
+from libraries.mapper import Analyzer
+from tests.conftest import map_labels, write_files
+
+SITE_FILES = {
+    "fakepkg/__init__.py": "from .impl import helper\n",
+    "fakepkg/impl.py": """from fakepkg.other import far
+
+
+def helper():
+    inner()
+
+
+def inner():
+    far()
+""",
+    "fakepkg/other.py": "def far():\n    pass\n",
+    "fakepkg/broken.py": "def broken(:\n",
+}
+
+APP_FILES = {
+    "app.py": """import fakepkg
+import math
+
+
+def main():
+    fakepkg.helper()
+    math.sqrt(2)
+    far()
+
+
+def far():
+    pass
+""",
+}
+
+MAIN_CALLS = [["?sqrt", []], ["app.py:11:far", []]]
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    write_files(tmp_path / "site", SITE_FILES)
+    monkeypatch.syspath_prepend(str(tmp_path / "site"))
+    return tmp_path / "site"
+
+
+@pytest.fixture
+def app(tmp_path, site):
+    write_files(tmp_path / "app", APP_FILES)
+    return tmp_path / "app"
+
+
+def analyze(app, external_depth: int) -> Analyzer:
+    return Analyzer(str(app), jobs=1, external_depth=external_depth, external_cache_dir=app.parent / "cache")
+
+
+def test_without_externals(app):
+    analyzer = analyze(app, 0)
+    assert map_labels(analyzer.create_calls_map("main", True)) == [["app.py:5:main", [["?helper", []]] + MAIN_CALLS]]
+    assert analyzer.external_models == []
+
+
+@pytest.mark.parametrize(
+    "external_depth, helper_calls",
+    [
+        (1, [["impl.py:8:inner", [["?far", []]]]]),
+        (2, [["impl.py:8:inner", [["?far", []]]]]),
+        (3, [["impl.py:8:inner", [["other.py:1:far", []]]]]),
+    ],
+)
+def test_external_depth(app, external_depth, helper_calls):
+    analyzer = analyze(app, external_depth)
+    # The far of the installed package is never taken for the one of the directory, nor the other way around
+    assert map_labels(analyzer.create_calls_map("main", True)) == [
+        ["app.py:5:main", [["impl.py:4:helper", helper_calls]] + MAIN_CALLS]
+    ]
+    assert list(analyzer.raw_map) == ["main", "far"]
+    assert all(model not in analyzer.models_list for model in analyzer.external_models)
+
+
+def test_external_models_are_cached(app):
+    first = analyze(app, 3)
+    first_map = map_labels(first.create_calls_map("main", True))
+    assert first.instrumentation.counters["external_files"] == 3
+    index = ExternalIndex(cache_dir=app.parent / "cache")
+    _, path = index.find_module("fakepkg.impl.helper")
+    assert index.cache.load(path) is not None
+    second = analyze(app, 3)
+    assert map_labels(second.create_calls_map("main", True)) == first_map
+
+
+def test_find_module(site, tmp_path):
+    index = ExternalIndex(cache_dir=tmp_path / "cache")
+    assert index.find_module("fakepkg.impl.helper") == ("fakepkg.impl", site / "fakepkg" / "impl.py")
+    assert index.find_module("fakepkg.helper") == ("fakepkg", site / "fakepkg" / "__init__.py")
+    # Builtin modules can't be followed
+    assert index.find_module("sys.exit") is None
+    assert index.find_module("missing_package.run") is None
+
+
+def test_unparsable_module(site, tmp_path):
+    index = ExternalIndex(cache_dir=tmp_path / "cache")
+    assert index.load(site / "fakepkg" / "broken.py") is None
+    functions, classes, import_map = index.load(site / "fakepkg" / "impl.py")
+    assert [funcmd.name for funcmd in functions] == ["helper", "inner"]
+    assert import_map.names == {"far": "fakepkg.other.far"}
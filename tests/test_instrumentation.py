@@ -0,0 +1,95 @@
+import json
+import pstats
+from contextlib import contextmanager
+
+from libraries.instrumentation import Instrumentation, ProfilerHook
+from libraries.mapper import Analyzer
+from libraries.models.class_def import ClassMd, MethodMd
+from libraries.models.function_def import FunctionMd
+from tests.conftest import map_labels
+
+
+def test_phases_are_summed():
+    instrumentation = Instrumentation()
+    for _ in range(3):
+        with instrumentation.phase("parsing"):
+            pass
+    assert instrumentation.phases["parsing"]["calls"] == 3
+    assert instrumentation.phases["parsing"]["seconds"] >= 0
+
+
+def test_phase_is_recorded_when_it_raises():
+    instrumentation = Instrumentation()
+    try:
+        with instrumentation.phase("parsing"):
+            raise ValueError
+    except ValueError:
+        pass
+    assert instrumentation.phases["parsing"]["calls"] == 1
+
+
+def test_slowest_files_are_kept():
+    instrumentation = Instrumentation()
+    instrumentation.slowest_files = 3
+    for number in range(10):
+        instrumentation.file_parsed(f"file_{number}.py", number / 10, 100)
+    report = instrumentation.to_dict()
+    assert [entry["path"] for entry in report["slowest_files"]] == ["file_9.py", "file_8.py", "file_7.py"]
+    assert report["counters"] == {"files_parsed": 10, "bytes_read": 1000}
+
+
+def test_analyzer_stats(repository):
+    analyzer = Analyzer(str(repository), jobs=1)
+    analyzer.create_calls_map("run", show_unknowns=True)
+    stats = analyzer.stats()
+    for phase in ("discovery", "parsing", "raw_map_merge", "call_graph", "traversal"):
+        assert stats["phases"][phase]["calls"] >= 1
+    assert stats["files"]["discovered"] == len(analyzer.files_paths) == 4
+    assert stats["files"]["parsed"] == 4
+    assert stats["files"]["bytes_read"] == sum(path.stat().st_size for path in analyzer.files_paths)
+    models = analyzer.models_list
+    assert stats["models"] == {
+        "functions": sum(type(model) is FunctionMd for model in models),
+        "classes": sum(type(model) is ClassMd for model in models),
+        "methods": sum(type(model) is MethodMd for model in models),
+    }
+    collisions = [value for value in analyzer.raw_map.values() if isinstance(value, list)]
+    assert stats["raw_map"]["names"] == len(analyzer.raw_map)
+    assert stats["raw_map"]["collisions"] == len(collisions)
+    latest = stats["queries"]["latest"]
+    assert stats["queries"]["count"] == 1
+    assert [query["call_name"] for query in latest] == ["run"]
+    assert latest[0]["nodes"] == stats["queries"]["nodes_visited"] > 0
+
+
+def test_instrumented_maps_match(repository):
+    hook_phases = []
+
+    @contextmanager
+    def hook(phase):
+        hook_phases.append(phase)
+        yield
+
+    plain = Analyzer(str(repository), jobs=1)
+    hooked = Analyzer(str(repository), jobs=1, phase_hook=hook)
+    assert "parsing" in hook_phases
+    for name in plain.raw_map:
+        assert map_labels(hooked.create_calls_map(name, True)) == map_labels(plain.create_calls_map(name, True))
+    assert hook_phases.count("traversal") == len(plain.raw_map)
+
+
+def test_profiler_hook(repository, tmp_path):
+    hook = ProfilerHook(["parsing"])
+    Analyzer(str(repository), jobs=1, phase_hook=hook)
+    assert list(hook.profilers) == ["parsing"]
+    assert isinstance(hook.stats("parsing"), pstats.Stats)
+    hook.dump(tmp_path / "profiles")
+    assert (tmp_path / "profiles" / "parsing.prof").is_file()
+
+
+def test_dump_stats(repository, tmp_path):
+    analyzer = Analyzer(str(repository), jobs=1)
+    analyzer.dump_stats(tmp_path / "stats.json")
+    dumped = json.loads((tmp_path / "stats.json").read_text())
+    assert dumped["files"] == analyzer.stats()["files"]
+    assert dumped["models"] == analyzer.stats()["models"]
@@ -0,0 +1,65 @@
+import pytest
+
+from libraries.mapper import Analyzer
+from tests.conftest import NAMES, label, map_labels
+
+
+@pytest.fixture
+def eager(repository):
+    return Analyzer(repository, jobs=1)
+
+
+def parsed(analyzer: Analyzer) -> int:
+    return analyzer.stats()["files"]["parsed"]
+
+
+@pytest.mark.parametrize("show_unknowns", [False, True])
+def test_same_maps_as_eager(repository, eager, show_unknowns):
+    lazy = Analyzer(repository, lazy=True)
+    for name in NAMES:
+        assert map_labels(lazy.create_calls_map(name, show_unknowns)) == map_labels(
+            eager.create_calls_map(name, show_unknowns)
+        ), name
+
+
+def test_each_query_on_its_own(repository, eager):
+    # The files loaded by earlier queries never change what a later one maps
+    for name in NAMES:
+        lazy = Analyzer(repository, lazy=True)
+        assert map_labels(lazy.create_calls_map(name, True)) == map_labels(eager.create_calls_map(name, True)), name
+
+
+def test_only_reachable_files_are_parsed(repository):
+    lazy = Analyzer(repository, lazy=True)
+    assert parsed(lazy) == 0
+    assert len(lazy.files_paths) == 4
+    lazy.create_calls_map("count")
+    assert parsed(lazy) == 1
+    lazy.create_calls_map("normalize")
+    assert parsed(lazy) == 2
+    lazy.create_calls_map("main")
+    # pkg/__init__.py defines nothing that's called
+    assert parsed(lazy) == 3
+
+
+def test_load_all(repository, eager):
+    lazy = Analyzer(repository, lazy=True)
+    lazy.create_calls_map("count")
+    lazy.load_all()
+    assert parsed(lazy) == 4
+    assert sorted(map(label, lazy.models_list)) == sorted(map(label, eager.models_list))
+    assert lazy.raw_map.keys() == eager.raw_map.keys()
+
+
+def test_qualified_and_missing_names(repository, eager):
+    lazy = Analyzer(repository, lazy=True)
+    assert map_labels(lazy.create_calls_map("pkg.core.run")) == map_labels(eager.create_calls_map("run"))
+    with pytest.raises(IndexError):
+        lazy.create_calls_map("missing")
+
+
+def test_definitions_index(repository):
+    lazy = Analyzer(repository, lazy=True)
+    assert {path.name for path in lazy.definitions_index["normalize"]} == {"helpers.py"}
+    assert {path.name for path in lazy.definitions_index["__init__"]} == {"helpers.py", "task.py"}
+    assert "value" not in lazy.definitions_index
@@ -0,0 +1,74 @@
+import ast
+
+import pytest
+
+from libraries.mapper import Analyzer
+from libraries.models.class_def import ClassMd, MethodMd
+from libraries.models.exceptions import DefinitionNotFoundError
+from libraries.models.function_def import FunctionMd
+from libraries.models.unknown_func import UnknownFuncMd
+from libraries.rules import MAX_BROWSER_BUG
+from tests.conftest import map_labels, write_files
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_lean_maps_match(repository, jobs):
+    plain = Analyzer(str(repository), jobs=1)
+    lean = Analyzer(str(repository), jobs=jobs, lean=True)
+    assert [model.name for model in lean.models_list] == [model.name for model in plain.models_list]
+    for name in plain.raw_map:
+        for show_unknowns in (False, True):
+            assert map_labels(lean.create_calls_map(name, show_unknowns)) == map_labels(
+                plain.create_calls_map(name, show_unknowns)
+            )
+
+
+def test_lean_models_drop_their_source(repository):
+    analyzer = Analyzer(str(repository), jobs=1, lean=True)
+    assert all(model._source is None for model in analyzer.models_list)
+
+
+def test_released_source_is_loaded_again(repository):
+    plain = Analyzer(str(repository), jobs=1)
+    lean = Analyzer(str(repository), jobs=1, lean=True)
+    for plain_model, lean_model in zip(plain.models_list, lean.models_list):
+        assert ast.dump(lean_model.source) == ast.dump(plain_model.source)
+        assert lean_model.body is lean_model.source.body
+
+
+def test_moved_definition(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text("def first():\n    pass\n")
+    model = FunctionMd(ast.parse(path.read_text()).body[0], path)
+    model.release_source()
+    path.write_text("\n\ndef first():\n    pass\n")
+    with pytest.raises(DefinitionNotFoundError):
+        model.source
+
+
+def test_model_without_location_keeps_its_source():
+    model = FunctionMd(ast.parse("def first():\n    pass\n").body[0])
+    model.release_source()
+    assert model.source.name == "first"
+
+
+@pytest.mark.parametrize("model_class", [FunctionMd, ClassMd, MethodMd, UnknownFuncMd])
+def test_models_have_no_dict(repository, model_class):
+    assert "__dict__" not in dir(model_class)
+    if model_class is UnknownFuncMd:
+        model = UnknownFuncMd("name")
+    else:
+        model = next(model for model in Analyzer(str(repository), jobs=1).models_list if type(model) is model_class)
+    with pytest.raises(AttributeError):
+        model.undeclared = True
+
+
+def test_lean_rules(tmp_path):
+    write_files(
+        tmp_path / "browser",
+        {"test.py": "def test(b):\n    b.set_window_size(1, 2)\n    b.maximize_browser_window()\n"},
+    )
+    analyzer = Analyzer(str(tmp_path / "browser"), jobs=1, lean=True)
+    assert analyzer.identify_max_browser_bug() == [(tmp_path / "browser" / "test.py", 3)]
+    assert analyzer.check_rules([MAX_BROWSER_BUG])
+    assert all(model._source is None for model in analyzer.models_list)
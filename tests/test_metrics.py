@@ -0,0 +1,123 @@
+import csv
+import json
+import random
+
+import numpy as np
+import pytest
+
+from libraries.mapper import Analyzer
+from libraries.metrics import CSV_FIELDS, GraphMetrics
+from tests.conftest import write_files
+
+
+def random_repository(root, seed: int, functions: int = 60, calls: int = 3):
+    """
+    Writes a module of functions making random calls to each other, so cycles and shared callees show up
+    """
+    rng = random.Random(seed)
+    sources = []
+    for number in range(functions):
+        body = [f"    f{rng.randrange(functions)}()" for _ in range(rng.randrange(calls + 1))]
+        if rng.random() < 0.2:
+            body.append("    print()")
+        sources.append(f"def f{number}():\n" + ("\n".join(body) if body else "    pass") + "\n")
+    write_files(root, {"module.py": "\n\n".join(sources)})
+    return root
+
+
+def brute_force(graph) -> tuple[dict, dict]:
+    """
+    Distinct callees and every model reachable from each model, by a plain search
+    """
+    callees = {}
+    for symbol in range(len(graph.models)):
+        if graph.canonical[symbol] == symbol:
+            callees[symbol] = {target for target in graph.callees(symbol) if target < len(graph.models)}
+    reachable = {}
+    for symbol in callees:
+        seen = {symbol}
+        stack = [symbol]
+        while stack:
+            for target in callees.get(stack.pop(), ()):
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        reachable[symbol] = seen
+    return callees, reachable
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_against_brute_force(tmp_path, seed):
+    analyzer = Analyzer(random_repository(tmp_path / "repository", seed), jobs=1)
+    metrics = analyzer.metrics()
+    callees, reachable = brute_force(metrics.graph)
+    assert metrics.fan_out.tolist() == [len(callees.get(symbol, ())) for symbol in range(metrics.size)]
+    assert metrics.fan_in.tolist() == [
+        sum(symbol in targets for targets in callees.values()) for symbol in range(metrics.size)
+    ]
+    # Two models share a component when each one reaches the other
+    for symbol in callees:
+        for other in callees:
+            same = other in reachable[symbol] and symbol in reachable[other]
+            assert (metrics.components[symbol] == metrics.components[other]) == same
+        # Calls between components always go to the lower number
+        assert all(metrics.components[target] <= metrics.components[symbol] for target in callees[symbol])
+        cyclic = any(symbol in reachable[target] for target in callees[symbol])
+        assert metrics.recursive[symbol] == cyclic
+    assert metrics.entry_points.tolist() == [
+        symbol for symbol in callees if all(symbol not in targets for targets in callees.values())
+    ]
+    assert metrics.reachable.tolist() == [len(reachable[symbol]) for symbol in metrics.entry_points.tolist()]
+    assert metrics.pagerank.sum() == pytest.approx(1)
+
+
+def test_reachable_in_several_blocks(tmp_path, monkeypatch):
+    analyzer = Analyzer(random_repository(tmp_path / "repository", 7, functions=300, calls=1), jobs=1)
+    expected = analyzer.metrics().reachable.tolist()
+    assert len(expected) > 64
+    monkeypatch.setattr(GraphMetrics, "block_bits", 64)
+    assert analyzer.metrics().reachable.tolist() == expected
+
+
+def test_repository_metrics(repository):
+    analyzer = Analyzer(str(repository), jobs=1)
+    metrics = analyzer.metrics()
+    summary = metrics.to_dict()
+    cycles = [sorted(cycle) for cycle in summary["cycles"]]
+    assert sorted(cycles) == [["pkg.core.check"], ["pkg.core.process", "pkg.core.validate"]]
+    assert [entry["name"] for entry in summary["entry_points"]] == ["tasks.task.main", "pkg.helpers.Plain.method"]
+    assert summary["entry_points"][0]["reachable"] == len(analyzer.call_subgraph("main").nodes)
+    # Classes are left out, calling them leads to their __init__
+    assert "pkg.helpers.Loader" not in [row["name"] for row in metrics.rows()]
+    assert summary["models"] == len(metrics.rows()) == metrics.size - len(["Loader", "Plain", "Summary"])
+    assert summary["unknown_calls"] == int(metrics.unknown_calls.sum()) > 0
+
+
+def test_reports(repository, tmp_path):
+    metrics = Analyzer(str(repository), jobs=1).metrics()
+    metrics.write_json(tmp_path / "metrics.json", top=5)
+    report = json.loads((tmp_path / "metrics.json").read_text())
+    assert len(report["hotspots"]) <= 5
+    assert [row["name"] for row in report["definitions"]] == [row["name"] for row in metrics.rows()]
+    metrics.write_csv(tmp_path / "metrics.csv")
+    with open(tmp_path / "metrics.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert list(rows[0]) == CSV_FIELDS
+    assert [(row["name"], int(row["fan_in"])) for row in rows] == [
+        (row["name"], row["fan_in"]) for row in metrics.rows()
+    ]
+
+
+def test_empty_graph(tmp_path):
+    metrics = Analyzer(write_files(tmp_path, {"empty.py": "x = 1\n"}), jobs=1).metrics()
+    assert metrics.size == 0
+    assert metrics.to_dict() == {
+        "models": 0,
+        "calls": 0,
+        "unknown_calls": 0,
+        "components": 0,
+        "cycles": [],
+        "entry_points": [],
+        "hotspots": [],
+    }
+    assert np.array_equal(metrics.reachable, [])
@@ -0,0 +1,144 @@
+import ast
+
+import pytest
+
+from libraries.models.class_def import ClassMd, MethodMd
+from libraries.models.exceptions import NonMethodError
+from libraries.models.function_def import FunctionMd
+
+SOURCE = '''
+def function(first, second):
+    """Docstring"""
+    value = start()
+    other, = pair()
+    for item in items():
+        handle(item)
+        if item:
+            nested.call()
+        else:
+            fallback()
+    while check():
+        keep_going()
+    try:
+        attempt()
+    except ValueError:
+        ignored()
+    finally:
+        cleanup()
+    with open_it() as handle:
+        inside()
+    print(value)
+    return finish()
+
+
+class Child(Parent, models.Base):
+    limit = compute_limit()
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.value = value
+        self.other = build()
+        if value:
+            self.nested = 1
+
+    @staticmethod
+    def helper():
+        util.run()
+
+    def method(this):
+        this.helper()
+        super().__init__()
+'''
+
+
+def baseline_calls(node: ast.AST) -> list[str]:
+    """
+    Calls as they were found before the single pass extraction, by recursion over the blocks of the body
+    """
+    calls = []
+    for child in ast.iter_child_nodes(node):
+        value = child.value if isinstance(child, (ast.Expr, ast.Assign)) else None
+        if isinstance(value, ast.Call):
+            if isinstance(value.func, ast.Attribute):
+                calls.append(value.func.attr)
+            elif isinstance(value.func, ast.Name):
+                calls.append(value.func.id)
+        elif isinstance(child, (ast.For, ast.Try, ast.If, ast.While, ast.With)):
+            calls.extend(baseline_calls(child))
+    return calls
+
+
+@pytest.fixture
+def models():
+    function_node, class_node = ast.parse(SOURCE).body
+    return FunctionMd(function_node, "module.py"), ClassMd(class_node, "module.py")
+
+
+def test_function(models):
+    function, _ = models
+    assert function.calls == baseline_calls(function.source)
+    assert function.calls == [
+        "start",
+        "pair",
+        "handle",
+        "call",
+        "fallback",
+        "keep_going",
+        "attempt",
+        "cleanup",
+        "inside",
+        "print",
+    ]
+    assert function.call_paths[:5] == ["start", "pair", "handle", "nested.call", "fallback"]
+    assert function.arguments == ["first", "second"]
+    assert function.vars == ["value"]
+    assert function.docstring == "Docstring"
+    assert (function.lineno, function.end_lineno) == (2, 23)
+
+
+def test_class(models):
+    _, classmd = models
+    init, helper, method = classmd.methods
+    assert classmd.parents == ["Parent", "models.Base"]
+    assert classmd.vars == ["limit"]
+    assert sorted(classmd.attributes) == ["limit", "other", "value"]
+    # Calls of the class include the ones of its methods
+    assert classmd.calls == ["compute_limit"] + init.calls + helper.calls + method.calls
+    assert len(classmd.call_paths) == len(classmd.calls)
+    assert [type(model) for model in classmd.methods] == [MethodMd] * 3
+    assert init.class_object is classmd
+    assert repr(init) == "<MethodMd - Child.__init__>"
+
+
+def test_methods(models):
+    _, classmd = models
+    init, helper, method = classmd.methods
+    # super().__init__() calls the first parent
+    assert init.calls == ["Parent", "build"]
+    assert init.call_paths == ["Parent", "build"]
+    assert sorted(init.attributes) == ["other", "value"]
+    assert init.self_name == "self"
+    assert helper.self_name is None
+    assert method.self_name == "this"
+    assert method.calls == ["helper", "Parent"]
+    assert method.call_paths == ["this.helper", "Parent"]
+
+
+def test_method_without_arguments():
+    class_node = ast.parse("class Broken:\n    def method():\n        pass\n").body[0]
+    with pytest.raises(NonMethodError):
+        ClassMd(class_node)
+
+
+def test_record_round_trip(models):
+    function, classmd = models
+    rebuilt = FunctionMd.from_record(function.to_record(), "module.py")
+    assert rebuilt.to_record() == function.to_record()
+    rebuilt_class = ClassMd.from_record(classmd.to_record(), "module.py")
+    assert rebuilt_class.to_record() == classmd.to_record()
+    assert [method.class_object for method in rebuilt_class.methods] == [rebuilt_class] * 3
+
+
+def test_nested_definitions_have_models_of_their_own():
+    function_node = ast.parse("def outer():\n    first()\n\n    def inner():\n        second()\n").body[0]
+    assert FunctionMd(function_node).calls == ["first"]
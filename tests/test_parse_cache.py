@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+import libraries.parse_cache
+from libraries.mapper import Analyzer
+from libraries.parse_cache import ParseCache
+from libraries.source_parser import Parser
+from tests.conftest import NAMES, label, map_labels
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text("def first():\n    second()\n")
+    return path
+
+
+def store(cache: ParseCache, path):
+    parser = Parser(path)
+    cache.store(path, parser.to_record(), parser.fingerprint)
+    return parser.to_record()
+
+
+def test_hit_and_miss(cache, source):
+    assert cache.load(source) is None
+    record = store(cache, source)
+    assert cache.load(source) == record
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_touched_file(cache, source):
+    record = store(cache, source)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    # Same content under a new mtime is still a hit, and the entry takes the new mtime
+    assert cache.load(source) == record
+    entry = json.loads(next(cache.cache_dir.glob("*.json")).read_text())
+    assert entry["mtime_ns"] == stat.st_mtime_ns + 1_000_000_000
+
+
+def test_changed_file(cache, source):
+    store(cache, source)
+    source.write_text("def first():\n    third()\n")
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.load(source) is None
+
+
+def test_fingerprint_of_parsed_content(cache, source):
+    parser = Parser(source)
+    # Saved again while being parsed, the record must not be stored under the fingerprint of the new content
+    source.write_text("def first():\n    third()\n")
+    cache.store(source, parser.to_record(), parser.fingerprint)
+    assert cache.load(source) is None
+
+
+def test_other_version(cache, source, monkeypatch):
+    store(cache, source)
+    monkeypatch.setattr(libraries.parse_cache, "__version__", "0.0.0")
+    assert cache.load(source) is None
+
+
+def test_corrupted_entry(cache, source):
+    store(cache, source)
+    next(cache.cache_dir.glob("*.json")).write_text("{")
+    assert cache.load(source) is None
+
+
+def test_clear(cache, source):
+    store(cache, source)
+    cache.clear()
+    assert cache.load(source) is None
+    assert cache.stats() == {"hits": 0, "misses": 1}
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_analyzer_with_cache(repository, tmp_path, jobs):
+    expected = Analyzer(repository, jobs=1)
+    cache_dir = tmp_path / "cache"
+    first = Analyzer(repository, cache_dir=cache_dir, jobs=jobs)
+    assert first.cache_stats() == {"hits": 0, "misses": 4}
+    second = Analyzer(repository, cache_dir=cache_dir, jobs=jobs)
+    assert second.cache_stats() == {"hits": 4, "misses": 0}
+    assert second.stats()["files"]["parsed"] == 0
+    for analyzer in (first, second):
+        assert [label(model) for model in analyzer.models_list] == [label(model) for model in expected.models_list]
+        for name in NAMES:
+            assert map_labels(analyzer.create_calls_map(name, True)) == map_labels(
+                expected.create_calls_map(name, True)
+            )
+    # Models loaded from the cache load their AST again when it's needed
+    assert [model.source.name for model in second.models_list] == [model.name for model in expected.models_list]
+    assert Analyzer(repository).cache_stats() is None
@@ -0,0 +1,53 @@
+import pytest
+
+from libraries.mapper import Analyzer
+from tests.conftest import FILES, NAMES, label, map_labels, write_files
+
+
+def snapshot(analyzer: Analyzer) -> tuple:
+    models = [label(model) for model in analyzer.models_list]
+    maps = {name: map_labels(analyzer.create_calls_map(name, True)) for name in NAMES}
+    return [str(path) for path in analyzer.files_paths], models, maps
+
+
+@pytest.fixture
+def many_files(tmp_path):
+    # Enough files for several batches, with names spread across them
+    files = dict(FILES)
+    for index in range(40):
+        files[f"extra/mod{index}.py"] = f"def extra{index}():\n    run([])\n    extra{(index + 1) % 40}()\n"
+    return write_files(tmp_path / "repository", files)
+
+
+@pytest.mark.parametrize("batch_size", [1, 16])
+def test_same_as_one_process(many_files, monkeypatch, batch_size):
+    monkeypatch.setattr(Analyzer, "parse_batch_size", batch_size)
+    expected = snapshot(Analyzer(many_files, jobs=1))
+    analyzer = Analyzer(many_files, jobs=3)
+    assert snapshot(analyzer) == expected
+    assert analyzer.stats()["files"]["parsed"] == len(analyzer.files_paths)
+    assert map_labels(analyzer.create_calls_map("extra0", max_depth=2)) == map_labels(
+        Analyzer(many_files, jobs=1).create_calls_map("extra0", max_depth=2)
+    )
+
+
+def test_pool_with_cache(many_files, tmp_path, monkeypatch):
+    monkeypatch.setattr(Analyzer, "parse_batch_size", 4)
+    cache_dir = tmp_path / "cache"
+    Analyzer(many_files, jobs=1, cache_dir=cache_dir)
+    # Part of the files changed, so they go to the pool while the rest comes from the cache
+    for index in range(0, 40, 3):
+        path = many_files / "extra" / f"mod{index}.py"
+        path.write_text(path.read_text() + "\n\ndef added():\n    pass\n")
+    expected = snapshot(Analyzer(many_files, jobs=1))
+    analyzer = Analyzer(many_files, jobs=3, cache_dir=cache_dir)
+    assert analyzer.cache_stats()["misses"] == 14
+    assert snapshot(analyzer) == expected
+
+
+def test_small_directory_without_pool(repository):
+    # Fewer files than a batch are parsed in the same process
+    analyzer = Analyzer(repository, jobs=4)
+    assert snapshot(analyzer) == snapshot(Analyzer(repository, jobs=1))
+    # Models parsed by other processes never hold their AST, it's loaded when needed
+    assert all(model.source.name == model.name for model in analyzer.models_list)
@@ -0,0 +1,147 @@
+import os
+import threading
+
+import pytest
+
+from libraries.mapper import Analyzer
+from tests.conftest import FILES, NAMES, label, map_labels, write_files
+
+
+def edit(path, content: str):
+    """
+    Writes a file with an mtime of its own, so it's seen as changed however fast the test runs
+    """
+    stat = os.stat(path) if path.exists() else None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    if stat is not None:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def subgraph_labels(analyzer: Analyzer, name: str) -> tuple:
+    subgraph = analyzer.call_subgraph(name, show_unknowns=True)
+    nodes = {label(node) for node in subgraph.nodes}
+    edges = {(label(caller), label(callee)) for caller, callee in subgraph.edges}
+    return nodes, edges
+
+
+def assert_same_as_fresh(analyzer: Analyzer, names: list[str]):
+    fresh = Analyzer(analyzer.path, jobs=1, lazy=analyzer.lazy)
+    for name in names:
+        for show_unknowns in (False, True):
+            expected = map_labels(fresh.create_calls_map(name, show_unknowns))
+            assert map_labels(analyzer.create_calls_map(name, show_unknowns)) == expected, name
+        assert subgraph_labels(analyzer, name) == subgraph_labels(fresh, name), name
+    if not analyzer.lazy:
+        assert [label(model) for model in analyzer.models_list] == [label(model) for model in fresh.models_list]
+
+
+@pytest.fixture(params=[False, True], ids=["eager", "lazy"])
+def analyzer(repository, request):
+    analyzer = Analyzer(repository, jobs=1, lazy=request.param)
+    # Fills the subgraph cache, so refresh has to drop what's outdated
+    for name in NAMES:
+        analyzer.call_subgraph(name, show_unknowns=True)
+    return analyzer
+
+
+def test_nothing_changed(analyzer):
+    changes = analyzer.refresh()
+    assert (changes["added"], changes["modified"], changes["deleted"], changes["names"]) == ([], [], [], [])
+    assert_same_as_fresh(analyzer, NAMES)
+
+
+def test_edit(analyzer, repository):
+    helpers = repository / "pkg" / "helpers.py"
+    edit(helpers, FILES["pkg/helpers.py"].replace('    path = os.path.join("a", "b")', "    check(1)"))
+    changes = analyzer.refresh()
+    assert changes["modified"] == [str(helpers)]
+    assert {"read", "normalize", "Loader", "load"} <= set(changes["names"])
+    assert_same_as_fresh(analyzer, NAMES)
+
+
+def test_add(analyzer, repository):
+    edit(repository / "pkg" / "extra.py", "def extra():\n    read()\n\n\ndef count():\n    extra()\n")
+    changes = analyzer.refresh()
+    assert changes["added"] == [str(repository / "pkg" / "extra.py")]
+    assert set(changes["names"]) == {"extra", "count"}
+    assert_same_as_fresh(analyzer, NAMES + ["extra"])
+
+
+def test_delete(analyzer, repository):
+    (repository / "pkg" / "helpers.py").unlink()
+    changes = analyzer.refresh()
+    assert changes["deleted"] == [str(repository / "pkg" / "helpers.py")]
+    assert "normalize" in changes["names"]
+    remaining = [name for name in NAMES if name not in ("normalize", "Loader", "load", "parse", "Plain", "method")]
+    assert_same_as_fresh(analyzer, [name for name in remaining if name != "read"])
+    with pytest.raises(IndexError):
+        analyzer.create_calls_map("normalize")
+
+
+def test_several_refreshes(analyzer, repository):
+    core = repository / "pkg" / "core.py"
+    edit(core, FILES["pkg/core.py"] + "\n\ndef added():\n    run([])\n")
+    analyzer.refresh()
+    edit(repository / "tasks" / "other.py", "from pkg.core import added\n\n\ndef other():\n    added()\n")
+    analyzer.refresh()
+    edit(core, FILES["pkg/core.py"])
+    analyzer.refresh()
+    assert_same_as_fresh(analyzer, NAMES + ["other"])
+
+
+IMPORTS = {
+    "a.py": "from b import helper\n\n\ndef f():\n    helper()\n",
+    # Only re-exports a helper, so it defines no names of its own
+    "b.py": "from c import helper\n",
+    "c.py": "def helper():\n    from_c()\n\n\ndef from_c():\n    pass\n",
+    "d.py": "def helper():\n    from_d()\n\n\ndef from_d():\n    pass\n",
+}
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_import_only_edit(tmp_path, lazy):
+    repository = write_files(tmp_path, IMPORTS)
+    analyzer = Analyzer(repository, jobs=1, lazy=lazy)
+    assert "c.py" in {node.location.name for node in analyzer.call_subgraph("f").nodes}
+    edit(repository / "b.py", "from d import helper\n")
+    changes = analyzer.refresh()
+    assert changes["modified"] == [str(repository / "b.py")]
+    assert changes["names"] == ["helper"]
+    assert {label(node) for node in analyzer.call_subgraph("f").nodes} == {
+        "a.py:4:f",
+        "d.py:1:helper",
+        "d.py:5:from_d",
+    }
+    assert_same_as_fresh(analyzer, ["f", "helper", "from_c", "from_d"])
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_import_added_and_deleted(tmp_path, lazy):
+    files = dict(IMPORTS)
+    del files["b.py"]
+    repository = write_files(tmp_path, files)
+    analyzer = Analyzer(repository, jobs=1, lazy=lazy)
+    analyzer.call_subgraph("f")
+    edit(repository / "b.py", "from d import helper\n")
+    changes = analyzer.refresh()
+    # Lazy analyses only parse the new module once a query needs it
+    assert changes["names"] == ([] if lazy else ["helper"])
+    assert_same_as_fresh(analyzer, ["f"])
+    (repository / "b.py").unlink()
+    assert analyzer.refresh()["names"] == ["helper"]
+    assert_same_as_fresh(analyzer, ["f"])
+
+
+def test_watch(analyzer, repository):
+    changes = []
+    stop = threading.Event()
+
+    def on_change(change: dict):
+        changes.append(change)
+        stop.set()
+
+    edit(repository / "pkg" / "extra.py", "def extra():\n    read()\n")
+    analyzer.watch(interval=0.01, on_change=on_change, stop=stop)
+    assert len(changes) == 1 and changes[0]["names"] == ["extra"]
+    assert_same_as_fresh(analyzer, NAMES + ["extra"])
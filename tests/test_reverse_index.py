@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from libraries.mapper import Analyzer
+from libraries.server import AnalysisServer
+from tests.conftest import NAMES, label
+
+
+@pytest.fixture
+def analyzer(repository):
+    return Analyzer(repository)
+
+
+def labels(models: dict) -> dict:
+    return {label(model): distance for model, distance in models.items()}
+
+
+def direct_callers(analyzer: Analyzer, name: str) -> set[str]:
+    """
+    Callers found by mapping every model one call deep, the way they were found before the reverse index
+    """
+    targets = {label(model) for model in analyzer.create_calls_map(name, max_depth=0)}
+    callers = set()
+    for model in analyzer.models_list:
+        calls_map = analyzer.call_graph.calls_map(analyzer.call_graph.ids[model], max_depth=1)
+        for caller, callees in calls_map.items():
+            if caller is not None and targets & {label(callee) for callee in callees}:
+                callers.add(label(caller))
+    return callers
+
+
+def test_direct_callers(analyzer):
+    for name in NAMES:
+        found = labels(analyzer.callers(name, depth=1))
+        assert {caller for caller, distance in found.items() if distance == 1} == direct_callers(analyzer, name) - {
+            caller for caller, distance in found.items() if distance == 0
+        }, name
+
+
+def test_callers(analyzer):
+    assert labels(analyzer.callers("read")) == {
+        "helpers.py:26:read": 0,
+        "helpers.py:4:normalize": 1,
+        "helpers.py:13:load": 1,
+        "core.py:11:process": 2,
+        "helpers.py:22:method": 2,
+        "task.py:11:report": 2,
+        "helpers.py:10:__init__": 2,
+        "core.py:17:validate": 3,
+        "core.py:4:run": 3,
+        "task.py:5:main": 3,
+    }
+    assert labels(analyzer.callers("read", depth=1)) == {
+        "helpers.py:26:read": 0,
+        "helpers.py:4:normalize": 1,
+        "helpers.py:13:load": 1,
+    }
+    # Classes are looked for as their __init__
+    assert labels(analyzer.callers("Loader", depth=1)) == {"helpers.py:10:__init__": 0, "core.py:4:run": 1}
+    assert labels(analyzer.callers("pkg.core.check")) == {
+        "core.py:23:check": 0,
+        "core.py:17:validate": 1,
+        "core.py:11:process": 2,
+        "core.py:4:run": 3,
+        "task.py:5:main": 4,
+    }
+    with pytest.raises(IndexError):
+        analyzer.callers("missing")
+
+
+def test_impacted_by_relative_paths(analyzer, repository, tmp_path, monkeypatch):
+    expected = labels(analyzer.impacted_by([repository / "tasks" / "task.py"]))
+    assert expected == {
+        "task.py:5:main": 0,
+        "task.py:11:report": 0,
+        "task.py:21:count": 0,
+        # Classes are taken as their __init__
+        "task.py:17:__init__": 0,
+        "core.py:4:run": 1,
+    }
+    # Relative paths are taken from the analyzed directory, not from the working directory
+    monkeypatch.chdir(tmp_path)
+    assert labels(analyzer.impacted_by(["tasks/task.py"])) == expected
+    assert labels(analyzer.impacted_by(["pkg/../tasks/task.py"])) == expected
+    assert labels(analyzer.impacted_by(["pkg/core.py"], depth=1)) == {
+        "core.py:4:run": 0,
+        "core.py:11:process": 0,
+        "core.py:17:validate": 0,
+        "core.py:23:check": 0,
+        "task.py:5:main": 1,
+    }
+    # Files without definitions impact nothing, but are still part of the analysis
+    assert analyzer.impacted_by(["pkg/__init__.py"]) == {}
+
+
+def test_impacted_by_missing_files(analyzer, repository):
+    with pytest.raises(IndexError, match="missing.py"):
+        analyzer.impacted_by(["pkg/core.py", "pkg/missing.py"])
+    with pytest.raises(IndexError):
+        analyzer.impacted_by([repository.parent / "outside.py"])
+
+
+def test_impacted_by_lazy(repository, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lazy = Analyzer(repository, lazy=True)
+    assert labels(lazy.impacted_by(["pkg/helpers.py"])) == labels(Analyzer(repository).impacted_by(["pkg/helpers.py"]))
+
+
+def test_server_impacted(analyzer, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = AnalysisServer({"repository": analyzer})
+
+    def post(body) -> tuple:
+        status, _, content = asyncio.run(server.handle("POST /impacted?depth=1 HTTP/1.1", json.dumps(body).encode()))
+        return status, json.loads(content)
+
+    status, content = post(["pkg/core.py"])
+    assert status == 200
+    assert {(node["name"], node["depth"]) for node in content} == {
+        ("run", 0),
+        ("process", 0),
+        ("validate", 0),
+        ("check", 0),
+        ("main", 1),
+    }
+    status, content = post(["pkg/missing.py"])
+    assert status == 404 and "missing.py" in content["error"]
+    assert post([1])[0] == 400
@@ -0,0 +1,119 @@
+import shutil
+import subprocess
+
+import pytest
+
+from libraries.mapper import Analyzer
+from libraries.revisions import GitError, changed_files, check_head, git
+from tests.conftest import NAMES, label, map_labels, write_files
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def commit(root, message: str):
+    git(root, "add", "-A")
+    git(root, "-c", "user.name=tests", "-c", "user.email=tests@example.com", "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def git_repository(repository):
+    subprocess.run(["git", "init", "-q", str(repository)], check=True)
+    commit(repository, "base")
+    return repository
+
+
+def change_files(root):
+    """
+    Modifies, adds and deletes a file of the repository
+    """
+    core = root / "pkg" / "core.py"
+    core.write_text(core.read_text().replace("        process(item)\n", "        validate(item)\n"))
+    write_files(root, {"pkg/extra.py": "from pkg.core import run\n\n\ndef extra():\n    run([])\n"})
+    (root / "pkg" / "helpers.py").unlink()
+
+
+def assert_same_as_fresh(analyzer: Analyzer):
+    fresh = Analyzer(analyzer.path, jobs=1)
+    # Added files aren't walked, so they may be in another place of the order than the one scandir gives them
+    assert sorted(label(model) for model in analyzer.models_list) == sorted(label(model) for model in fresh.models_list)
+    for name in fresh.raw_map:
+        assert map_labels(analyzer.create_calls_map(name, True)) == map_labels(fresh.create_calls_map(name, True))
+
+
+def test_changed_files(git_repository):
+    change_files(git_repository)
+    changes = changed_files(git_repository, "HEAD")
+    assert changes == {
+        "added": [],
+        "modified": [git_repository / "pkg" / "core.py"],
+        "deleted": [git_repository / "pkg" / "helpers.py"],
+    }
+    commit(git_repository, "head")
+    changes = changed_files(git_repository / "pkg", "HEAD~1", "HEAD")
+    assert changes["added"] == [git_repository / "pkg" / "extra.py"]
+
+
+def test_renamed_file(git_repository):
+    (git_repository / "tasks" / "task.py").rename(git_repository / "tasks" / "jobs.py")
+    commit(git_repository, "rename")
+    changes = changed_files(git_repository, "HEAD~1", "HEAD")
+    assert changes["added"] == [git_repository / "tasks" / "jobs.py"]
+    assert changes["deleted"] == [git_repository / "tasks" / "task.py"]
+
+
+def test_update_between_revisions(git_repository):
+    analyzer = Analyzer(str(git_repository), jobs=1)
+    for name in NAMES:
+        analyzer.call_subgraph(name, show_unknowns=True)
+    change_files(git_repository)
+    commit(git_repository, "head")
+    report = analyzer.update_from_git("HEAD~1", "HEAD")
+    assert report["files"] == {
+        "added": [str(git_repository / "pkg" / "extra.py")],
+        "modified": [str(git_repository / "pkg" / "core.py")],
+        "deleted": [str(git_repository / "pkg" / "helpers.py")],
+    }
+    assert report["definitions"]["added"] == ["pkg.extra.extra"]
+    assert "pkg.helpers.Loader" in report["definitions"]["removed"]
+    assert ["pkg.core.run", "pkg.core.validate"] in report["edges"]["added"]
+    assert ["pkg.core.run", "pkg.core.process"] in report["edges"]["removed"]
+    # run is reached from main, which nothing calls
+    assert ["pkg.core.run", "pkg.core.validate"] in report["entry_points"]["tasks.task.main"]["added"]
+    assert_same_as_fresh(analyzer)
+
+
+def test_update_from_the_working_tree(git_repository):
+    analyzer = Analyzer(str(git_repository), jobs=1)
+    change_files(git_repository)
+    report = analyzer.update_from_git("HEAD")
+    # Untracked files are left out
+    assert report["files"]["added"] == []
+    assert [name for name in report["definitions"]["removed"] if name.startswith("pkg.helpers")]
+    assert "extra" not in analyzer.raw_map
+    git(git_repository, "add", "-A")
+    report = analyzer.update_from_git("HEAD")
+    assert report["files"]["added"] == [str(git_repository / "pkg" / "extra.py")]
+    assert_same_as_fresh(analyzer)
+
+
+def test_nothing_changed(git_repository):
+    analyzer = Analyzer(str(git_repository), jobs=1)
+    report = analyzer.update_from_git("HEAD", "HEAD")
+    assert report["edges"] == {"added": [], "removed": []}
+    assert report["definitions"] == {"added": [], "removed": []}
+    assert_same_as_fresh(analyzer)
+
+
+def test_head_should_be_checked_out(git_repository):
+    change_files(git_repository)
+    commit(git_repository, "head")
+    with pytest.raises(GitError):
+        check_head(git_repository, "HEAD~1")
+    analyzer = Analyzer(str(git_repository), jobs=1)
+    with pytest.raises(GitError):
+        analyzer.update_from_git("HEAD", "HEAD~1")
+
+
+def test_outside_of_a_repository(repository):
+    with pytest.raises(GitError):
+        changed_files(repository, "HEAD")
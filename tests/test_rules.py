@@ -0,0 +1,134 @@
+import ast
+import json
+from pathlib import Path
+
+import pytest
+
+from libraries.mapper import Analyzer
+from libraries.models.function_def import FunctionMd
+from libraries.rules import MAX_BROWSER_BUG, Rule, RuleEngine, load_rules
+from tests.conftest import write_files
+
+BROWSER_FILES = {
+    "tests/browser.py": """def resized(b):
+    b.set_window_size(1920, 1600)
+    b.maximize_browser_window()
+
+
+def separated(b):
+    b.set_window_size(1920, 1600)
+    b.go_to("page")
+    b.maximize_browser_window()
+
+
+def reversed_order(b):
+    b.maximize_browser_window()
+    b.set_window_size(1920, 1600)
+
+
+def twice(b):
+    b.set_window_size(1920, 1600)
+    b.maximize_browser_window()
+    b.close()
+    b.set_window_size(800, 600)
+    b.maximize_browser_window()
+
+
+class Suite:
+    def setup(self):
+        self.browser.set_window_size(1920, 1600)
+        self.browser.maximize_browser_window()
+""",
+    "tests/nested.py": """def nested(b, pages):
+    for page in pages:
+        b.set_window_size(1920, 1600)
+        b.maximize_browser_window()
+""",
+}
+
+
+def baseline_max_browser_bug(models_list: list) -> list:
+    """
+    Top level pattern that the baseline looked for: a method call to set_window_size followed by one to
+    maximize_browser_window, in consecutive statements of the body of a model
+    """
+    culprits = []
+    for model in models_list:
+        statements = list(ast.iter_child_nodes(model.source))
+        for node, next_node in zip(statements, statements[1:]):
+            calls = [
+                statement.value.func.attr
+                for statement in (node, next_node)
+                if isinstance(statement, ast.Expr)
+                and isinstance(statement.value, ast.Call)
+                and isinstance(statement.value.func, ast.Attribute)
+            ]
+            if calls == ["set_window_size", "maximize_browser_window"]:
+                culprits.append((model.location, next_node.lineno))
+    return culprits
+
+
+@pytest.fixture
+def browser_repository(tmp_path):
+    root = tmp_path / "browser"
+    write_files(root, BROWSER_FILES)
+    return root
+
+
+def test_max_browser_bug_matches_the_baseline(browser_repository):
+    analyzer = Analyzer(str(browser_repository), jobs=1)
+    found = analyzer.identify_max_browser_bug()
+    baseline = baseline_max_browser_bug(analyzer.models_list)
+    nested = browser_repository / "tests" / "nested.py"
+    # Blocks nested in the body are looked at as well, which the baseline didn't
+    assert [culprit for culprit in found if culprit[0] != nested] == baseline
+    assert [culprit for culprit in found if culprit[0] == nested] == [(nested, 4)]
+    assert sorted(line for _, line in baseline) == [3, 19, 22, 28]
+
+
+def test_rules_are_checked_at_once(browser_repository):
+    analyzer = Analyzer(str(browser_repository), jobs=1)
+    close = Rule("close", ["close"], "browser closed")
+    navigation = Rule("navigation", ["set_window_size", "go_to"])
+    findings = analyzer.check_rules([MAX_BROWSER_BUG, close, navigation])
+    by_rule = {}
+    for finding in findings:
+        by_rule.setdefault(finding.rule.name, []).append((finding.model.name, finding.lineno))
+    assert sorted(by_rule["max-browser-bug"]) == [
+        ("nested", 4),
+        ("resized", 3),
+        ("setup", 28),
+        ("twice", 19),
+        ("twice", 22),
+    ]
+    assert by_rule["close"] == [("twice", 20)]
+    assert by_rule["navigation"] == [("separated", 8)]
+    engine = RuleEngine([close])
+    assert [finding.to_dict() for finding in analyzer.check_rules(engine)] == [
+        {
+            "rule": "close",
+            "message": "browser closed",
+            "file": str(browser_repository / "tests" / "browser.py"),
+            "line": 20,
+            "model": "twice",
+        }
+    ]
+
+
+def test_overlapping_rules():
+    engine = RuleEngine([Rule("pair", ["a", "b"]), Rule("triple", ["x", "a", "b"]), Rule("single", ["b"])])
+    tree = ast.parse("def f():\n    x()\n    a()\n    b()\n    a()\n    c = b()\n")
+    model = FunctionMd(tree.body[0], Path("module.py"))
+    findings = [(finding.rule.name, finding.lineno) for finding in engine.check_model(model)]
+    assert sorted(findings) == sorted([("pair", 4), ("triple", 4), ("single", 4), ("pair", 6), ("single", 6)])
+
+
+def test_rule_from_dict(tmp_path):
+    rule = Rule.from_dict({"name": "quit", "call": "quit", "message": "browser quit"})
+    assert rule.calls == ["quit"] and rule.message == "browser quit"
+    assert Rule.from_dict({"name": "pair", "calls": ["a", "b"]}).calls == ["a", "b"]
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"name": "quit", "call": "quit"}, {"name": "pair", "calls": ["a", "b"]}]))
+    assert [rule.name for rule in load_rules(path)] == ["quit", "pair"]
+    with pytest.raises(ValueError):
+        Rule("empty", [])
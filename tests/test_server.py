@@ -0,0 +1,138 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from libraries.diagram_maker import iter_map_edges, node_label
+from libraries.mapper import Analyzer
+from libraries.server import AnalysisServer, map_to_dict
+from tests.conftest import FILES, write_files
+
+
+@pytest.fixture
+def analyzer(repository):
+    return Analyzer(str(repository), jobs=1)
+
+
+@pytest.fixture
+def server(analyzer):
+    return AnalysisServer({"repository": analyzer})
+
+
+def request(server: AnalysisServer, request_line: str, body: bytes = b"") -> tuple:
+    status, content_type, content = asyncio.run(server.handle(f"{request_line} HTTP/1.1", body))
+    content = json.loads(content) if content_type == "application/json" else content.decode()
+    return status, content
+
+
+def test_repositories(server, repository):
+    assert request(server, "GET /repositories") == (HTTPStatus.OK, {"repository": str(repository)})
+
+
+@pytest.mark.parametrize("show_unknowns", [False, True])
+def test_calls_map(server, analyzer, show_unknowns):
+    for name in analyzer.raw_map:
+        status, content = request(server, f"GET /calls_map?call={name}&show_unknowns={int(show_unknowns)}")
+        assert status == HTTPStatus.OK
+        expected = map_to_dict(analyzer.create_calls_map(name, show_unknowns))
+        assert content["nodes"] == expected["nodes"] and content["edges"] == expected["edges"]
+        assert content["truncated"] is False
+
+
+def test_calls_map_edges(server, analyzer):
+    _, content = request(server, "GET /calls_map?call=run")
+    nodes = [node["name"] for node in content["nodes"]]
+    edges = [
+        (nodes[caller] if caller is not None else None, nodes[callee], depth)
+        for caller, callee, depth in content["edges"]
+    ]
+    expected = [
+        (node_label(caller) if caller is not None else None, node_label(callee), depth)
+        for caller, callee, depth in iter_map_edges(analyzer.create_calls_map("run"))
+    ]
+    assert edges == expected
+
+
+def test_calls_map_budgets(server):
+    _, content = request(server, "GET /calls_map?call=run&max_depth=1")
+    assert content["truncated"] is True
+    assert max(depth for _, _, depth in content["edges"]) == 1
+
+
+def test_diagram(server, analyzer):
+    status, content = request(server, "GET /diagram?call=main&show_unknowns=1")
+    assert status == HTTPStatus.OK
+    assert content == analyzer.create_diagram("main", True)
+
+
+def test_export(server, analyzer):
+    status, content = request(server, "GET /export?level=module&format=json")
+    assert status == HTTPStatus.OK
+    assert content == json.loads(analyzer.export_graph("module", "json"))
+    status, content = request(server, "GET /export?level=class&format=dot&call=main")
+    assert content == analyzer.export_graph("class", "dot", None, "main")
+    assert request(server, "GET /export?level=galaxy")[0] == HTTPStatus.BAD_REQUEST
+
+
+def test_rules(server):
+    status, content = request(server, "GET /rules")
+    assert (status, content) == (HTTPStatus.OK, [])
+    rules = [{"name": "print", "call": "print"}]
+    status, content = request(server, "POST /rules", json.dumps(rules).encode())
+    assert [(finding["rule"], finding["model"]) for finding in content] == [("print", "process")]
+    assert request(server, "POST /rules", b'[{"calls": []}]')[0] == HTTPStatus.BAD_REQUEST
+
+
+def test_callers(server, analyzer):
+    status, content = request(server, "GET /callers?call=read&depth=1")
+    assert status == HTTPStatus.OK
+    expected = {node_label(model): depth for model, depth in analyzer.callers("read", 1).items()}
+    assert {caller["name"]: caller["depth"] for caller in content} == expected
+
+
+def test_metrics_and_stats(server, analyzer):
+    status, content = request(server, "GET /metrics?top=3")
+    assert status == HTTPStatus.OK
+    assert content == json.loads(json.dumps(analyzer.metrics().to_dict(3)))
+    status, content = request(server, "GET /stats")
+    assert status == HTTPStatus.OK
+    assert content["files"]["discovered"] == len(FILES)
+
+
+def test_reload(server, repository):
+    write_files(repository, {"extra.py": "def extra():\n    run()\n"})
+    status, content = request(server, "POST /reload")
+    assert status == HTTPStatus.OK
+    assert content["added"] == [str(repository / "extra.py")]
+    _, content = request(server, "GET /calls_map?call=extra")
+    assert [(node["name"], node["line"]) for node in content["nodes"]][:2] == [("extra", 1), ("run", 4)]
+
+
+def test_errors(server, analyzer):
+    assert request(server, "GET /nowhere")[0] == HTTPStatus.NOT_FOUND
+    assert request(server, "GET /calls_map")[0] == HTTPStatus.BAD_REQUEST
+    assert request(server, "GET /calls_map?call=missing")[0] == HTTPStatus.NOT_FOUND
+    assert request(server, "GET /calls_map?call=run&max_depth=deep")[0] == HTTPStatus.BAD_REQUEST
+    assert request(server, "GET /calls_map?call=run&repo=other")[0] == HTTPStatus.NOT_FOUND
+    many = AnalysisServer({"first": analyzer, "second": analyzer})
+    assert request(many, "GET /calls_map?call=run")[0] == HTTPStatus.BAD_REQUEST
+    assert request(many, "GET /calls_map?call=run&repo=second")[0] == HTTPStatus.OK
+
+
+def test_connection(server):
+    async def exchange():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /calls_map?call=check HTTP/1.1\r\n\r\n")
+            writer.write(b"GET /repositories HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+
+    response = asyncio.run(exchange())
+    assert response.count(b"HTTP/1.1 200 OK") == 2
+    assert b"Connection: close" in response
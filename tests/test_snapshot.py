@@ -0,0 +1,42 @@
+import pytest
+
+from libraries.diagram_maker import iter_map_edges
+from libraries.mapper import Analyzer
+
+
+def edges(analyzer: Analyzer, call_name: str) -> list[tuple]:
+    def label(model):
+        location = getattr(model, "location", None)
+        return None if model is None else (str(location), model.name)
+
+    calls_map = analyzer.create_calls_map(call_name, show_unknowns=True)
+    return [(label(caller), label(callee), depth) for caller, callee, depth in iter_map_edges(calls_map)]
+
+
+@pytest.fixture
+def repository(tmp_path):
+    # Each module calls into the one before it, so a lazy analysis loads them in the reverse order of discovery
+    for index in range(8):
+        lines = [f"from mod{index - 1} import func{index - 1}, Cls{index - 1}", ""] if index else []
+        lines += [f"def func{index}():", "    helper()"]
+        if index:
+            lines += [f"    func{index - 1}()", f"    Cls{index - 1}().run()"]
+        lines += ["", "", "def helper():", "    print()", "", ""]
+        lines += [f"class Cls{index}:", "    def __init__(self):", "        helper()", "", "    def run(self):"]
+        lines += [f"        func{index}()" if index % 3 == 0 else "        helper()", ""]
+        (tmp_path / f"mod{index}.py").write_text("\n".join(lines))
+    return tmp_path
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_snapshot_round_trip(repository, tmp_path_factory, lazy):
+    expected = Analyzer(repository)
+    analyzer = Analyzer(repository, lazy=lazy)
+    # Loads part of the files first, in the order the query reaches them
+    analyzer.create_calls_map("func5")
+    snapshot_path = tmp_path_factory.mktemp("snapshot") / "analysis.sqlite"
+    analyzer.to_snapshot(snapshot_path)
+    loaded = Analyzer.from_snapshot(snapshot_path)
+    for index in range(8):
+        assert edges(loaded, f"func{index}") == edges(expected, f"func{index}")
+        assert edges(loaded, f"Cls{index}") == edges(expected, f"Cls{index}")
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from libraries.source_parser import ImportMap, Parser
+
+SOURCE = """import os.path
+import numpy as np
+from .models import Md as Model
+from ..helpers import *
+
+
+def first(value):
+    os.path.join(value, np.array([1]))
+    result = second(third(value)).strip()
+    return Model(result)
+
+
+class Browser:
+    def open(self):
+        self.b.open_available_browser(url=first("x"))
+
+    def close(self):
+        super().close()
+"""
+
+
+@pytest.fixture
+def parser(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(SOURCE)
+    return Parser(path)
+
+
+def regex_calls(source: str) -> list[str]:
+    # What Parser found before reading the calls from the AST, for sources without strings or comments
+    source = re.sub(r"(def|class) \w+\(", "", source)
+    return [name[:-1] for name in re.findall(r"[a-zA-Z0-9_.]+\(", source)]
+
+
+def test_all_callables(parser):
+    assert parser.all_callables == regex_calls(SOURCE.replace('"x"', "x"))
+
+
+def test_encapsulated_callables(parser):
+    assert parser.encapsulated_callables == {
+        "first": ["os.path.join", "np.array", "second", "third", ".strip", "Model"],
+        "Browser.open": ["self.b.open_available_browser", "first"],
+        "Browser.close": ["super", ".close"],
+    }
+    assert parser.encapsulated_callables is parser.encapsulated_callables
+
+
+def test_import_map(parser):
+    assert parser.import_map.names == {"os": "os", "np": "numpy", "Model": ".models.Md"}
+    assert parser.import_map.star == ["..helpers"]
+
+
+def test_record_round_trip(parser):
+    record = parser.to_record()
+    functions, classes = Parser.models_from_record(record, parser.path)
+    assert [(model.name, model.calls, model.call_paths) for model in functions] == [
+        (model.name, model.calls, model.call_paths) for model in parser.functions
+    ]
+    assert [[method.name for method in model.methods] for model in classes] == [["open", "close"]]
+    import_map = Parser.import_map_from_record(record)
+    assert isinstance(import_map, ImportMap)
+    assert import_map.names == parser.import_map.names
@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+
+from libraries.diagram_maker import Diagram, iter_map_edges
+from libraries.mapper import Analyzer
+from tests.conftest import NAMES, label, write_files
+
+
+def edge_labels(edges) -> list:
+    return [(label(caller), label(callee), depth) for caller, callee, depth in edges]
+
+
+@pytest.fixture(params=[False, True], ids=["eager", "lazy"])
+def analyzer(repository, request):
+    return Analyzer(repository, jobs=1, lazy=request.param)
+
+
+@pytest.mark.parametrize("show_unknowns", [False, True])
+def test_same_order_as_the_map(analyzer, show_unknowns):
+    for name in NAMES:
+        expected = edge_labels(iter_map_edges(analyzer.create_calls_map(name, show_unknowns)))
+        assert edge_labels(analyzer.iter_calls(name, show_unknowns)) == expected, name
+
+
+@pytest.mark.parametrize("budgets", [{"max_depth": 1}, {"max_depth": 2}, {"max_nodes": 3}])
+def test_budgets(analyzer, budgets):
+    for name in NAMES:
+        expected = edge_labels(iter_map_edges(analyzer.create_calls_map(name, True, **budgets)))
+        assert edge_labels(analyzer.iter_calls(name, True, **budgets)) == expected, name
+
+
+def test_repeated_calls_are_not_merged(tmp_path):
+    analyzer = Analyzer(write_files(tmp_path, {"module.py": "def a():\n    b()\n    b()\n\n\ndef b():\n    pass\n"}))
+    streamed = edge_labels(analyzer.iter_calls("a"))
+    call = ("module.py:1:a", "module.py:6:b", 1)
+    assert streamed == [(None, "module.py:1:a", 0), call, call]
+    assert list(dict.fromkeys(streamed)) == edge_labels(iter_map_edges(analyzer.create_calls_map("a")))
+
+
+def test_walk_stops_with_the_consumer(tmp_path):
+    functions = [f"def f{index}():\n    f{index + 1}()\n" for index in range(2000)] + ["def f2000():\n    pass\n"]
+    analyzer = Analyzer(write_files(tmp_path, {"chain.py": "\n\n".join(functions)}))
+    edges = analyzer.iter_calls("f0")
+    assert [callee.name for _, callee, _ in itertools.islice(edges, 5)] == ["f0", "f1", "f2", "f3", "f4"]
+    edges.close()
+    query = analyzer.stats()["queries"]["latest"][-1]
+    assert query["call_name"] == "f0"
+    assert query["nodes"] < 10
+
+
+def test_diagram_without_the_map(analyzer, monkeypatch):
+    expected = {name: Diagram(analyzer.create_calls_map(name, True), f"{name} workflow").diagram_code for name in NAMES}
+
+    def create_calls_map(*args, **kwargs):
+        raise AssertionError("the map shouldn't be created")
+
+    monkeypatch.setattr(analyzer, "create_calls_map", create_calls_map)
+    for name in NAMES:
+        assert analyzer.create_diagram(name, True) == expected[name]
@@ -0,0 +1,97 @@
+from collections import deque
+
+import pytest
+
+from libraries.mapper import Analyzer
+from libraries.subgraph_cache import SubgraphCache
+from tests.conftest import NAMES, label
+
+
+def reachable(graph, symbol: int, show_unknowns: bool) -> tuple[set, set]:
+    """
+    Models reachable from symbol and the calls between them, by a plain breadth-first search over the graph
+    """
+    nodes = set()
+    edges = set()
+    queue = deque([graph.canonical[symbol]])
+    while queue:
+        call = queue.popleft()
+        if call == -1 or label(graph.models[call]) in nodes:
+            continue
+        nodes.add(label(graph.models[call]))
+        for subcall in graph.callees(call):
+            if graph.is_unknown(subcall):
+                if show_unknowns:
+                    edges.add((label(graph.models[call]), f"?{graph.unknown_names[subcall - len(graph)]}"))
+                continue
+            callee = graph.canonical[subcall]
+            if callee != -1:
+                edges.add((label(graph.models[call]), label(graph.models[callee])))
+                queue.append(callee)
+    return nodes, edges
+
+
+def labels(subgraph) -> tuple[set, set]:
+    return {label(node) for node in subgraph.nodes}, {
+        (label(caller), label(callee)) for caller, callee in subgraph.edges
+    }
+
+
+@pytest.mark.parametrize("show_unknowns", [False, True])
+@pytest.mark.parametrize("cache_size", [0, 2, 256])
+def test_same_as_search(repository, show_unknowns, cache_size):
+    analyzer = Analyzer(repository, subgraph_cache_size=cache_size)
+    graph = analyzer.call_graph
+    # Twice, so the second round reuses whatever was cached
+    for name in NAMES + NAMES:
+        subgraph = analyzer.call_subgraph(name, show_unknowns)
+        assert labels(subgraph) == reachable(graph, graph.root(name), show_unknowns), name
+        assert subgraph.root is graph.models[graph.root(name)]
+
+
+def test_hits_and_evictions(repository):
+    analyzer = Analyzer(repository, subgraph_cache_size=2)
+    analyzer.call_subgraph("run")
+    misses = analyzer.subgraph_cache_stats()["misses"]
+    assert analyzer.call_subgraph("run") is analyzer.call_subgraph("run")
+    stats = analyzer.subgraph_cache_stats()
+    assert stats["hits"] == 2 and stats["misses"] == misses
+    for name in ("main", "report", "check"):
+        analyzer.call_subgraph(name)
+    stats = analyzer.subgraph_cache_stats()
+    assert stats["size"] == 2 and stats["evictions"] > 0
+    assert analyzer.subgraph_cache.get(analyzer.raw_map["run"], False) is None
+
+
+def test_shared_helpers_are_reused(repository):
+    analyzer = Analyzer(repository)
+    analyzer.call_subgraph("process")
+    # normalize is called from three places, so its subgraph was cached while expanding process
+    assert analyzer.subgraph_cache.get(analyzer.raw_map["normalize"], False) is not None
+    hits = analyzer.subgraph_cache_stats()["hits"]
+    analyzer.call_subgraph("method")
+    assert analyzer.subgraph_cache_stats()["hits"] > hits
+
+
+def test_without_cache(repository):
+    analyzer = Analyzer(repository, subgraph_cache_size=0)
+    analyzer.call_subgraph("run")
+    assert len(analyzer.subgraph_cache) == 0
+
+
+def test_invalidate(repository):
+    analyzer = Analyzer(repository)
+    for name in NAMES:
+        analyzer.call_subgraph(name)
+    cache = analyzer.subgraph_cache
+    size = len(cache)
+    dropped = cache.invalidate({"read"})
+    assert dropped and len(cache) == size - dropped
+    assert all("read" not in subgraph.names for subgraph in cache.entries.values())
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_unknown_models_are_shared():
+    cache = SubgraphCache()
+    assert cache.unknown_model("print") is cache.unknown_model("print")
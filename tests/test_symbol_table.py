@@ -0,0 +1,174 @@
+import pytest
+
+from libraries.mapper import Analyzer
+from libraries.source_parser import ImportMap, Parser
+from libraries.symbol_table import External, SymbolTable, module_name
+from tests.conftest import baseline_calls_map, map_labels, write_files
+
+IMPORTS_FILES = {
+    "app/__init__.py": """from .core import run as start
+""",
+    "app/core.py": """import os.path
+
+from . import helpers
+from .helpers import *
+from app.models import Model as M
+
+
+def run(path):
+    helpers.load()
+    clean()
+    M()
+    os.path.join(path, "x")
+
+
+def guess(obj):
+    obj.load()
+""",
+    "app/helpers.py": """def load():
+    pass
+
+
+def clean():
+    pass
+""",
+    "app/models.py": """class Base:
+    def setup(self):
+        pass
+
+
+class Model(Base):
+    def __init__(self):
+        self.setup()
+""",
+    "other/loader.py": """import app
+
+
+def load():
+    join()
+
+
+def join():
+    app.start("y")
+
+
+def reload():
+    load()
+""",
+    "app/sub/__init__.py": "",
+    "app/sub/deep.py": """from ..helpers import clean as tidy
+from .. import models
+
+
+def deep():
+    tidy()
+    models.Base().setup()
+""",
+}
+
+
+RUN_CALLS = [
+    ["helpers.py:1:load", []],
+    ["helpers.py:5:clean", []],
+    ["models.py:7:__init__", [["models.py:2:setup", []]]],
+]
+
+
+@pytest.fixture
+def imports_repository(tmp_path):
+    root = tmp_path / "imports"
+    write_files(root, IMPORTS_FILES)
+    return root
+
+
+def test_imports_resolve_calls(imports_repository):
+    analyzer = Analyzer(str(imports_repository), jobs=1)
+    assert map_labels(analyzer.create_calls_map("run", show_unknowns=True)) == [
+        [
+            "core.py:8:run",
+            [
+                # Only the load of the imported module, the clean of the star import and the aliased class
+                ["helpers.py:1:load", []],
+                ["helpers.py:5:clean", []],
+                ["models.py:7:__init__", [["models.py:2:setup", []]]],
+                # A call known to lead outside of the directory is never taken for the join defined in it
+                ["?join", []],
+            ],
+        ]
+    ]
+    # By name alone, os.path.join was taken for the join of other/loader.py
+    baseline = map_labels(baseline_calls_map(analyzer.raw_map, "run", show_unknowns=True))
+    assert [callee for callee, _ in baseline[0][1]][-1] == "loader.py:8:join"
+
+
+def test_names_of_the_module_come_first(imports_repository):
+    analyzer = Analyzer(str(imports_repository), jobs=1)
+    assert map_labels(analyzer.create_calls_map("reload")) == [
+        ["loader.py:12:reload", [["loader.py:4:load", [["loader.py:8:join", [["core.py:8:run", RUN_CALLS]]]]]]]
+    ]
+
+
+def test_relative_imports_of_a_subpackage(imports_repository):
+    analyzer = Analyzer(str(imports_repository), jobs=1)
+    assert map_labels(analyzer.create_calls_map("deep")) == [
+        # Base has no __init__, so calling it is left out like by name
+        ["deep.py:5:deep", [["helpers.py:5:clean", []], ["models.py:2:setup", []]]]
+    ]
+
+
+def test_unresolved_calls_match_the_baseline(imports_repository):
+    analyzer = Analyzer(str(imports_repository), jobs=1)
+    # A method called over a variable can't be told from the imports, so it's still guessed by name
+    assert map_labels(analyzer.create_calls_map("guess", True)) == map_labels(
+        baseline_calls_map(analyzer.raw_map, "guess", True)
+    )
+
+
+def test_package_as_root(imports_repository):
+    analyzer = Analyzer(str(imports_repository / "app"), jobs=1)
+    whole = Analyzer(str(imports_repository), jobs=1)
+    assert analyzer.symbols.module_names[imports_repository / "app" / "core.py"] == "app.core"
+    for name in ("run", "app.core.run", "app.sub.deep.deep", "Model"):
+        assert map_labels(analyzer.create_calls_map(name, True)) == map_labels(whole.create_calls_map(name, True))
+
+
+def test_qualified_roots(imports_repository):
+    analyzer = Analyzer(str(imports_repository), jobs=1)
+    assert map_labels(analyzer.create_calls_map("other.loader.load")) == [
+        ["loader.py:4:load", [["loader.py:8:join", [["core.py:8:run", RUN_CALLS]]]]]
+    ]
+    assert map_labels(analyzer.create_calls_map("app.helpers.load")) == [["helpers.py:1:load", []]]
+
+
+def test_module_name(tmp_path):
+    assert module_name(tmp_path / "pkg" / "mod.py", tmp_path) == "pkg.mod"
+    assert module_name(tmp_path / "pkg" / "__init__.py", tmp_path) == "pkg"
+    assert module_name(tmp_path / "__init__.py", tmp_path) == ""
+    assert module_name(tmp_path.parent / "outside.py", tmp_path) == "outside"
+
+
+def test_resolve(imports_repository):
+    symbols = SymbolTable(imports_repository)
+    for path in sorted(imports_repository.rglob("*.py")):
+        parser = Parser(path)
+        symbols.add_file(path, parser.functions, parser.classes, parser.import_map)
+    run = symbols.definitions["app.core.run"]
+    resolved = [symbols.resolve(run, position) for position in range(len(run.calls))]
+    assert resolved[:3] == [
+        symbols.definitions["app.helpers.load"],
+        symbols.definitions["app.helpers.clean"],
+        symbols.definitions["app.models.Model"],
+    ]
+    assert isinstance(resolved[3], External) and resolved[3].name == "os.path.join"
+    guess = symbols.definitions["app.core.guess"]
+    assert symbols.resolve(guess, 0) is None
+    symbols.remove_file(imports_repository / "app" / "helpers.py")
+    assert symbols.resolve(run, 0) is None
+    assert isinstance(symbols.imports["app.core"], ImportMap)
+
+
+def test_lazy_follows_the_imports(imports_repository):
+    eager = Analyzer(str(imports_repository), jobs=1)
+    for name in ("run", "reload", "deep", "other.loader.join"):
+        lazy = Analyzer(str(imports_repository), jobs=1, lazy=True)
+        assert map_labels(lazy.create_calls_map(name, True)) == map_labels(eager.create_calls_map(name, True))
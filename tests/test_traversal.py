@@ -0,0 +1,93 @@
+import itertools
+
+import pytest
+
+import libraries.call_graph
+from libraries.call_graph import ENTER, EXIT
+from libraries.mapper import Analyzer
+from tests.conftest import NAMES, map_labels, write_files
+
+
+@pytest.fixture
+def analyzer(repository):
+    return Analyzer(repository)
+
+
+def depth(calls_map: dict) -> int:
+    deepest = 0
+    stack = [(calls_map, 0)]
+    while stack:
+        submap, level = stack.pop()
+        deepest = max(deepest, level)
+        stack.extend((values, level + 1) for values in submap.values())
+    return deepest
+
+
+def test_deep_chain(tmp_path):
+    # Deeper than the recursion limit of the recursive mapping
+    functions = [f"def f{index}():\n    f{index + 1}()\n" for index in range(3000)] + ["def f3000():\n    pass\n"]
+    analyzer = Analyzer(write_files(tmp_path, {"chain.py": "\n\n".join(functions)}))
+    calls_map = analyzer.create_calls_map("f0")
+    assert depth(calls_map) == 3001
+    assert not calls_map.truncated
+    assert sum(1 for _ in analyzer.iter_calls("f0")) == 3001
+
+
+def test_max_depth(analyzer):
+    calls_map = analyzer.create_calls_map("run", max_depth=1)
+    assert calls_map.truncated
+    assert map_labels(calls_map) == [
+        ["core.py:4:run", [["helpers.py:10:__init__", []], ["core.py:11:process", []], ["task.py:11:report", []]]]
+    ]
+    assert map_labels(analyzer.create_calls_map("run", max_depth=0)) == [["core.py:4:run", []]]
+    # Leaf calls at the limit don't truncate the map
+    assert not analyzer.create_calls_map("count", max_depth=0).truncated
+    assert not analyzer.create_calls_map("run", max_depth=20).truncated
+
+
+def test_max_nodes(analyzer):
+    calls_map = analyzer.create_calls_map("run", max_nodes=3)
+    assert calls_map.truncated
+    assert map_labels(calls_map) == [["core.py:4:run", [["helpers.py:10:__init__", [["helpers.py:13:load", []]]]]]]
+    assert analyzer.stats()["queries"]["latest"][-1]["nodes"] == 3
+    full = analyzer.create_calls_map("run")
+    assert not full.truncated
+    assert map_labels(analyzer.create_calls_map("run", max_nodes=1000)) == map_labels(full)
+
+
+def test_timeout(analyzer):
+    calls_map = analyzer.create_calls_map("run", timeout=0)
+    assert calls_map.truncated
+    assert calls_map == {}
+    assert not analyzer.create_calls_map("run", timeout=60).truncated
+
+
+def test_timeout_while_skipping(tmp_path, monkeypatch):
+    # Every call after the first four is skipped by the revisit rule, so no other node is ever visited
+    body = "".join(f"    h{index}()\n" for index in range(4)) + "    h0()\n" * 5000
+    helpers = "".join(f"\n\ndef h{index}():\n    pass\n" for index in range(4))
+    analyzer = Analyzer(write_files(tmp_path, {"hub.py": f"def hub():\n{body}{helpers}"}))
+    graph = analyzer.call_graph
+    clock = itertools.count()
+    monkeypatch.setattr(libraries.call_graph.time, "perf_counter", lambda: next(clock))
+    counters = {}
+    events = list(graph.iter_events(graph.root("hub"), timeout=20, counters=counters))
+    assert counters["truncated"]
+    assert counters["nodes"] == 5
+    # The deadline is checked every 64 calls, skipped or not, instead of every 64 visits
+    assert next(clock) < 30
+    assert [kind for kind, *_ in events].count(EXIT) == 4
+
+
+def test_events(analyzer):
+    graph = analyzer.call_graph
+    for name in NAMES:
+        events = list(graph.iter_events(graph.root(name)))
+        kinds = [kind for kind, *_ in events]
+        # Every call entered is exited once what's below it was visited
+        assert kinds.count(ENTER) == kinds.count(EXIT)
+        assert events[-1][0] == EXIT
+        assert events[0][:2] == (ENTER, None)
+        edges = [(caller, callee, depth) for kind, caller, callee, depth in events if kind == ENTER]
+        assert list(graph.iter_edges(graph.root(name))) == edges
+        assert [edge[1:] for edge in analyzer.iter_calls(name)] == [edge[1:] for edge in edges]